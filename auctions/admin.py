@@ -1,6 +1,5 @@
 from django.contrib import admin
 from .models import Category, Auction, Bid, Rating
-from django.utils import timezone
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -10,12 +9,14 @@ class CategoryAdmin(admin.ModelAdmin):
 @admin.register(Auction)
 class AuctionAdmin(admin.ModelAdmin):
     list_display = ("id", "title", "auctioneer", "price", "is_open")
-    list_filter = ("category", "auctioneer", "closing_date")
+    list_filter = ("status", "category", "auctioneer", "closing_date")
     search_fields = ("title", "description")
-    readonly_fields = ("creation_date",)
+    readonly_fields = ("creation_date", "rating_sum", "rating_count", "average_rating", "current_price", "highest_bid",
+                       "bid_count", "top_bidder_username", "version", "modified", "status", "winning_bid",
+                       "final_price")
     
     def is_open(self, obj):
-        return obj.closing_date > timezone.now()
+        return obj.is_open
     is_open.boolean = True
     is_open.short_description = "Abierta?"
 
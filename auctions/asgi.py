@@ -0,0 +1,28 @@
+"""
+Punto de entrada ASGI con soporte para conexiones de larga duración (server-sent events).
+
+El ``ASGIHandler`` de Django abre un ``ThreadSensitiveContext`` por petición: el código síncrono
+de esa petición (middleware, consultas) se ejecuta en un hilo propio que vive hasta que termina
+la respuesta. En un stream de eventos eso es un hilo (y una conexión a la base de datos) por
+cliente conectado. Para las rutas de ``STREAMING_URL_NAMES`` ese trabajo síncrono se hace en el
+hilo compartido de asgiref, y la conexión, una vez abierta, solo ocupa una corrutina.
+"""
+from django.core.handlers.asgi import ASGIHandler
+from django.urls import Resolver404, resolve
+
+STREAMING_URL_NAMES = {"auctions:auction-events"}
+
+
+class StreamingASGIHandler(ASGIHandler):
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and self.is_streaming(scope["path"]):
+            await self.handle(scope, receive, send)
+        else:
+            await super().__call__(scope, receive, send)
+
+    @staticmethod
+    def is_streaming(path):
+        try:
+            return resolve(path).view_name in STREAMING_URL_NAMES
+        except Resolver404:
+            return False
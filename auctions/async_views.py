@@ -0,0 +1,161 @@
+"""
+Vistas de lectura asíncronas (ORM asíncrono) para los listados y el detalle de subastas.
+
+DRF no tiene vistas asíncronas, así que cada clase envuelve la vista DRF de siempre
+(``drf_view``): reutiliza su configuración (serializador, paginación, permisos, caché, ETag)
+y solo sustituye el acceso a la base de datos por ``afirst`` / ``acount`` / iteración
+asíncrona. Las escrituras, las peticiones con ``Authorization`` (la autenticación JWT consulta
+la base de datos) y las que no piden JSON (API navegable) se delegan a la vista DRF síncrona.
+
+Solo se montan con ASGI (``ASYNC_READ_VIEWS``, lo activa asgi.py): con WSGI, auctions.urls usa
+directamente las vistas DRF y no paga el salto por async_to_sync.
+"""
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.renderers import JSONRenderer
+
+from .conditional import not_modified, set_validators
+from .models import Auction, Category
+from .readonly import ValuesListMixin
+from .views import (AuctionListCreate, AuctionRetrieveUpdateDestroy, BidListCreate,
+                    CategoryListCreate, CommentListCreate)
+
+
+class DelegateToSync(Exception):
+    """La petición la tiene que atender la vista DRF síncrona."""
+
+
+def not_found(model):
+    # Mismo mensaje que get_object_or_404
+    return Http404(f"No {model._meta.object_name} matches the given query.")
+
+
+class AsyncReadView(View):
+    drf_view = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # drf-spectacular documenta la vista a partir de la clase DRF
+        view.cls = cls.drf_view
+        view.initkwargs = initkwargs
+        return csrf_exempt(view)
+
+    @classmethod
+    def get_sync_view(cls):
+        # Se guarda en __dict__ y se lee de ahí: SyncToAsync es un descriptor
+        if '_sync_view' not in cls.__dict__:
+            cls._sync_view = sync_to_async(cls.drf_view.as_view())
+        return cls.__dict__['_sync_view']
+
+    async def get(self, request, *args, **kwargs):
+        if 'HTTP_AUTHORIZATION' in request.META:
+            return await self.delegate(request, *args, **kwargs)
+
+        drf = self.drf_view()
+        drf.args, drf.kwargs = args, kwargs
+        drf.headers = drf.default_response_headers
+        drf_request = drf.initialize_request(request, *args, **kwargs)
+        drf.request = drf_request
+        try:
+            # Negociación, permisos y throttling: sin consultas para peticiones anónimas
+            drf.initial(drf_request, *args, **kwargs)
+            if not isinstance(drf_request.accepted_renderer, JSONRenderer):
+                raise DelegateToSync
+            response = await self.read(drf, drf_request, *args, **kwargs)
+        except DelegateToSync:
+            return await self.delegate(request, *args, **kwargs)
+        except Exception as exc:
+            response = drf.handle_exception(exc)
+        response = drf.finalize_response(drf_request, response, *args, **kwargs)
+        return self.render(response)
+
+    async def delegate(self, request, *args, **kwargs):
+        return await self.get_sync_view()(request, *args, **kwargs)
+
+    post = put = patch = delete = options = delegate
+
+    async def read(self, drf, request, *args, **kwargs):
+        raise NotImplementedError
+
+    @staticmethod
+    def render(response):
+        # Se renderiza en el bucle de eventos; el render() que luego llama Django no hace nada
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    @staticmethod
+    async def list_response(drf, request, queryset):
+        queryset = drf.filter_queryset(queryset)
+        # Listados de solo lectura: filas de values() sin serializador (ver auctions.readonly)
+        plan = drf.values_plan if isinstance(drf, ValuesListMixin) else None
+        if plan is not None:
+            queryset = drf.values_queryset(queryset)
+        page = await drf.paginator.apaginate_queryset(queryset, request, view=drf)
+        if plan is not None:
+            return drf.get_paginated_response(plan.represent(page))
+        serializer = drf.get_serializer(page, many=True)
+        return drf.get_paginated_response(serializer.data)
+
+
+class AuctionListAsync(AsyncReadView):
+    drf_view = AuctionListCreate
+
+    async def read(self, drf, request, *args, **kwargs):
+        key, response = drf.cached_list_response(request)
+        if response is not None:
+            return response
+        queryset, category_name = drf.filter_auctions(request.query_params)
+        if category_name is not None and not await Category.objects.filter(name=category_name).aexists():
+            raise drf.unknown_category(category_name)
+        return drf.store_list_response(key, await self.list_response(drf, request, queryset))
+
+
+class CategoryListAsync(AsyncReadView):
+    drf_view = CategoryListCreate
+
+    async def read(self, drf, request, *args, **kwargs):
+        key, response = drf.cached_list_response(request)
+        if response is not None:
+            return response
+        return drf.store_list_response(key, await self.list_response(drf, request, drf.get_queryset()))
+
+
+class AuctionDetailAsync(AsyncReadView):
+    drf_view = AuctionRetrieveUpdateDestroy
+
+    async def read(self, drf, request, *args, **kwargs):
+        # Como get_object(): filter_queryset aplica ?fields= / ?omit=
+        instance = await drf.filter_queryset(drf.get_queryset()).filter(pk=kwargs['pk']).afirst()
+        if instance is None:
+            raise not_found(Auction)
+        drf.check_object_permissions(request, instance)
+        return drf.conditional_retrieve(request, instance)
+
+
+class BidListAsync(AsyncReadView):
+    drf_view = BidListCreate
+
+    async def read(self, drf, request, *args, **kwargs):
+        drf.auction = await Auction.objects.only(*drf.validator_fields).filter(pk=kwargs['auction_id']).afirst()
+        if drf.auction is None:
+            raise not_found(Auction)
+        etag, last_modified = drf.list_validators(request)
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+        # get_queryset() ya trae bidder_username (select_related): ninguna consulta síncrona por puja
+        return set_validators(await self.list_response(drf, request, drf.get_queryset()), etag, last_modified)
+
+
+class CommentListAsync(AsyncReadView):
+    drf_view = CommentListCreate
+
+    async def read(self, drf, request, *args, **kwargs):
+        drf.auction = await Auction.objects.only('id').filter(pk=kwargs['auction_id']).afirst()
+        if drf.auction is None:
+            raise not_found(Auction)
+        return await self.list_response(drf, request, drf.get_queryset())
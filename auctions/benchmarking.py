@@ -0,0 +1,394 @@
+"""
+Utilidades compartidas por los comandos de benchmark: base de datos desechable,
+generación de datos sintéticos, medición de tiempos y un cliente ASGI mínimo para
+las conexiones de larga duración (server-sent events), servidores locales y carga HTTP
+contra ellos, y la comparación de resultados con una línea base guardada.
+"""
+import asyncio
+import json
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from urllib.parse import quote
+
+from django.core.management.base import CommandError
+from django.db import connection, reset_queries
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from users.models import CustomUser
+from .models import Category, Auction, Bid, Rating, Comment
+from .search import get_search_backend
+
+
+@contextmanager
+def benchmark_database(keepdb=False, shared=False):
+    """
+    Crea una base de datos de pruebas (test_<nombre>) con las migraciones aplicadas y la
+    destruye al terminar, para no sembrar nunca datos sintéticos en la base de datos real.
+    Con ``shared=True`` SQLite usa un fichero en vez de memoria, para que otros procesos
+    (servidores lanzados por el benchmark) puedan abrirla.
+    """
+    old_name = connection.settings_dict['NAME']
+    if shared and connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = 'benchmark.sqlite3'
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+    try:
+        yield connection
+    finally:
+        if not keepdb:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def seed_dataset(users=50, categories=10, auctions=1000, bids_per_auction=10,
+                 ratings_per_auction=3, comments_per_auction=3, batch_size=2000, seed=0):
+    """Genera un conjunto de datos sintético con bulk_create y recalcula los campos desnormalizados."""
+    rng = random.Random(seed)
+    now = timezone.now()
+
+    CustomUser.objects.bulk_create(
+        [CustomUser(username=f"bench_user_{i}", email=f"bench_user_{i}@example.com",
+                    password="!", birth_date=date(1990, 1, 1)) for i in range(users)],
+        batch_size=batch_size,
+    )
+    user_ids = list(CustomUser.objects.filter(username__startswith="bench_user_").values_list('pk', flat=True))
+
+    Category.objects.bulk_create(
+        [Category(name=f"Categoría {i}") for i in range(categories)], batch_size=batch_size,
+    )
+    category_ids = list(Category.objects.values_list('pk', flat=True))
+
+    words = ["reloj", "bicicleta", "libro", "guitarra", "cámara", "sofá", "lámpara", "teléfono",
+             "vinilo", "portátil", "mesa", "patinete", "consola", "acuarela", "colección"]
+    # Vocabulario amplio para las descripciones, así los términos de búsqueda son selectivos
+    syllables = ["ba", "ce", "di", "fo", "gu", "la", "me", "ni", "po", "ru", "sa", "te", "vi", "zo"]
+    vocabulary = [a + b + c for a in syllables for b in syllables for c in syllables]
+    Auction.objects.bulk_create(
+        [
+            Auction(
+                title=" ".join(rng.sample(words, 3)).capitalize(),
+                description=" ".join(rng.choices(vocabulary, k=40)),
+                price=Decimal(rng.randint(100, 100000)) / 100,
+                stock=rng.randint(1, 10),
+                brand=f"Marca {rng.randint(1, 50)}",
+                category_id=rng.choice(category_ids),
+                thumbnail="https://example.com/img.png",
+                closing_date=now + timedelta(minutes=rng.randint(-30 * 24 * 60, 30 * 24 * 60)),
+                auctioneer_id=rng.choice(user_ids),
+            )
+            for _ in range(auctions)
+        ],
+        batch_size=batch_size,
+    )
+    # creation_date es auto_now_add: se retrasa para que también las subastas ya cerradas sean coherentes
+    Auction.objects.update(creation_date=F('closing_date') - timedelta(days=30))
+    auction_ids = list(Auction.objects.values_list('pk', flat=True))
+
+    def batched(rows):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def bids():
+        for auction_id in auction_ids:
+            price = Decimal(rng.randint(100, 1000)) / 100
+            for _ in range(bids_per_auction):
+                price += Decimal(rng.randint(1, 500)) / 100
+                yield Bid(auction_id=auction_id, bidder_id=rng.choice(user_ids), price=price)
+
+    def ratings():
+        for auction_id in auction_ids:
+            for user_id in rng.sample(user_ids, min(ratings_per_auction, len(user_ids))):
+                yield Rating(auction_id=auction_id, user_id=user_id, value=rng.randint(1, 5))
+
+    def comments():
+        for auction_id in auction_ids:
+            for _ in range(comments_per_auction):
+                yield Comment(auction_id=auction_id, user_id=rng.choice(user_ids),
+                              title="Comentario", body=" ".join(rng.choices(words, k=12)))
+
+    for rows in (bids(), ratings(), comments()):
+        for batch in batched(rows):
+            type(batch[0]).objects.bulk_create(batch)
+
+    # bulk_create no dispara señales: se reconstruyen los campos desnormalizados
+    Auction.objects.rebuild_rating_stats()
+    Auction.objects.rebuild_bid_summary()
+    get_search_backend().rebuild()
+    return {
+        "users": users, "categories": categories, "auctions": len(auction_ids),
+        "bids": len(auction_ids) * bids_per_auction,
+        "ratings": Rating.objects.count(), "comments": len(auction_ids) * comments_per_auction,
+    }
+
+
+def database_url(connection):
+    """URL (formato dj-database-url) de la base de datos a la que apunta ``connection``."""
+    settings_dict = connection.settings_dict
+    if connection.vendor == 'sqlite':
+        return f"sqlite:///{Path(settings_dict['NAME']).resolve()}"
+    credentials = settings_dict['USER'] or ''
+    if settings_dict['PASSWORD']:
+        credentials += f":{quote(settings_dict['PASSWORD'])}"
+    host = settings_dict['HOST'] or 'localhost'
+    port = f":{settings_dict['PORT']}" if settings_dict['PORT'] else ''
+    return f"postgres://{credentials}@{host}{port}/{settings_dict['NAME']}"
+
+
+def time_call(func, repeat=20, warmup=2):
+    """Ejecuta func repetidamente y devuelve estadísticas de tiempo (ms) y consultas por llamada."""
+    for _ in range(warmup):
+        func()
+    timings = []
+    queries = 0
+    for _ in range(repeat):
+        # Una captura por llamada: request_started vacía connection.queries_log en cada petición
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        queries += len(ctx.captured_queries)
+    reset_queries()
+    timings.sort()
+    return {
+        "mean_ms": statistics.fmean(timings),
+        "p50_ms": percentile(timings, 50),
+        "p95_ms": percentile(timings, 95),
+        "queries": queries / repeat,
+    }
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class ASGIStream:
+    """
+    Petición GET en curso contra una aplicación ASGI, sin servidor de por medio. Guarda cada
+    trozo del cuerpo con el instante (perf_counter) en que llegó.
+    """
+
+    def __init__(self, application, path, host="localhost", accept="text/event-stream", headers=()):
+        self.application = application
+        path, _, query_string = path.partition("?")
+        self.scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+            "query_string": query_string.encode(), "root_path": "",
+            "headers": [(b"host", host.encode()), (b"accept", accept.encode()),
+                        *((name.lower().encode(), value.encode()) for name, value in headers)],
+            "client": ("127.0.0.1", 0), "server": (host, 80),
+        }
+        self.status = None
+        self.headers = {}
+        self.request_sent = False
+        self.chunks = asyncio.Queue()
+        self.finished = False
+        self.disconnected = asyncio.Event()
+        self.task = None
+
+    async def start(self):
+        self.task = asyncio.create_task(self.application(self.scope, self.receive, self.send))
+        return self
+
+    async def receive(self):
+        if not self.request_sent:
+            self.request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self.disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+            self.headers = {name.decode().lower(): value.decode() for name, value in message.get("headers", [])}
+        elif message["type"] == "http.response.body":
+            if message.get("body"):
+                await self.chunks.put((time.perf_counter(), message["body"].decode()))
+            if not message.get("more_body", False):
+                self.finished = True
+
+    async def next_chunk(self, timeout=5):
+        return await asyncio.wait_for(self.chunks.get(), timeout)
+
+    async def wait(self, timeout=5):
+        """Espera a que la respuesta termine sin desconectar al cliente."""
+        await asyncio.wait_for(self.task, timeout)
+
+    async def close(self):
+        self.disconnected.set()
+        if self.task is not None:
+            await self.task
+
+
+SERVERS = {
+    # Mismo número de workers en los dos casos: solo cambia el protocolo (WSGI / ASGI)
+    "wsgi": ["gunicorn", "myFirstApiRest.wsgi:application"],
+    "asgi": ["gunicorn", "myFirstApiRest.asgi:application", "-k", "uvicorn.workers.UvicornWorker"],
+}
+
+
+def start_server(server, workers, port, env):
+    """Arranca gunicorn (``SERVERS[server]``) en 127.0.0.1:port; usar como context manager."""
+    command = SERVERS[server] + [
+        "--workers", str(workers), "--bind", f"127.0.0.1:{port}", "--log-level", "warning",
+    ]
+    process = subprocess.Popen(command, env=env, stdout=sys.stdout, stderr=sys.stderr)
+    return ServerProcess(process, port)
+
+
+class ServerProcess:
+    def __init__(self, process, port, timeout=30):
+        self.process = process
+        self.port = port
+        self.timeout = timeout
+
+    def __enter__(self):
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise CommandError(f"El servidor terminó al arrancar (código {self.process.returncode}).")
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=0.5).close()
+                return self
+            except OSError:
+                time.sleep(0.2)
+        self.process.terminate()
+        raise CommandError("El servidor no ha empezado a escuchar a tiempo.")
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        self.process.wait(timeout=30)
+
+
+def build_request(target):
+    """
+    ``target`` es una ruta (GET) o una función que devuelve (método, ruta, cuerpo); el cuerpo
+    se envía como JSON. Las funciones permiten cuerpos distintos en cada petición (pujas crecientes).
+    """
+    if isinstance(target, str):
+        return "GET", target, None
+    method, path, body = target()
+    return method, path, None if body is None else json.dumps(body).encode()
+
+
+async def http_load(host, port, paths, concurrency=32, duration=10.0, headers=(), ok_status=None):
+    """
+    Genera carga HTTP/1.1 contra un servidor real: ``concurrency`` clientes que piden ``paths``
+    (ver build_request) en bucle, con keep-alive si el servidor lo permite, durante ``duration``
+    segundos. Una respuesta cuenta como error si su código no está en ``ok_status`` (por
+    defecto, cualquiera por debajo de 400). Devuelve peticiones por segundo, percentiles de
+    latencia (ms) y errores.
+    """
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    extra_headers = "".join(f"{name}: {value}\r\n" for name, value in headers)
+
+    async def client(offset):
+        nonlocal errors
+        reader = writer = None
+        index = offset
+        while time.perf_counter() < deadline:
+            method, path, body = build_request(paths[index % len(paths)])
+            index += concurrency
+            head = f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nAccept: application/json\r\n{extra_headers}"
+            if body is not None:
+                head += f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection(host, port)
+                start = time.perf_counter()
+                writer.write((head + "\r\n").encode() + (body or b""))
+                status, keep_alive = await read_http_response(reader)
+                latencies.append(time.perf_counter() - start)
+                failed = status >= 400 if ok_status is None else status not in ok_status
+                if failed:
+                    errors += 1
+                if not keep_alive:
+                    writer.close()
+                    reader = writer = None
+            except (ConnectionError, asyncio.IncompleteReadError):
+                errors += 1
+                reader = writer = None
+        if writer is not None:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "errors": errors,
+    }
+
+
+def compare_to_baseline(results, baseline, tolerance=0.25):
+    """
+    Compara ``results`` con una ejecución anterior (mismo formato JSON) y devuelve la lista de
+    regresiones. Las consultas por petición no dependen de la máquina y deben coincidir o bajar;
+    req/s y p95 solo se comparan si la configuración (datos, servidor, concurrencia) es la misma,
+    con un margen relativo ``tolerance`` para el ruido de medida.
+    """
+    regressions = []
+    same_config = results["config"] == baseline.get("config")
+    for name, previous in baseline.get("endpoints", {}).items():
+        current = results["endpoints"].get(name)
+        if current is None:
+            continue
+        if current["queries"] > previous["queries"]:
+            regressions.append(f"{name}: {current['queries']:g} consultas por petición (antes {previous['queries']:g})")
+        if not same_config or "rps" not in current:
+            continue
+        if current["errors"] > previous["errors"]:
+            regressions.append(f"{name}: {current['errors']} errores (antes {previous['errors']})")
+        if current["rps"] < previous["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: {current['rps']:.0f} req/s (antes {previous['rps']:.0f})")
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {current['p95_ms']:.1f} ms (antes {previous['p95_ms']:.1f} ms)")
+    return regressions
+
+
+async def read_http_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    keep_alive = headers.get("connection", "").lower() != "close"
+    if "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+        return status, keep_alive
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                return status, keep_alive
+    # Sin Content-Length el cuerpo termina al cerrarse la conexión
+    await reader.read()
+    return status, False
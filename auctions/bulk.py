@@ -0,0 +1,347 @@
+"""
+Exportación e importación masiva de subastas, pujas y valoraciones (comandos ``export_auctions``,
+``export_bids`` e ``import_auctions``).
+
+Formato NDJSON: un registro por línea con la forma de las fixtures de Django
+(``{"model": "auctions.bid", "pk": 1, "fields": {...}}``), así que ``import_auctions`` acepta
+tanto sus propias exportaciones como una fixture JSON normal. En CSV cada fichero contiene un
+solo modelo: ``id`` y los campos como columnas. Con ``.gz`` se comprime con gzip.
+
+Solo se exportan los campos de origen: los desnormalizados (valoración media, puja más alta,
+versión, cierre...) se recalculan al importar.
+"""
+import codecs
+import csv
+import datetime
+import gzip
+import io
+import json
+import sys
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.management.color import no_style
+from django.db import connection
+from django.utils import timezone
+
+from users.models import CustomUser
+from . import response_cache
+from .models import Auction, Bid, Category, Rating
+from .search import get_search_backend
+
+FORMATS = ('ndjson', 'csv')
+
+# Campos de origen de cada modelo (el resto se recalcula)
+EXPORT_FIELDS = {
+    Auction: ('title', 'description', 'price', 'stock', 'brand', 'category', 'thumbnail',
+              'creation_date', 'closing_date', 'auctioneer'),
+    Bid: ('auction', 'price', 'creation_date', 'bidder'),
+    Rating: ('auction', 'user', 'value', 'created'),
+}
+
+
+@contextmanager
+def open_output(path, compress=None, stdout=None):
+    """Fichero de texto para escribir ('-' es ``stdout``); gzip si termina en .gz o con ``compress``."""
+    if path == '-':
+        yield stdout
+        return
+    if compress or (compress is None and path.endswith('.gz')):
+        output = gzip.open(path, 'wt', compresslevel=6, encoding='utf-8', newline='')
+    else:
+        output = open(path, 'w', encoding='utf-8', newline='')
+    with output:
+        yield output
+
+
+def open_input(path):
+    """Fichero de texto para leer: detecta gzip y la codificación por su BOM (las fixtures en UTF-16)."""
+    stream = sys.stdin.buffer if path == '-' else open(path, 'rb')
+    if stream.peek(2)[:2] == b'\x1f\x8b':
+        stream = io.BufferedReader(gzip.GzipFile(fileobj=stream))
+    head = stream.peek(4)[:4]
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        encoding = 'utf-16'
+    else:
+        encoding = 'utf-8-sig'
+    return io.TextIOWrapper(stream, encoding=encoding, newline='')
+
+
+# --- Exportación ---
+
+class ExportEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # DjangoJSONEncoder recorta las fechas a milisegundos: aquí se conservan tal cual
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def export_queryset(queryset, output, export_format='ndjson', chunk_size=2000):
+    """
+    Escribe las filas de ``queryset`` en ``output``. Lee con ``iterator(chunk_size=...)``: en
+    PostgreSQL es un cursor de servidor, así que la memoria no depende del número de filas.
+    Devuelve las filas escritas.
+    """
+    model = queryset.model
+    names = EXPORT_FIELDS[model]
+    attnames = [model._meta.get_field(name).attname for name in names]
+    rows = queryset.order_by('pk').values_list('pk', *attnames).iterator(chunk_size=chunk_size)
+    count = 0
+    if export_format == 'csv':
+        writer = csv.writer(output)
+        writer.writerow(['id', *names])
+        for count, row in enumerate(rows, 1):
+            writer.writerow(row)
+        return count
+
+    label = model._meta.label_lower
+    encoder = ExportEncoder(ensure_ascii=False)
+    chunk = []
+    for count, (pk, *values) in enumerate(rows, 1):
+        record = {'model': label, 'pk': pk, 'fields': dict(zip(names, values))}
+        chunk.append(encoder.encode(record))
+        if len(chunk) >= chunk_size:
+            output.write('\n'.join(chunk) + '\n')
+            chunk = []
+    if chunk:
+        output.write('\n'.join(chunk) + '\n')
+    return count
+
+
+# --- Importación ---
+
+def read_records(stream, csv_model=None):
+    """Registros (model, pk, fields) de un NDJSON, una fixture JSON o un CSV de un solo modelo."""
+    if csv_model is not None:
+        label = csv_model._meta.label_lower
+        for row in csv.DictReader(stream):
+            pk = row.pop('id', None)
+            yield label, pk or None, row
+        return
+
+    first = stream.read(1)
+    while first.isspace():
+        first = stream.read(1)
+    if first == '[':
+        # Fixture de Django: un único array JSON (el formato de loaddata)
+        records = json.loads(first + stream.read())
+    else:
+        records = (json.loads(line) for line in _lines(first, stream) if line.strip())
+    for record in records:
+        yield record['model'], record.get('pk'), record['fields']
+
+
+def _lines(first, stream):
+    yield first + stream.readline()
+    yield from stream
+
+
+@contextmanager
+def keep_timestamps(model):
+    """bulk_create pondría la hora actual en los campos auto_now_add: se conservan los importados."""
+    fields = [field for field in model._meta.concrete_fields if getattr(field, 'auto_now_add', False)]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class ImportErrors(Exception):
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f"{len(errors)} registro(s) no válido(s)")
+
+
+class AuctionImporter:
+    """
+    Carga registros con ``bulk_create`` en lotes de ``batch_size`` comprobando las mismas
+    invariantes que la API: precios positivos, valoraciones de 1 a 5 y una por usuario,
+    subastas que cierran después de crearse, referencias existentes y pujas de cada subasta
+    hechas antes de su cierre y con precios estrictamente crecientes en el orden en que se
+    hicieron.
+
+    Las comprobaciones de cada fila se hacen al leerla; las que necesitan la base de datos
+    (referencias, puja anterior, cierre de la subasta, valoración repetida) una vez por lote, con una consulta por
+    tipo de referencia. Los registros no válidos se acumulan en ``errors`` (con
+    ``skip_invalid``) o interrumpen la importación con ``ImportErrors``. ``finish()`` recalcula
+    los campos desnormalizados.
+    """
+    models = {model._meta.label_lower: model for model in EXPORT_FIELDS}
+    # Las subastas se guardan antes que las pujas y valoraciones que las referencian
+    order = (Auction, Bid, Rating)
+
+    def __init__(self, batch_size=1000, skip_invalid=False):
+        self.batch_size = batch_size
+        self.skip_invalid = skip_invalid
+        self.pending = defaultdict(list)
+        self.created = dict.fromkeys(self.order, 0)
+        self.errors = []
+        self.auction_ids = set()
+        # Claves que ya se sabe que existen (en la base de datos o en un lote guardado)
+        self.known = {Auction: set(), Category: set(), CustomUser: set()}
+        self.new_auctions = set()
+        self.last_price = {}
+        self.closing_date = {}
+        self.rated = set()
+        self.rated_auctions = set()
+
+    def add(self, label, pk, fields):
+        model = self.models.get(label)
+        if model is None:
+            return self.reject(label, pk, f"modelo no soportado: {label}")
+        try:
+            instance = self.build(model, pk, fields)
+        except ValidationError as exc:
+            return self.reject(label, pk, '; '.join(exc.messages))
+        self.pending[model].append(instance)
+        if len(self.pending[model]) >= self.batch_size:
+            self.flush(model)
+
+    def reject(self, label, pk, message):
+        self.errors.append(f"{label} {pk}: {message}")
+        if not self.skip_invalid:
+            raise ImportErrors(self.errors)
+
+    def build(self, model, pk, fields):
+        instance = model(pk=model._meta.pk.to_python(pk) if pk not in (None, '') else None)
+        for name in EXPORT_FIELDS[model]:
+            field = model._meta.get_field(name)
+            value = fields.get(name)
+            if value in (None, '') and field.null:
+                value = None
+            elif value in (None, '') and getattr(field, 'auto_now_add', False):
+                value = timezone.now()
+            elif value in (None, ''):
+                raise ValidationError(f"falta {name}")
+            else:
+                value = field.to_python(value)
+            setattr(instance, field.attname, value)
+        if model is Rating:
+            if not 1 <= instance.value <= 5:
+                raise ValidationError("la valoración debe estar entre 1 y 5")
+        elif instance.price <= 0:
+            raise ValidationError("el precio debe ser positivo")
+        if model is Auction and instance.closing_date <= instance.creation_date:
+            raise ValidationError("closing_date debe ser posterior a creation_date")
+        return instance
+
+    # --- Comprobaciones por lote ---
+
+    def check_references(self, rows, references):
+        """Descarta las filas cuyas claves ajenas (atributo → modelo) no existen."""
+        missing = {}
+        for attname, model in references.items():
+            known = self.known[model]
+            wanted = {getattr(row, attname) for row in rows} - known
+            found = set(model.objects.filter(pk__in=wanted).values_list('pk', flat=True)) if wanted else set()
+            known |= found
+            missing[attname] = wanted - found
+        valid = []
+        for row in rows:
+            for attname, model in references.items():
+                if getattr(row, attname) in missing[attname]:
+                    self.reject(row._meta.label_lower, row.pk,
+                                f"{model._meta.verbose_name} {getattr(row, attname)} no existe")
+                    break
+            else:
+                valid.append(row)
+        return valid
+
+    def check_auctions(self, rows):
+        return self.check_references(rows, {'category_id': Category, 'auctioneer_id': CustomUser})
+
+    def check_bids(self, rows):
+        rows = self.check_references(rows, {'auction_id': Auction, 'bidder_id': CustomUser})
+        # Cierre y puja anterior de las subastas que ya estaban en la base de datos
+        unseen = {row.auction_id for row in rows} - self.closing_date.keys()
+        for pk, closing_date, price in Auction.objects.filter(pk__in=unseen).values_list(
+                'pk', 'closing_date', 'current_price'):
+            self.closing_date[pk] = closing_date
+            self.last_price.setdefault(pk, price)
+        valid = []
+        for row in rows:
+            closing_date = self.closing_date[row.auction_id]
+            if row.creation_date > closing_date:
+                self.reject(row._meta.label_lower, row.pk,
+                            f"la puja es posterior al cierre de la subasta ({closing_date.isoformat()})")
+                continue
+            last = self.last_price.get(row.auction_id)
+            if last is not None and row.price <= last:
+                self.reject(row._meta.label_lower, row.pk, f"la puja debe superar a la anterior ({last})")
+                continue
+            self.last_price[row.auction_id] = row.price
+            valid.append(row)
+        return valid
+
+    def check_ratings(self, rows):
+        rows = self.check_references(rows, {'auction_id': Auction, 'user_id': CustomUser})
+        # Valoraciones que ya había en la base de datos (las de las subastas nuevas están en ``rated``)
+        existing = {row.auction_id for row in rows} - self.new_auctions - self.rated_auctions
+        if existing:
+            self.rated.update(Rating.objects.filter(auction_id__in=existing).values_list('auction_id', 'user_id'))
+            self.rated_auctions |= existing
+        valid = []
+        for row in rows:
+            key = (row.auction_id, row.user_id)
+            if key in self.rated:
+                self.reject(row._meta.label_lower, row.pk, "el usuario ya ha valorado esta subasta")
+                continue
+            self.rated.add(key)
+            valid.append(row)
+        return valid
+
+    # --- Escritura ---
+
+    def flush(self, model):
+        # Las pujas y valoraciones pueden referenciar subastas del lote pendiente
+        if model is not Auction:
+            self.save(Auction)
+        self.save(model)
+
+    def save(self, model):
+        rows = self.pending.pop(model, [])
+        rows = getattr(self, f'check_{model._meta.model_name}s')(rows) if rows else rows
+        if not rows:
+            return
+        with keep_timestamps(model):
+            model.objects.bulk_create(rows, batch_size=self.batch_size)
+        self.created[model] += len(rows)
+        if model is Auction:
+            pks = {row.pk for row in rows}
+            self.known[Auction] |= pks
+            self.new_auctions |= pks
+            self.closing_date.update((row.pk, row.closing_date) for row in rows)
+            self.auction_ids |= pks
+        else:
+            self.auction_ids.update(row.auction_id for row in rows)
+
+    def finish(self):
+        """Guarda lo pendiente y recalcula lo que bulk_create (sin señales) no mantiene."""
+        for model in self.order:
+            self.save(model)
+        self.reset_sequences()
+        touched = Auction.objects.filter(pk__in=self.auction_ids)
+        if self.created[Rating]:
+            touched.rebuild_rating_stats()
+        if self.created[Bid]:
+            touched.rebuild_bid_summary()
+        if self.created[Auction]:
+            get_search_backend().rebuild()
+        if any(self.created.values()):
+            response_cache.invalidate(response_cache.AUCTIONS)
+        return {model._meta.model_name: count for model, count in self.created.items()}
+
+    def reset_sequences(self):
+        # Como loaddata: tras insertar claves explícitas, la secuencia debe continuar por encima
+        models = [model for model in self.order if self.created[model]]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
@@ -0,0 +1,94 @@
+"""
+GET condicional (ETag / Last-Modified) para el detalle de una subasta y su listado de pujas.
+
+Los validadores salen de ``Auction.version`` / ``Auction.modified``, que se actualizan en el
+mismo UPDATE que cambia la subasta (precio, pujas, valoraciones), así que no hace falta
+serializar ni calcular el hash del cuerpo: si ``If-None-Match`` coincide se responde 304 con
+una sola consulta.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from .models import Auction
+
+
+def make_etag(*parts):
+    digest = hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def auction_validators(request, auction, extra=()):
+    """
+    Devuelve (etag, last_modified) para la representación de ``auction`` pedida.
+
+    El ETag incluye el tipo de contenido negociado y si la subasta sigue abierta (isOpen
+    cambia al pasar closing_date, antes de que el planificador escriba el cierre).
+    """
+    is_open = auction.is_open
+    last_modified = auction.modified if is_open else max(auction.modified, auction.closing_date)
+    etag = make_etag(auction.pk, auction.version, is_open, request.accepted_media_type, *extra)
+    return etag, last_modified
+
+
+def not_modified(request, etag, last_modified):
+    """Respuesta 304 si los validadores de la petición coinciden; si no, None."""
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    response = get_conditional_response(
+        request._request, etag=etag, last_modified=int(last_modified.timestamp()),
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+class ConditionalRetrieveMixin:
+    """``retrieve()`` con ETag: la comparación se hace antes de serializar el objeto."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_retrieve(request, self.get_object())
+
+    def conditional_retrieve(self, request, instance):
+        etag, last_modified = auction_validators(request, instance)
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+        serializer = self.get_serializer(instance)
+        return set_validators(Response(serializer.data), etag, last_modified)
+
+
+class ConditionalAuctionListMixin:
+    """
+    ``list()`` con ETag para listados que dependen de una única subasta (``kwargs['auction_id']``).
+    La subasta leída para los validadores queda en ``self.auction``.
+    """
+    validator_fields = ('id', 'version', 'modified', 'closing_date', 'status')
+
+    def list(self, request, *args, **kwargs):
+        self.auction = (
+            Auction.objects.only(*self.validator_fields)
+            .filter(pk=self.kwargs['auction_id']).first()
+        )
+        if self.auction is None:
+            return super().list(request, *args, **kwargs)
+
+        etag, last_modified = self.list_validators(request)
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+        return set_validators(super().list(request, *args, **kwargs), etag, last_modified)
+
+    def list_validators(self, request):
+        params = sorted((name, request.query_params.getlist(name)) for name in request.query_params)
+        page_size = self.paginator.get_page_size(request) if self.paginator else None
+        return auction_validators(request, self.auction, (request.path, params, page_size))
@@ -0,0 +1,120 @@
+"""
+Eventos en tiempo real de las subastas (pujas aceptadas, cambios de precio y cierre).
+
+Los servicios publican con ``publish_after_commit`` y la vista ``auction_events`` los reenvía a
+los clientes como server-sent events. Cada suscriptor es una ``asyncio.Queue`` en el bucle de
+eventos del servidor ASGI, así que miles de conexiones ociosas no ocupan ningún hilo.
+
+El broker se elige con ``settings.AUCTION_EVENTS_BROKER`` (ruta con puntos). El de por defecto,
+``InMemoryBroker``, solo reparte eventos dentro del proceso; con varios workers hace falta un
+broker compartido (p. ej. Redis pub/sub) con la misma interfaz: ``publish(channel, message)``
+(llamable desde cualquier hilo) y ``subscribe(channel)`` (devuelve una ``Subscription``).
+"""
+import asyncio
+import json
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+BID = "bid"
+PRICE = "price"
+CLOSED = "closed"
+
+
+def channel_name(auction_id):
+    return f"auction:{auction_id}"
+
+
+class Subscription:
+    """Cola de un suscriptor. Se usa con ``async with`` para darse de baja al terminar."""
+
+    def __init__(self, broker, channel, maxsize=100):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def deliver(self, message):
+        if self.queue.full():
+            # Cliente demasiado lento: se descarta el evento más antiguo, nunca se bloquea al publicador
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.broker.unsubscribe(self)
+
+
+class InMemoryBroker:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = {}
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        with self.lock:
+            self.subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscribers = self.subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.subscribers[subscription.channel]
+
+    def subscriber_count(self, channel=None):
+        with self.lock:
+            if channel is not None:
+                return len(self.subscribers.get(channel, ()))
+            return sum(len(subscribers) for subscribers in self.subscribers.values())
+
+    def publish(self, channel, message):
+        with self.lock:
+            subscribers = list(self.subscribers.get(channel, ()))
+        for subscription in subscribers:
+            # Se publica desde hilos síncronos (vistas DRF): la cola se toca en su propio bucle
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # Bucle cerrado: la conexión ya no existe
+                self.unsubscribe(subscription)
+        return len(subscribers)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    path = getattr(settings, "AUCTION_EVENTS_BROKER", None)
+    if path:
+        return import_string(path)()
+    return InMemoryBroker()
+
+
+def build_event(auction_id, event, **data):
+    message = json.dumps({"event": event, "auction": auction_id, **data}, default=str)
+    return format_sse(message, event)
+
+
+def publish(auction_id, event, **data):
+    """Publica un evento ya formateado como SSE: se serializa una vez, no una por suscriptor."""
+    return get_broker().publish(channel_name(auction_id), build_event(auction_id, event, **data))
+
+
+def publish_after_commit(auction_id, event, **data):
+    """Publica cuando la transacción en curso haga commit (nunca se anuncia una puja revertida)."""
+    transaction.on_commit(lambda: publish(auction_id, event, **data))
+
+
+def format_sse(message, event=None):
+    lines = [f"event: {event}"] if event else []
+    lines.extend(f"data: {line}" for line in message.splitlines())
+    return "\n".join(lines) + "\n\n"
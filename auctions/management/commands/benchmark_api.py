@@ -0,0 +1,232 @@
+import asyncio
+import itertools
+import json
+import os
+import random
+import sys
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from auctions.benchmarking import (SERVERS, benchmark_database, build_request, compare_to_baseline, database_url,
+                                   http_load, seed_dataset, start_server, time_call)
+from auctions.models import Auction, Category
+from users.models import CustomUser
+
+BASELINE_PATH = Path(settings.BASE_DIR) / "benchmarks" / "api_baseline.json"
+BENCH_PASSWORD = "Bench.Secreta.123"
+
+
+class Command(BaseCommand):
+    help = ("Siembra un conjunto de datos sintético en una base de datos de pruebas, cuenta las consultas "
+            "por petición de cada endpoint de la API, lanza carga concurrente contra un servidor local "
+            "(req/s y latencias p50/p95/p99) y compara el resultado con una línea base guardada: "
+            "cualquier regresión hace fallar el comando.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--categories", type=int, default=20)
+        parser.add_argument("--auctions", type=int, default=2000)
+        parser.add_argument("--bids-per-auction", type=int, default=10)
+        parser.add_argument("--ratings-per-auction", type=int, default=3)
+        parser.add_argument("--comments-per-auction", type=int, default=3)
+        parser.add_argument("--server", choices=sorted(SERVERS), default="asgi")
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--duration", type=float, default=5.0, help="Segundos de carga por endpoint.")
+        parser.add_argument("--repeat", type=int, default=20, help="Peticiones por endpoint al contar consultas.")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--endpoints", nargs="+", metavar="NOMBRE", help="Solo estos endpoints.")
+        parser.add_argument("--no-server", action="store_true",
+                            help="Solo consultas por petición, sin arrancar el servidor ni generar carga.")
+        parser.add_argument("--json", metavar="FICHERO", help="Escribe los resultados en JSON ('-': salida estándar).")
+        parser.add_argument("--baseline", default=str(BASELINE_PATH), help="Línea base con la que comparar.")
+        parser.add_argument("--update-baseline", action="store_true", help="Guarda el resultado como línea base.")
+        parser.add_argument("--tolerance", type=float, default=0.25,
+                            help="Margen relativo para req/s y p95 antes de considerarlo una regresión.")
+
+    def handle(self, *args, **options):
+        # Con --json - la salida estándar es solo el JSON: los mensajes van a stderr
+        log = self.stderr if options["json"] == "-" else self.stdout
+        setup_test_environment()
+        try:
+            with benchmark_database(shared=not options["no_server"]) as connection:
+                dataset = seed_dataset(
+                    users=options["users"], categories=options["categories"], auctions=options["auctions"],
+                    bids_per_auction=options["bids_per_auction"],
+                    ratings_per_auction=options["ratings_per_auction"],
+                    comments_per_auction=options["comments_per_auction"],
+                )
+                log.write(f"Base de datos: {connection.vendor}; datos generados: {dataset}")
+                endpoints = self.select(self.endpoints(options), options["endpoints"])
+                results = {"config": self.config(options, connection, dataset), "endpoints": {}}
+
+                for name, stats in self.count_queries(endpoints, options["repeat"]):
+                    results["endpoints"][name] = stats
+                if not options["no_server"]:
+                    env = {**os.environ, "DATABASE_URL": database_url(connection)}
+                    # Sin transacción abierta: el servidor usa sus propias conexiones
+                    connection.close()
+                    with start_server(options["server"], options["workers"], options["port"], env):
+                        for name, stats in self.load(endpoints, options):
+                            results["endpoints"][name].update(stats)
+        finally:
+            teardown_test_environment()
+
+        self.report(log, results)
+        if options["json"]:
+            self.write_json(options["json"], results)
+        self.check_baseline(log, results, options)
+
+    def endpoints(self, options):
+        """
+        Escenarios: (nombre, credenciales, peticiones, códigos esperados). Las credenciales son None
+        (anónimo), "user" o "admin"; las peticiones, rutas GET o funciones de build_request.
+        """
+        rng = random.Random(0)
+        now = timezone.now()
+        ids = list(Auction.objects.values_list("pk", flat=True))
+        busy = list(Auction.objects.filter(bid_count__gt=0).values_list("pk", flat=True))
+        # Abiertas durante toda la prueba, para que las pujas no choquen con un cierre
+        margin = timedelta(seconds=options["duration"] * 20 + 600)
+        open_ids = list(Auction.objects.filter(status=Auction.Status.OPEN, closing_date__gt=now + margin)
+                        .values_list("pk", flat=True))
+        category_ids = list(Category.objects.values_list("pk", flat=True))
+        user = CustomUser.objects.filter(username__startswith="bench_user_").annotate(n=Count("bids")).order_by("-n")[0]
+        user.set_password(BENCH_PASSWORD)
+        user.save(update_fields=["password"])
+        admin = CustomUser.objects.create_superuser(
+            username="bench_admin", email="bench_admin@example.com", password=BENCH_PASSWORD,
+            birth_date=user.birth_date,
+        )
+        self.tokens = {"user": str(AccessToken.for_user(user)), "admin": str(AccessToken.for_user(admin))}
+        user_ids = list(CustomUser.objects.values_list("pk", flat=True))
+        pages = max(1, len(ids) // 10)
+
+        def sample(values, k=500):
+            return rng.sample(values, min(k, len(values)))
+
+        # Precios crecientes por encima de cualquier puja sembrada: cada puja supera a la anterior
+        prices = itertools.count(100000)
+
+        def bid(auction_id):
+            return lambda: ("POST", f"/api/auctions/{auction_id}/bid/", {"price": str(Decimal(next(prices)) / 100 + 1000)})
+
+        def token():
+            return "POST", "/api/token/", {"username": user.username, "password": BENCH_PASSWORD}
+
+        # Muchas URL distintas para que la caché de respuestas no lo resuelva todo
+        return [
+            ("auction-list", None, [f"/api/auctions/?page={rng.randint(1, pages)}" for _ in range(500)], (200,)),
+            ("auction-list (filtros)", None,
+             [f"/api/auctions/?category={rng.choice(category_ids)}&min_price={rng.randint(1, 500)}"
+              f"&max_price={rng.randint(500, 1000)}&status=open" for _ in range(500)], (200,)),
+            ("auction-list (ordering, cursor)", None,
+             [f"/api/auctions/?ordering={rng.choice(['-bid_count', 'price', '-average_rating', 'closing_date'])}"
+              f"&pagination=cursor" for _ in range(50)], (200,)),
+            ("auction-search", None,
+             [f"/api/auctions/?search={word}" for word in ("reloj", "libro", "guitarra", "consola")], (200,)),
+            ("auction-detail", None, [f"/api/auctions/{pk}/" for pk in sample(ids)], (200,)),
+            ("bid-list", None, [f"/api/auctions/{pk}/bid/" for pk in sample(busy)], (200,)),
+            ("comment-list", None, [f"/api/auctions/{pk}/comments/" for pk in sample(ids)], (200,)),
+            ("category-list", None, ["/api/auctions/categories/"], (200,)),
+            ("category-detail", "admin", [f"/api/auctions/categories/{pk}/" for pk in category_ids], (200,)),
+            ("rating-list", "user", [f"/api/auctions/ratings/?auction={pk}" for pk in sample(ids)], (200,)),
+            ("user-auctions", "user", ["/api/auctions/users/"], (200,)),
+            ("user-bids", "user", [f"/api/auctions/misPujas/?page={page}" for page in range(1, 6)], (200,)),
+            ("user-profile", "user", ["/api/users/profile/"], (200,)),
+            ("user-list", "admin", [f"/api/users/?page={page}" for page in range(1, 5)], (200,)),
+            ("user-detail", "admin", [f"/api/users/{pk}/" for pk in sample(user_ids)], (200,)),
+            ("bid-create", "user", [bid(pk) for pk in sample(open_ids)], (201,)),
+            ("token-obtain", None, [token], (200,)),
+        ]
+
+    def select(self, endpoints, names):
+        if not names:
+            return endpoints
+        unknown = set(names) - {name for name, *_ in endpoints}
+        if unknown:
+            raise CommandError(f"Endpoints desconocidos: {', '.join(sorted(unknown))}.")
+        return [endpoint for endpoint in endpoints if endpoint[0] in names]
+
+    def config(self, options, connection, dataset):
+        return {
+            "database": connection.vendor, "dataset": dataset,
+            "server": None if options["no_server"] else options["server"],
+            "workers": options["workers"], "concurrency": options["concurrency"], "duration": options["duration"],
+        }
+
+    def headers(self, auth):
+        return [("Authorization", f"Bearer {self.tokens[auth]}")] if auth else []
+
+    def count_queries(self, endpoints, repeat):
+        """Consultas por petición (y tiempo sin red) de cada endpoint, en el propio proceso."""
+        client = APIClient()
+        for name, auth, paths, ok_status in endpoints:
+            client.credentials(**{"HTTP_" + key.upper(): value for key, value in self.headers(auth)})
+            requests = itertools.cycle(paths)
+
+            def call():
+                method, path, body = build_request(next(requests))
+                response = client.generic(method, path, body or "", content_type="application/json")
+                if response.status_code not in ok_status:
+                    raise CommandError(f"{name}: {method} {path} → {response.status_code} {response.content[:200]!r}")
+
+            stats = time_call(call, repeat=repeat)
+            yield name, {"path": build_request(paths[0])[1], "queries": stats["queries"],
+                         "in_process_p50_ms": stats["p50_ms"]}
+
+    def load(self, endpoints, options):
+        for name, auth, paths, ok_status in endpoints:
+            stats = asyncio.run(http_load(
+                "127.0.0.1", options["port"], paths, concurrency=options["concurrency"],
+                duration=options["duration"], headers=self.headers(auth), ok_status=ok_status,
+            ))
+            yield name, stats
+
+    def report(self, log, results):
+        log.write(self.style.MIGRATE_HEADING(
+            f"\n{'endpoint':34} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errores':>8} {'consultas':>10}"
+        ))
+        for name, stats in results["endpoints"].items():
+            if "rps" in stats:
+                load = (f"{stats['rps']:8.0f} {stats['p50_ms']:8.1f} {stats['p95_ms']:8.1f} "
+                        f"{stats['p99_ms']:8.1f} {stats['errors']:8d}")
+            else:
+                load = f"{'-':>8} {'-':>8} {'-':>8} {'-':>8} {'-':>8}"
+            log.write(f"{name:34} {load} {stats['queries']:10.1f}")
+
+    def write_json(self, path, results):
+        content = json.dumps(results, indent=2, ensure_ascii=False) + "\n"
+        if path == "-":
+            sys.stdout.write(content)
+        else:
+            Path(path).write_text(content, encoding="utf-8")
+
+    def check_baseline(self, log, results, options):
+        baseline_path = Path(options["baseline"])
+        if options["update_baseline"]:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            self.write_json(baseline_path, results)
+            log.write(self.style.SUCCESS(f"Línea base guardada en {baseline_path}"))
+            return
+        if not baseline_path.exists():
+            log.write(self.style.WARNING(f"Sin línea base en {baseline_path}: usa --update-baseline para crearla."))
+            return
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        if baseline.get("config") != results["config"]:
+            log.write(self.style.WARNING(
+                "La configuración no coincide con la de la línea base: solo se comparan las consultas por petición."
+            ))
+        regressions = compare_to_baseline(results, baseline, tolerance=options["tolerance"])
+        if regressions:
+            raise CommandError("Regresiones respecto a la línea base:\n  " + "\n  ".join(regressions))
+        log.write(self.style.SUCCESS(f"Sin regresiones respecto a {baseline_path}"))
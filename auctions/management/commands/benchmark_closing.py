@@ -0,0 +1,80 @@
+import random
+import statistics
+import threading
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from auctions.benchmarking import benchmark_database, percentile, seed_dataset
+from auctions.models import Auction
+from auctions.scheduler import AuctionClosingScheduler
+
+
+class Command(BaseCommand):
+    help = ("Siembra una base de datos de pruebas con muchas subastas y mide el planificador de cierres: "
+            "puesta al día tras una parada (todas vencidas) y retraso entre closing_date y el cierre "
+            "persistido con cierres repartidos en una ventana de tiempo.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--auctions", type=int, default=100_000)
+        parser.add_argument("--bids-per-auction", type=int, default=2)
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--scheduled", type=int, default=5000,
+                            help="Subastas que vencen durante la prueba de retraso.")
+        parser.add_argument("--window", type=float, default=10.0,
+                            help="Segundos en los que se reparten esos vencimientos.")
+
+    def handle(self, *args, **options):
+        with benchmark_database() as connection:
+            counts = seed_dataset(auctions=options["auctions"], bids_per_auction=options["bids_per_auction"],
+                                  ratings_per_auction=0, comments_per_auction=0)
+            self.stdout.write(f"Base de datos: {connection.vendor}; datos generados: {counts}")
+            self.catch_up(options)
+            self.lag(options)
+
+    def catch_up(self, options):
+        # Todas vencidas durante la "parada" del planificador
+        total = Auction.objects.update(status=Auction.Status.OPEN, winning_bid=None, final_price=None,
+                                       closing_date=timezone.now() - timedelta(hours=1))
+        scheduler = AuctionClosingScheduler(batch_size=options["batch_size"])
+        start = time.perf_counter()
+        closed = scheduler.catch_up()
+        elapsed = time.perf_counter() - start
+        winners = Auction.objects.filter(winning_bid__isnull=False).count()
+        self.stdout.write(
+            f"Puesta al día: {closed}/{total} subastas cerradas en {elapsed:.2f} s "
+            f"({closed / elapsed:.0f} subastas/s, lotes de {options['batch_size']}); {winners} con ganador"
+        )
+        self.stdout.write(f"Segunda pasada (idempotente): {scheduler.catch_up()} subastas cerradas")
+
+    def lag(self, options):
+        rng = random.Random(0)
+        ids = rng.sample(list(Auction.objects.values_list("pk", flat=True)), options["scheduled"])
+        start = timezone.now() + timedelta(seconds=1)
+        closing = {pk: start + timedelta(seconds=rng.uniform(0, options["window"])) for pk in ids}
+        for pk, closing_date in closing.items():
+            Auction.objects.filter(pk=pk).update(status=Auction.Status.OPEN, closing_date=closing_date)
+
+        lags = []
+
+        def on_closed(closed):
+            now = timezone.now()
+            lags.extend((now - closing[auction["pk"]]).total_seconds() for auction in closed)
+
+        scheduler = AuctionClosingScheduler(batch_size=options["batch_size"])
+        thread = threading.Thread(target=scheduler.run, kwargs={"on_closed": on_closed})
+        thread.start()
+        deadline = time.monotonic() + options["window"] + 30
+        while len(lags) < len(closing) and time.monotonic() < deadline:
+            time.sleep(0.1)
+        scheduler.stop()
+        thread.join()
+
+        lags.sort()
+        self.stdout.write(
+            f"Retraso closing_date → cierre ({len(lags)}/{len(closing)} subastas en {options['window']:.0f} s): "
+            f"media {statistics.fmean(lags) * 1000:.1f} ms, p50 {percentile(lags, 50) * 1000:.1f} ms, "
+            f"p99 {percentile(lags, 99) * 1000:.1f} ms, máx {lags[-1] * 1000:.1f} ms"
+        )
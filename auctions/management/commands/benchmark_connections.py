@@ -0,0 +1,89 @@
+import asyncio
+import http.client
+import os
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from auctions.benchmarking import benchmark_database, database_url, http_load, seed_dataset, start_server
+from auctions.models import Auction
+
+# Variables de myFirstApiRest.database para cada configuración
+CONFIGS = {
+    "por-peticion": {"DB_CONN_MAX_AGE": "0", "DB_WARMUP": "0"},
+    "persistentes": {"DB_CONN_MAX_AGE": "60", "DB_CONN_HEALTH_CHECKS": "0"},
+    "persistentes+health": {"DB_CONN_MAX_AGE": "60", "DB_CONN_HEALTH_CHECKS": "1"},
+    # Solo PostgreSQL con psycopg[pool]
+    "pool": {"DB_POOL": "1", "DB_POOL_MIN_SIZE": "2", "DB_POOL_MAX_SIZE": "4"},
+}
+
+
+class Command(BaseCommand):
+    help = ("Mide el coste de abrir una conexión a la base de datos y arranca gunicorn (WSGI) con "
+            "una conexión por petición, con conexiones persistentes (con y sin comprobación de "
+            "salud) y con el pool de psycopg, comparando la latencia de endpoints baratos y la de "
+            "la primera petición de un worker recién arrancado.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument("--duration", type=float, default=10.0, help="Segundos por endpoint y configuración.")
+        parser.add_argument("--auctions", type=int, default=500)
+        parser.add_argument("--configs", nargs="+", choices=sorted(CONFIGS),
+                            help="Por defecto todas (el pool solo con PostgreSQL).")
+        parser.add_argument("--port", type=int, default=8765)
+
+    def handle(self, *args, **options):
+        with benchmark_database(shared=True) as connection:
+            counts = seed_dataset(auctions=options["auctions"], bids_per_auction=3)
+            self.stdout.write(f"Base de datos: {connection.vendor}; datos generados: {counts}")
+            self.stdout.write(f"Abrir una conexión: {self.connect_time(connection):.2f} ms")
+            env = {**os.environ, "DATABASE_URL": database_url(connection)}
+            endpoints = self.endpoints()
+            configs = options["configs"] or [
+                name for name in CONFIGS if name != "pool" or connection.vendor == "postgresql"
+            ]
+            connection.close()
+
+            for name in configs:
+                self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {name} ({options['workers']} workers)"))
+                with start_server("wsgi", options["workers"], options["port"], {**env, **CONFIGS[name]}):
+                    self.stdout.write(f"primera petición: {self.first_request(options['port'], endpoints[0][1][0]):.1f} ms")
+                    for endpoint, paths in endpoints:
+                        stats = asyncio.run(http_load(
+                            "127.0.0.1", options["port"], paths,
+                            concurrency=options["concurrency"], duration=options["duration"],
+                        ))
+                        self.stdout.write(
+                            f"{endpoint}: {stats['rps']:.0f} req/s, p50 {stats['p50_ms']:.2f} ms, "
+                            f"p95 {stats['p95_ms']:.2f} ms, p99 {stats['p99_ms']:.2f} ms, {stats['errors']} errores"
+                        )
+
+    def connect_time(self, connection, repeat=50):
+        timings = []
+        for _ in range(repeat):
+            connection.close()
+            start = time.perf_counter()
+            connection.ensure_connection()
+            timings.append(time.perf_counter() - start)
+        return sum(timings) / repeat * 1000
+
+    def first_request(self, port, path):
+        # Conexión HTTP nueva contra un worker que aún no ha atendido nada
+        client = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        start = time.perf_counter()
+        client.request("GET", path, headers={"Accept": "application/json"})
+        client.getresponse().read()
+        elapsed = time.perf_counter() - start
+        client.close()
+        return elapsed * 1000
+
+    def endpoints(self):
+        rng = random.Random(0)
+        ids = list(Auction.objects.values_list("pk", flat=True))
+        # Endpoints baratos (una o dos consultas, sin caché de respuestas): ahí pesa más la conexión
+        return [
+            ("auction-detail", [f"/api/auctions/{pk}/" for pk in rng.sample(ids, min(500, len(ids)))]),
+            ("comment-list", [f"/api/auctions/{pk}/comments/" for pk in rng.sample(ids, min(500, len(ids)))]),
+        ]
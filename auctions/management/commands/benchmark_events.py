@@ -0,0 +1,86 @@
+import asyncio
+import statistics
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from auctions import events, services
+from auctions.asgi import StreamingASGIHandler
+from auctions.benchmarking import ASGIStream, benchmark_database, percentile
+from auctions.models import Category, Auction
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = ("Abre muchas conexiones SSE contra la aplicación ASGI en una base de datos de pruebas y "
+            "mide la latencia entre el commit de cada puja y su entrega a todos los suscriptores.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--subscribers", type=int, default=2000)
+        parser.add_argument("--bids", type=int, default=20)
+        parser.add_argument("--connect-batch", type=int, default=200,
+                            help="Conexiones que se abren a la vez.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        try:
+            with benchmark_database():
+                user = CustomUser.objects.create_user(
+                    username="bench_bidder", password="!", birth_date=date(1990, 1, 1))
+                auction = Auction.objects.create(
+                    title="Subasta", description="...", price=Decimal("1.00"), stock=1, brand="Marca",
+                    category=Category.objects.create(name="Categoría"), thumbnail="https://example.com/img.png",
+                    closing_date=timezone.now() + timedelta(days=1), auctioneer=user,
+                )
+                asyncio.run(self.run(auction, user, options))
+        finally:
+            teardown_test_environment()
+
+    async def run(self, auction, user, options):
+        application = StreamingASGIHandler()
+        path = reverse("auctions:auction-events", args=[auction.pk])
+        threads_before = threading.active_count()
+
+        start = time.perf_counter()
+        streams = []
+        for offset in range(0, options["subscribers"], options["connect_batch"]):
+            batch = [ASGIStream(application, path)
+                     for _ in range(min(options["connect_batch"], options["subscribers"] - offset))]
+            await asyncio.gather(*(stream.start() for stream in batch))
+            await asyncio.gather(*(stream.next_chunk(timeout=60) for stream in batch))
+            streams.extend(batch)
+        self.stdout.write(
+            f"{len(streams)} suscriptores conectados en {time.perf_counter() - start:.2f} s; "
+            f"{events.get_broker().subscriber_count()} en el broker, "
+            f"hilos: {threads_before} → {threading.active_count()}"
+        )
+
+        latencies = []
+        fanout = []
+        place_bid = sync_to_async(services.place_bid)
+        for i in range(options["bids"]):
+            price = Decimal(10 + i)
+            committed = time.perf_counter()
+            result = await place_bid(auction.pk, user, price)
+            assert result.accepted, result
+            received = await asyncio.gather(*(stream.next_chunk(timeout=30) for stream in streams))
+            arrivals = [arrival - committed for arrival, _ in received]
+            latencies.extend(arrivals)
+            fanout.append(max(arrivals))
+
+        await asyncio.gather(*(stream.close() for stream in streams))
+
+        latencies.sort()
+        self.stdout.write(
+            f"{options['bids']} pujas × {len(streams)} suscriptores: latencia commit → entrega "
+            f"media {statistics.fmean(latencies) * 1000:.2f} ms, p50 {percentile(latencies, 50) * 1000:.2f} ms, "
+            f"p95 {percentile(latencies, 95) * 1000:.2f} ms, "
+            f"último suscriptor (media) {statistics.fmean(fanout) * 1000:.2f} ms"
+        )
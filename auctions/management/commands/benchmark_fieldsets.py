@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Value
+from django.db.models.functions import Concat
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from auctions.benchmarking import benchmark_database, seed_dataset, time_call
+from auctions.models import Auction
+from auctions.pagination import KeysetPageNumberPagination
+from auctions.views import AuctionListCreate
+from users.models import CustomUser
+
+VARIANTS = [
+    ("completo (antes)", {"omit": ""}),
+    ("tarjeta (por defecto)", {}),
+    ("fields=id,title,thumbnail,price,closing_date", {"fields": "id,title,thumbnail,price,closing_date"}),
+]
+
+
+class HundredPerPage(KeysetPageNumberPagination):
+    page_size = 100
+
+
+class Command(BaseCommand):
+    help = ("Mide el tamaño de la respuesta y el tiempo del listado de subastas (página de 100) con la "
+            "representación completa, con la tarjeta por defecto y con ?fields=.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--auctions", type=int, default=1000)
+        parser.add_argument("--description-repeat", type=int, default=5,
+                            help="Veces que se repite la descripción generada (unas 40 palabras).")
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        try:
+            with benchmark_database() as connection:
+                counts = seed_dataset(auctions=options["auctions"], bids_per_auction=2)
+                if options["description_repeat"] > 1:
+                    Auction.objects.update(description=Concat(
+                        *[F("description"), Value(" ")] * options["description_repeat"]))
+                self.stdout.write(f"Base de datos: {connection.vendor}; datos generados: {counts}")
+
+                # Autenticado: la caché de respuestas (anónimas) no interviene
+                user = CustomUser.objects.filter(username__startswith="bench_user_").first()
+                factory = APIRequestFactory()
+                view = AuctionListCreate.as_view(pagination_class=HundredPerPage)
+
+                baseline = None
+                for name, params in VARIANTS:
+                    def call():
+                        request = factory.get("/api/auctions/", params, HTTP_ACCEPT="application/json")
+                        force_authenticate(request, user)
+                        response = view(request)
+                        response.render()
+                        return response
+
+                    size = len(call().content)
+                    stats = time_call(call, repeat=options["repeat"])
+                    baseline = baseline or (size, stats["mean_ms"])
+                    self.stdout.write(
+                        f"{name}: {size / 1024:.1f} KiB ({size / baseline[0]:.0%}), "
+                        f"media {stats['mean_ms']:.2f} ms ({stats['mean_ms'] / baseline[1]:.0%}), "
+                        f"p95 {stats['p95_ms']:.2f} ms, {stats['queries']:.0f} consultas"
+                    )
+        finally:
+            teardown_test_environment()
@@ -0,0 +1,68 @@
+import io
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from rest_framework import serializers as drf_serializers
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from auctions.benchmarking import benchmark_database, seed_dataset, time_call
+from auctions.models import Auction, Bid
+from auctions.serializers import AuctionListCreateSerializer, BidListCreateSerializer, FastDateTimeField
+from myFirstApiRest.renderers import OrjsonParser, OrjsonRenderer
+
+
+class Command(BaseCommand):
+    help = ("Micro-benchmark de la serialización JSON de subastas y pujas: serializadores (DateTimeField "
+            "de DRF frente a FastDateTimeField), JSONRenderer / JSONParser de DRF frente a los de orjson, y "
+            "comprobación de que la salida es idéntica byte a byte.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000, help="Filas por serializador.")
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        with benchmark_database() as connection:
+            seed_dataset(auctions=options["rows"], bids_per_auction=2)
+            self.stdout.write(f"Base de datos: {connection.vendor}; {options['rows']} filas por serializador")
+            cases = [
+                ("auction", AuctionListCreateSerializer, list(Auction.objects.all()[:options["rows"]])),
+                ("bid", BidListCreateSerializer, list(Bid.objects.select_related("bidder")[:options["rows"]])),
+            ]
+            for name, serializer_class, rows in cases:
+                self.run_case(name, serializer_class, rows, options["repeat"])
+
+    def run_case(self, name, serializer_class, rows, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {name} ({len(rows)} filas)"))
+
+        def serialize():
+            return serializer_class(rows, many=True).data
+
+        with mock.patch.object(FastDateTimeField, "to_representation", drf_serializers.DateTimeField.to_representation):
+            before = time_call(serialize, repeat=repeat)
+            expected = serialize()
+        after = time_call(serialize, repeat=repeat)
+        data = serialize()
+        self.line("serializador (DateTimeField de DRF)", before)
+        self.line("serializador (FastDateTimeField)", after, before, data == expected)
+
+        drf_renderer, fast_renderer = JSONRenderer(), OrjsonRenderer()
+        payload = drf_renderer.render(data)
+        drf = time_call(lambda: drf_renderer.render(data), repeat=repeat)
+        fast = time_call(lambda: fast_renderer.render(data), repeat=repeat)
+        self.line(f"render DRF ({len(payload) / 1024:.0f} KiB)", drf)
+        self.line("render orjson", fast, drf, fast_renderer.render(data) == payload)
+
+        drf_parser, fast_parser = JSONParser(), OrjsonParser()
+        drf = time_call(lambda: drf_parser.parse(io.BytesIO(payload)), repeat=repeat)
+        fast = time_call(lambda: fast_parser.parse(io.BytesIO(payload)), repeat=repeat)
+        self.line("parse DRF", drf)
+        self.line("parse orjson", fast, drf, fast_parser.parse(io.BytesIO(payload)) == drf_parser.parse(io.BytesIO(payload)))
+
+    def line(self, label, stats, baseline=None, identical=None):
+        text = f"{label}: media {stats['mean_ms']:.2f} ms, p95 {stats['p95_ms']:.2f} ms"
+        if baseline is not None:
+            text += f" (×{baseline['mean_ms'] / stats['mean_ms']:.1f} más rápido)"
+        if identical is not None:
+            text += ", salida idéntica" if identical else ", SALIDA DISTINTA"
+        self.stdout.write(text)
@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from auctions.benchmarking import benchmark_database, seed_dataset, time_call
+from auctions.models import Auction, Bid, Comment
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = ("Siembra un conjunto de datos grande en una base de datos de pruebas y muestra el plan "
+            "(EXPLAIN) y los tiempos de cada endpoint de listado.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--auctions", type=int, default=5000)
+        parser.add_argument("--bids-per-auction", type=int, default=20)
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--categories", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--analyze", action="store_true", help="EXPLAIN ANALYZE (solo PostgreSQL).")
+        parser.add_argument("--keepdb", action="store_true", help="Conservar la base de datos de pruebas.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        try:
+            with benchmark_database(keepdb=options["keepdb"]) as connection:
+                self.stdout.write(f"Base de datos: {connection.vendor} ({connection.settings_dict['NAME']})")
+                if not Auction.objects.exists():
+                    counts = seed_dataset(
+                        users=options["users"], categories=options["categories"],
+                        auctions=options["auctions"], bids_per_auction=options["bids_per_auction"],
+                    )
+                    self.stdout.write(f"Datos generados: {counts}")
+                self.run_endpoints(connection, options)
+        finally:
+            teardown_test_environment()
+
+    def endpoints(self):
+        # La subasta y el usuario con más filas, para que los filtros tengan algo que recorrer
+        auction = Auction.objects.order_by("-rating_count", "id").first()
+        user = CustomUser.objects.filter(username__startswith="bench_user_").first()
+        prices = Auction.objects.aggregate(low=Min("price"), high=Max("price"))
+        low = prices["low"] + (prices["high"] - prices["low"]) / 4
+        high = prices["high"] - (prices["high"] - prices["low"]) / 4
+        now = timezone.now()
+        return user, [
+            ("auction-list", "/api/auctions/", Auction.objects.all(), None),
+            ("auction-list (category + price)",
+             f"/api/auctions/?category={auction.category_id}&min_price={low:.2f}&max_price={high:.2f}",
+             Auction.objects.filter(category_id=auction.category_id, price__gte=low, price__lte=high),
+             "auction_category_price_idx"),
+            ("auctions closing within 24h", "/api/auctions/?ending_within=1d&ordering=closing_date",
+             Auction.objects.filter(status=Auction.Status.OPEN, closing_date__gt=now,
+                                    closing_date__lte=now + timedelta(days=1)).order_by("closing_date", "id"),
+             "auction_status_closing_idx"),
+            ("auction-list (ordering=-bid_count, cursor)", "/api/auctions/?ordering=-bid_count&pagination=cursor",
+             Auction.objects.order_by("-bid_count", "-id"), "auction_bid_count_idx"),
+            ("bid-list", f"/api/auctions/{auction.pk}/bid/",
+             Bid.objects.filter(auction=auction).order_by("-price"), "bid_auction_price_idx"),
+            ("user-bids", "/api/auctions/misPujas/",
+             Bid.objects.filter(bidder=user).order_by("-price"), "bid_bidder_price_idx"),
+            ("comment-list", f"/api/auctions/{auction.pk}/comments/",
+             Comment.objects.filter(auction=auction), "comment_auction_created_idx"),
+        ]
+
+    def run_endpoints(self, connection, options):
+        client = APIClient()
+        user, endpoints = self.endpoints()
+        client.force_authenticate(user)
+        explain_options = {"analyze": True} if options["analyze"] and connection.vendor == "postgresql" else {}
+
+        for name, url, queryset, index in endpoints:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {name}"))
+            plan = queryset[:5].explain(**explain_options)
+            self.stdout.write(plan)
+            if index:
+                used = index in plan
+                style = self.style.SUCCESS if used else self.style.WARNING
+                self.stdout.write(style(f"índice {index}: {'usado' if used else 'NO usado'}"))
+
+            if url:
+                stats = time_call(lambda: client.get(url), repeat=options["repeat"])
+                label = "GET " + url
+            else:
+                stats = time_call(lambda: list(queryset[:5]), repeat=options["repeat"])
+                label = "consulta"
+            self.stdout.write(
+                f"{label}: media {stats['mean_ms']:.2f} ms, p50 {stats['p50_ms']:.2f} ms, "
+                f"p95 {stats['p95_ms']:.2f} ms, {stats['queries']:.1f} consultas"
+            )
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from auctions.benchmarking import benchmark_database, seed_dataset, time_call
+from auctions.models import Auction
+from auctions.search import IContainsSearchBackend, get_search_backend
+
+
+class Command(BaseCommand):
+    help = ("Compara la latencia (p50/p95) de la búsqueda icontains con el backend de texto "
+            "completo sobre un catálogo sintético de subastas.")
+
+    # Palabras del título, prefijos mientras se escribe y palabras raras de la descripción
+    terms = ["guitarra", "cáma", "reloj vinilo", "bacedi", "zovi", "medisa ruteba"]
+
+    def add_arguments(self, parser):
+        parser.add_argument("--auctions", type=int, default=100_000)
+        parser.add_argument("--repeat", type=int, default=30)
+        parser.add_argument("--keepdb", action="store_true", help="Conservar la base de datos de pruebas.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        try:
+            with benchmark_database(keepdb=options["keepdb"]) as connection:
+                if not Auction.objects.exists():
+                    seed_dataset(auctions=options["auctions"], bids_per_auction=0,
+                                 ratings_per_auction=0, comments_per_auction=0, batch_size=5000)
+                backends = [IContainsSearchBackend(), get_search_backend()]
+                self.stdout.write(f"{connection.vendor}: {Auction.objects.count()} subastas\n")
+                self.stdout.write(f"{'término':<18}{'backend':<26}{'filas':>8}{'p50 ms':>10}{'p95 ms':>10}")
+                for term in self.terms:
+                    for backend in backends:
+                        queryset = backend.filter(Auction.objects.all(), term)
+                        # Lo mismo que hace la vista paginada: COUNT(*) + primera página
+                        stats = time_call(lambda: (queryset.count(), list(queryset[:5])),
+                                          repeat=options["repeat"])
+                        self.stdout.write(
+                            f"{term:<18}{type(backend).__name__:<26}{queryset.count():>8}"
+                            f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+                        )
+        finally:
+            teardown_test_environment()
@@ -0,0 +1,74 @@
+import asyncio
+import os
+import random
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from auctions.benchmarking import SERVERS, benchmark_database, database_url, http_load, seed_dataset, start_server
+from auctions.models import Auction
+
+
+class Command(BaseCommand):
+    help = ("Siembra una base de datos de pruebas, arranca gunicorn con workers WSGI (vistas DRF "
+            "síncronas) y con workers uvicorn (ASGI, vistas de lectura asíncronas) y compara peticiones/s "
+            "y latencia de cola de los endpoints de lectura con el mismo número de workers.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument("--concurrency", type=int, default=64)
+        parser.add_argument("--duration", type=float, default=10.0, help="Segundos por endpoint y servidor.")
+        parser.add_argument("--auctions", type=int, default=2000)
+        parser.add_argument("--bids-per-auction", type=int, default=10)
+        parser.add_argument("--servers", nargs="+", choices=sorted(SERVERS), default=["wsgi", "asgi"])
+        parser.add_argument("--port", type=int, default=8765)
+
+    def handle(self, *args, **options):
+        with benchmark_database(shared=True) as connection:
+            counts = seed_dataset(auctions=options["auctions"], bids_per_auction=options["bids_per_auction"])
+            self.stdout.write(f"Base de datos: {connection.vendor}; datos generados: {counts}")
+            env = {**os.environ, "DATABASE_URL": database_url(connection)}
+            endpoints = self.endpoints()
+            # Sin commit pendiente: los servidores abren sus propias conexiones
+            connection.close()
+
+            results = {}
+            for server in options["servers"]:
+                self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {server} ({options['workers']} workers)"))
+                # Cada servidor con sus vistas aunque el entorno traiga ASYNC_READ_VIEWS
+                server_env = {**env, "ASYNC_READ_VIEWS": "1" if server == "asgi" else "0"}
+                with start_server(server, options["workers"], options["port"], server_env):
+                    for name, paths in endpoints:
+                        stats = asyncio.run(http_load(
+                            "127.0.0.1", options["port"], paths,
+                            concurrency=options["concurrency"], duration=options["duration"],
+                        ))
+                        results[server, name] = stats
+                        self.stdout.write(
+                            f"{name}: {stats['rps']:.0f} req/s, p50 {stats['p50_ms']:.1f} ms, "
+                            f"p95 {stats['p95_ms']:.1f} ms, p99 {stats['p99_ms']:.1f} ms, "
+                            f"{stats['errors']} errores"
+                        )
+
+            if len(options["servers"]) == 2:
+                first, second = options["servers"]
+                self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {second} frente a {first}"))
+                for name, _ in endpoints:
+                    a, b = results[first, name], results[second, name]
+                    self.stdout.write(
+                        f"{name}: req/s ×{b['rps'] / a['rps']:.2f}, p99 ×{b['p99_ms'] / a['p99_ms']:.2f}"
+                    )
+
+    def endpoints(self):
+        rng = random.Random(0)
+        ids = list(Auction.objects.values_list("pk", flat=True))
+        busy = list(Auction.objects.annotate(n=Count("bids")).filter(n__gt=0).values_list("pk", flat=True))
+        pages = max(1, len(ids) // 5)
+        # Muchas URL distintas para que la caché de respuestas no lo resuelva todo
+        return [
+            ("auction-list", [f"/api/auctions/?page={rng.randint(1, pages)}" for _ in range(500)]),
+            ("auction-detail", [f"/api/auctions/{pk}/" for pk in rng.sample(ids, min(500, len(ids)))]),
+            ("bid-list", [f"/api/auctions/{pk}/bid/" for pk in rng.sample(busy, min(500, len(busy)))]),
+            ("comment-list", [f"/api/auctions/{pk}/comments/" for pk in rng.sample(ids, min(500, len(ids)))]),
+            ("category-list", ["/api/auctions/categories/"]),
+        ]
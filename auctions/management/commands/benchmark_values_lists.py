@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from auctions.benchmarking import benchmark_database, seed_dataset, time_call
+from auctions.models import Auction, Bid, Comment
+from auctions.pagination import KeysetPageNumberPagination
+from auctions.views import AuctionListCreate, BidListCreate, CommentListCreate, UserBidListView
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = ("Filas por segundo de los listados de subastas, pujas, comentarios y pujas del usuario con "
+            "el serializador de DRF y con las filas de values() (auctions.readonly), y comprobación de "
+            "que las dos respuestas son idénticas.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, default=500)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        page_size = options["page_size"]
+        setup_test_environment()
+        try:
+            with benchmark_database() as connection:
+                seed_dataset(auctions=page_size, bids_per_auction=1, comments_per_auction=1)
+                # Todas las pujas y comentarios en una subasta y de un usuario: páginas llenas
+                auction = Auction.objects.order_by("pk").first()
+                user = CustomUser.objects.filter(username__startswith="bench_user_").first()
+                Bid.objects.update(auction=auction, bidder=user)
+                Comment.objects.update(auction=auction)
+                self.stdout.write(f"Base de datos: {connection.vendor}; páginas de {page_size} filas")
+
+                pagination = type("BenchmarkPagination", (KeysetPageNumberPagination,), {"page_size": page_size})
+                cases = [
+                    ("subastas (completo)", AuctionListCreate, {"omit": ""}, {}),
+                    ("subastas (tarjeta)", AuctionListCreate, {}, {}),
+                    ("pujas", BidListCreate, {}, {"auction_id": auction.pk}),
+                    ("comentarios", CommentListCreate, {}, {"auction_id": auction.pk}),
+                    ("mis pujas", UserBidListView, {}, {}),
+                ]
+                for name, view_class, params, kwargs in cases:
+                    self.run_case(name, view_class.as_view(pagination_class=pagination), params, kwargs,
+                                  user, page_size, options["repeat"])
+        finally:
+            teardown_test_environment()
+
+    def run_case(self, name, view, params, kwargs, user, page_size, repeat):
+        factory = APIRequestFactory()
+
+        def call():
+            # Autenticado: la caché de respuestas (anónimas) no interviene
+            request = factory.get("/", params, HTTP_ACCEPT="application/json")
+            force_authenticate(request, user)
+            response = view(request, **kwargs)
+            response.render()
+            return response
+
+        with override_settings(AUCTION_VALUES_LISTS=False):
+            expected = call().content
+            before = time_call(call, repeat=repeat)
+        content = call().content
+        after = time_call(call, repeat=repeat)
+        self.stdout.write(
+            f"{name}: serializador {page_size / before['mean_ms'] * 1000:,.0f} filas/s "
+            f"({before['mean_ms']:.1f} ms), values() {page_size / after['mean_ms'] * 1000:,.0f} filas/s "
+            f"({after['mean_ms']:.1f} ms), ×{before['mean_ms'] / after['mean_ms']:.1f}, "
+            f"{'respuesta idéntica' if content == expected else 'RESPUESTA DISTINTA'}"
+        )
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from auctions.bulk import FORMATS, export_queryset, open_output
+from auctions.models import Auction, Bid, Rating
+
+
+class Command(BaseCommand):
+    help = ("Exporta las subastas (y, si se pide, sus pujas y valoraciones) a NDJSON o CSV, "
+            "comprimido con gzip si el fichero termina en .gz. Se lee con un cursor de servidor: "
+            "la memoria no depende del número de filas.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Fichero de salida ('-' para la salida estándar).")
+        parser.add_argument("--format", choices=FORMATS, default="ndjson")
+        parser.add_argument("--gzip", action="store_true", default=None, help="Comprimir aunque no termine en .gz.")
+        parser.add_argument("--category", type=int, action="append", dest="categories",
+                            help="Limitar a esta categoría (se puede repetir).")
+        parser.add_argument("--with-related", action="store_true",
+                            help="Incluir pujas y valoraciones (solo NDJSON: un registro por fila).")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        auctions = Auction.objects.all()
+        if options["categories"]:
+            auctions = auctions.filter(category__in=options["categories"])
+        querysets = [auctions]
+        if options["with_related"]:
+            if options["format"] == "csv":
+                self.stderr.write("--with-related solo está disponible en NDJSON: se exportan solo las subastas.")
+            else:
+                querysets += [Bid.objects.filter(auction__in=auctions), Rating.objects.filter(auction__in=auctions)]
+
+        start = time.perf_counter()
+        counts = {}
+        with open_output(options["output"], options["gzip"], self.stdout) as output:
+            for queryset in querysets:
+                counts[queryset.model._meta.model_name] = export_queryset(
+                    queryset, output, options["format"], options["chunk_size"])
+        report(self.stderr, counts, time.perf_counter() - start)
+
+
+def report(stream, counts, elapsed):
+    # Al canal de errores: la salida estándar puede ser el propio fichero exportado
+    rows = sum(counts.values())
+    detail = ", ".join(f"{count} {name}" for name, count in counts.items())
+    stream.write(f"{rows} filas ({detail}) en {elapsed:.2f} s: {rows / max(elapsed, 1e-9):.0f} filas/s")
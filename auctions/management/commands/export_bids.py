@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from auctions.bulk import FORMATS, export_queryset, open_output
+from auctions.management.commands.export_auctions import report
+from auctions.models import Bid
+
+
+class Command(BaseCommand):
+    help = ("Exporta el historial de pujas a NDJSON o CSV (gzip si el fichero termina en .gz) con un "
+            "cursor de servidor, sin paginar la API.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Fichero de salida ('-' para la salida estándar).")
+        parser.add_argument("--format", choices=FORMATS, default="ndjson")
+        parser.add_argument("--gzip", action="store_true", default=None, help="Comprimir aunque no termine en .gz.")
+        parser.add_argument("--auction", type=int, action="append", dest="auctions",
+                            help="Limitar a esta subasta (se puede repetir).")
+        parser.add_argument("--since", help="Solo pujas desde esta fecha (ISO 8601).")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        bids = Bid.objects.all()
+        if options["auctions"]:
+            bids = bids.filter(auction__in=options["auctions"])
+        if options["since"]:
+            bids = bids.filter(creation_date__gte=options["since"])
+
+        start = time.perf_counter()
+        with open_output(options["output"], options["gzip"], self.stdout) as output:
+            count = export_queryset(bids, output, options["format"], options["chunk_size"])
+        report(self.stderr, {"bid": count}, time.perf_counter() - start)
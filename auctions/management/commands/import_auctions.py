@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from auctions.bulk import AuctionImporter, ImportErrors, open_input, read_records
+from auctions.management.commands.export_auctions import report
+from auctions.models import Auction, Bid, Rating
+
+CSV_MODELS = {"auction": Auction, "bid": Bid, "rating": Rating}
+
+
+class Command(BaseCommand):
+    help = ("Importa subastas, pujas y valoraciones desde NDJSON (export_auctions / export_bids), una "
+            "fixture JSON o un CSV de un modelo, con bulk_create por lotes y comprobando las "
+            "invariantes de la API. Todo o nada: si un registro no es válido no se importa ninguno.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help="Fichero de entrada ('-' para la entrada estándar; gzip se detecta solo).")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--csv", choices=sorted(CSV_MODELS), dest="csv_model",
+                            help="La entrada es un CSV con filas de este modelo.")
+        parser.add_argument("--skip-invalid", action="store_true",
+                            help="Omitir los registros no válidos en lugar de abortar.")
+
+    def handle(self, *args, **options):
+        importer = AuctionImporter(batch_size=options["batch_size"], skip_invalid=options["skip_invalid"])
+        csv_model = CSV_MODELS.get(options["csv_model"])
+        start = time.perf_counter()
+        try:
+            with transaction.atomic(), open_input(options["input"]) as stream:
+                for label, pk, fields in read_records(stream, csv_model):
+                    importer.add(label, pk, fields)
+                counts = importer.finish()
+        except ImportErrors as exc:
+            raise CommandError(f"{exc}; no se ha importado nada:\n" + "\n".join(exc.errors[:20]))
+        except IntegrityError as exc:
+            raise CommandError(f"No se ha importado nada (¿claves que ya existen?): {exc}")
+        except (ValueError, KeyError) as exc:
+            raise CommandError(f"Fichero no válido: {exc!r}")
+
+        for error in importer.errors[:20]:
+            self.stderr.write(f"Omitido {error}")
+        if importer.errors:
+            self.stderr.write(f"{len(importer.errors)} registro(s) omitido(s).")
+        report(self.stdout, counts, time.perf_counter() - start)
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from auctions import response_cache
+from auctions.models import Auction
+
+
+class Command(BaseCommand):
+    help = ("Comprueba current_price, highest_bid, bid_count y top_bidder_username de las subastas "
+            "contra Bid y corrige las que no coinciden.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--auction", type=int, action="append", dest="auctions",
+                            help="Limitar a esta subasta (se puede repetir).")
+        parser.add_argument("--check", action="store_true",
+                            help="Solo informar de las diferencias (termina con error si las hay).")
+
+    def handle(self, *args, **options):
+        queryset = Auction.objects.all()
+        if options["auctions"]:
+            queryset = queryset.filter(pk__in=options["auctions"])
+
+        if options["check"]:
+            drifted = queryset.bid_summary_drift().values(
+                "pk", "current_price", "expected_current_price", "highest_bid", "expected_highest_bid",
+                "bid_count", "expected_bid_count", "top_bidder_username", "expected_top_bidder_username",
+            )
+            for row in drifted:
+                fields = ("current_price", "highest_bid", "bid_count", "top_bidder_username")
+                diff = ", ".join(f"{name}: {row[name]} → {row['expected_' + name]}"
+                                 for name in fields if row[name] != row["expected_" + name])
+                self.stdout.write(f"Subasta {row['pk']}: {diff}")
+            if drifted:
+                raise CommandError(f"{len(drifted)} subasta(s) con el resumen de pujas desactualizado.")
+            self.stdout.write(self.style.SUCCESS("Resumen de pujas correcto."))
+            return
+
+        fixed = queryset.rebuild_bid_summary()
+        if fixed:
+            # UPDATE masivo: no hay señales que invaliden los listados cacheados
+            response_cache.invalidate(response_cache.AUCTIONS)
+        self.stdout.write(self.style.SUCCESS(f"{fixed} subasta(s) corregida(s)."))
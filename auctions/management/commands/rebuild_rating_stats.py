@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from auctions import response_cache
+from auctions.models import Auction
+
+
+class Command(BaseCommand):
+    help = "Recalcula rating_sum, rating_count y average_rating de las subastas a partir de Rating."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--auction", type=int, action="append", dest="auctions",
+                            help="Limitar a esta subasta (se puede repetir).")
+
+    def handle(self, *args, **options):
+        queryset = Auction.objects.all()
+        if options["auctions"]:
+            queryset = queryset.filter(pk__in=options["auctions"])
+        fixed = queryset.rebuild_rating_stats()
+        if fixed:
+            # UPDATE masivo: no hay señales que invaliden los listados cacheados
+            response_cache.invalidate(response_cache.AUCTIONS)
+        self.stdout.write(self.style.SUCCESS(f"{fixed} subasta(s) corregida(s)."))
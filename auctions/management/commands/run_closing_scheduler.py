@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from auctions.scheduler import AuctionClosingScheduler
+
+
+class Command(BaseCommand):
+    help = ("Cierra las subastas al llegar su closing_date y guarda la puja ganadora y el precio final. "
+            "Al arrancar cierra las que vencieron con el planificador parado.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true",
+                            help="Cerrar las subastas ya vencidas y salir (p. ej. desde cron).")
+        parser.add_argument("--batch-size", type=int, help="Subastas por transacción.")
+        parser.add_argument("--refresh", type=float, help="Segundos entre recargas de la cola.")
+
+    def handle(self, *args, **options):
+        scheduler = AuctionClosingScheduler(batch_size=options["batch_size"], refresh=options["refresh"])
+        closed = scheduler.catch_up()
+        self.stdout.write(f"{closed} subasta(s) vencida(s) cerrada(s).")
+        if options["once"]:
+            return
+
+        self.stdout.write("Esperando cierres (Ctrl+C para salir)…")
+        try:
+            scheduler.run(on_closed=lambda closed: self.stdout.write(f"{len(closed)} subasta(s) cerrada(s)."))
+        except KeyboardInterrupt:
+            scheduler.stop()
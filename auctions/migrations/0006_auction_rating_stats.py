@@ -0,0 +1,44 @@
+# Generated by Django 5.1.7 on 2026-10-17 16:01
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def populate_rating_stats(apps, schema_editor):
+    Auction = apps.get_model('auctions', 'Auction')
+    Rating = apps.get_model('auctions', 'Rating')
+    stats = Rating.objects.filter(auction=models.OuterRef('pk')).order_by().values('auction')
+    Auction.objects.update(
+        rating_sum=Coalesce(models.Subquery(stats.annotate(s=models.Sum('value')).values('s')), 0),
+        rating_count=Coalesce(models.Subquery(stats.annotate(c=models.Count('id')).values('c')), 0),
+        average_rating=Coalesce(
+            models.Subquery(stats.annotate(a=models.Avg('value', output_field=models.FloatField())).values('a')),
+            models.Value(0.0),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0005_comment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auction',
+            name='average_rating',
+            field=models.FloatField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='auction',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='auction',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_rating_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.7 on 2026-10-17 16:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_bid_summary(apps, schema_editor):
+    Auction = apps.get_model('auctions', 'Auction')
+    Bid = apps.get_model('auctions', 'Bid')
+    top_bid = Bid.objects.filter(auction=models.OuterRef('pk')).order_by('-price', 'id')
+    Auction.objects.update(
+        current_price=models.Subquery(top_bid.values('price')[:1]),
+        highest_bid=models.Subquery(top_bid.values('pk')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0006_auction_rating_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auction',
+            name='current_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='auction',
+            name='highest_bid',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='auctions.bid'),
+        ),
+        migrations.RunPython(populate_bid_summary, migrations.RunPython.noop),
+    ]
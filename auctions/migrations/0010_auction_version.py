@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-17 17:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0009_auction_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auction',
+            name='modified',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='auction',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.7 on 2026-10-17 17:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def close_past_auctions(apps, schema_editor):
+    Auction = apps.get_model('auctions', 'Auction')
+    Auction.objects.filter(closing_date__lte=timezone.now()).update(
+        status='closed',
+        winning_bid=models.F('highest_bid'),
+        final_price=models.F('current_price'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0010_auction_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auction',
+            name='final_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='auction',
+            name='status',
+            field=models.CharField(choices=[('open', 'Abierta'), ('closed', 'Cerrada')], default='open', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='auction',
+            name='winning_bid',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='auctions.bid'),
+        ),
+        migrations.AddIndex(
+            model_name='auction',
+            index=models.Index(fields=['status', 'closing_date'], name='auction_status_closing_idx'),
+        ),
+        migrations.RunPython(close_past_auctions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.7 on 2026-10-17 17:31
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def populate_bid_count(apps, schema_editor):
+    Auction = apps.get_model('auctions', 'Auction')
+    Bid = apps.get_model('auctions', 'Bid')
+    bid_count = (
+        Bid.objects.filter(auction=models.OuterRef('pk')).order_by().values('auction')
+        .annotate(n=models.Count('pk')).values('n')
+    )
+    Auction.objects.update(bid_count=Coalesce(models.Subquery(bid_count), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0011_auction_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auction',
+            name='bid_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='auction',
+            index=models.Index(fields=['price', 'id'], name='auction_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auction',
+            index=models.Index(fields=['average_rating', 'id'], name='auction_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auction',
+            index=models.Index(fields=['bid_count', 'id'], name='auction_bid_count_idx'),
+        ),
+        migrations.RunPython(populate_bid_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.7 on 2026-10-17 17:33
+
+from django.db import migrations, models
+
+
+def populate_top_bidder(apps, schema_editor):
+    Auction = apps.get_model('auctions', 'Auction')
+    Bid = apps.get_model('auctions', 'Bid')
+    Auction.objects.filter(highest_bid__isnull=False).update(top_bidder_username=models.Subquery(
+        Bid.objects.filter(pk=models.OuterRef('highest_bid')).values('bidder__username')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0012_auction_bid_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auction',
+            name='top_bidder_username',
+            field=models.CharField(blank=True, max_length=150, null=True),
+        ),
+        migrations.RunPython(populate_top_bidder, migrations.RunPython.noop),
+    ]
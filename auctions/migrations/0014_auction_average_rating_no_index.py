@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-17 19:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0013_auction_top_bidder'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auction',
+            name='average_rating',
+            field=models.FloatField(default=0),
+        ),
+    ]
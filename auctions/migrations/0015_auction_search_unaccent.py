@@ -0,0 +1,58 @@
+from django.db import migrations
+
+# Como 'simple' pero sin acentos (unaccent), igual que el FTS5 de SQLite (remove_diacritics 2):
+# "camion" encuentra "camión" con los dos backends
+SEARCH_CONFIG = 'auction_search'
+
+
+def search_vector_sql(config):
+    return f"""
+    ALTER TABLE auctions_auction ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('{config}', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('{config}', coalesce(description, '')), 'B')
+    ) STORED
+    """
+
+
+def replace_search_vector(config):
+    return [
+        "DROP INDEX IF EXISTS auction_search_vector_idx",
+        "ALTER TABLE auctions_auction DROP COLUMN IF EXISTS search_vector",
+        search_vector_sql(config),
+        "CREATE INDEX auction_search_vector_idx ON auctions_auction USING GIN (search_vector)",
+    ]
+
+
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    f"CREATE TEXT SEARCH CONFIGURATION {SEARCH_CONFIG} (COPY = simple)",
+    f"ALTER TEXT SEARCH CONFIGURATION {SEARCH_CONFIG} ALTER MAPPING FOR hword, hword_part, word WITH unaccent, simple",
+    *replace_search_vector(SEARCH_CONFIG),
+]
+POSTGRES_BACKWARD = [
+    *replace_search_vector('simple'),
+    f"DROP TEXT SEARCH CONFIGURATION IF EXISTS {SEARCH_CONFIG}",
+]
+
+
+def run_for_vendor(statements):
+    # SQLite ya quita los acentos (0009); el resto de bases de datos sigue con icontains
+    def run(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0014_auction_average_rating_no_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor({'postgresql': POSTGRES_FORWARD}),
+            run_for_vendor({'postgresql': POSTGRES_BACKWARD}),
+        ),
+    ]
@@ -2,6 +2,8 @@ from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from users.models import CustomUser
 from django.conf import settings
+from django.db.models.functions import Cast, Coalesce, Now, NullIf
+from django.utils import timezone
 
 # Create your models here.
 
@@ -14,6 +16,114 @@ class Category(models.Model):
         return self.name
     
 
+def version_bump():
+    """Campos que hay que añadir a cualquier UPDATE que cambie la representación de una subasta."""
+    return {'version': models.F('version') + 1, 'modified': Now()}
+
+
+class AuctionQuerySet(models.QuerySet):
+    def touch(self):
+        """Marca las subastas como modificadas (invalida sus ETag, ver auctions.conditional)."""
+        return self.update(**version_bump())
+
+    def apply_rating_delta(self, value_delta, count_delta):
+        """
+        Ajusta rating_sum / rating_count / average_rating en una única sentencia UPDATE.
+        Las expresiones F se evalúan en la base de datos, así que dos valoraciones
+        simultáneas no se pisan (no hay lectura-modificación-escritura en Python).
+        """
+        new_sum = models.F('rating_sum') + value_delta
+        new_count = models.F('rating_count') + count_delta
+        return self.update(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            average_rating=models.Case(
+                models.When(rating_count__lte=-count_delta, then=models.Value(0.0)),
+                default=Cast(new_sum, models.FloatField()) / Cast(new_count, models.FloatField()),
+                output_field=models.FloatField(),
+            ),
+            **version_bump(),
+        )
+
+    @staticmethod
+    def expected_bid_summary():
+        """Expresiones con el resumen de pujas calculado a partir de Bid (puja más alta y número)."""
+        bids = Bid.objects.filter(auction=models.OuterRef('pk'))
+        top_bid = bids.order_by('-price', 'id')
+        return {
+            'current_price': models.Subquery(top_bid.values('price')[:1]),
+            'highest_bid': models.Subquery(top_bid.values('pk')[:1]),
+            'bid_count': Coalesce(models.Subquery(
+                bids.order_by().values('auction').annotate(n=models.Count('pk')).values('n')), 0),
+            'top_bidder_username': models.Subquery(top_bid.values('bidder__username')[:1]),
+        }
+
+    def bid_summary_drift(self):
+        """Subastas cuyo resumen de pujas no coincide con Bid, anotadas con expected_<campo>."""
+        expected = self.expected_bid_summary()
+        # Sin pujas las columnas son NULL, y NULL = NULL no es cierto en SQL: se comparan con Coalesce
+        sentinels = {'current_price': models.Value(-1, output_field=models.DecimalField()),
+                     'highest_bid': models.Value(0), 'bid_count': models.Value(0),
+                     'top_bidder_username': models.Value('')}
+        differs = models.Q()
+        for name, sentinel in sentinels.items():
+            differs |= ~models.Q(**{f'actual_{name}': models.F(f'expected_{name}_or_default')})
+        return self.annotate(
+            **{f'expected_{name}': expression for name, expression in expected.items()},
+            **{f'actual_{name}': Coalesce(name, sentinel) for name, sentinel in sentinels.items()},
+            **{f'expected_{name}_or_default': Coalesce(models.F(f'expected_{name}'), sentinel)
+               for name, sentinel in sentinels.items()},
+        ).filter(differs)
+
+    def rebuild_bid_summary(self):
+        """Recalcula el resumen de pujas a partir de Bid. Devuelve las filas corregidas."""
+        drifted = self.bid_summary_drift().values('pk')
+        return self.model.objects.filter(pk__in=models.Subquery(drifted)).update(
+            **self.expected_bid_summary(), **version_bump(),
+        )
+
+    def due(self, now=None):
+        """Subastas abiertas cuyo closing_date ya ha pasado (las que tiene que cerrar el planificador)."""
+        return self.filter(status=Auction.Status.OPEN, closing_date__lte=now or timezone.now())
+
+    def close(self):
+        """
+        Cierra las subastas: el ganador es la puja más alta desnormalizada (highest_bid /
+        current_price). Solo toca las que siguen abiertas y han vencido, así que es idempotente
+        y nunca adelanta el cierre de una subasta cuyo closing_date se haya ampliado.
+        """
+        return self.due().update(
+            status=Auction.Status.CLOSED,
+            winning_bid=models.F('highest_bid'),
+            final_price=models.F('current_price'),
+            **version_bump(),
+        )
+
+    def rebuild_rating_stats(self):
+        """Recalcula las columnas desnormalizadas a partir de Rating. Devuelve las filas corregidas."""
+        stats = Rating.objects.filter(auction=models.OuterRef('pk')).order_by().values('auction')
+        expected_sum = Coalesce(models.Subquery(stats.annotate(s=models.Sum('value')).values('s')), 0)
+        expected_count = Coalesce(models.Subquery(stats.annotate(c=models.Count('id')).values('c')), 0)
+        # Misma división que apply_rating_delta: una media correcta es idéntica, no solo parecida
+        expected_avg = Coalesce(
+            Cast(expected_sum, models.FloatField()) / NullIf(Cast(expected_count, models.FloatField()), 0.0),
+            models.Value(0.0),
+        )
+        drifted = self.annotate(
+            expected_sum=expected_sum, expected_count=expected_count, expected_avg=expected_avg,
+        ).filter(
+            ~models.Q(rating_sum=models.F('expected_sum'))
+            | ~models.Q(rating_count=models.F('expected_count'))
+            | ~models.Q(average_rating=models.F('expected_avg'))
+        ).values('pk')
+        return self.model.objects.filter(pk__in=models.Subquery(drifted)).update(
+            rating_sum=expected_sum,
+            rating_count=expected_count,
+            average_rating=expected_avg,
+            **version_bump(),
+        )
+
+
 class Auction(models.Model):
     stock = models.IntegerField(validators=[MinValueValidator(1)])
     title = models.CharField(max_length=150)
@@ -28,9 +138,68 @@ class Auction(models.Model):
 
     auctioneer = models.ForeignKey(CustomUser, related_name='auctions', on_delete=models.CASCADE)
 
+    # Agregados de valoraciones desnormalizados (ver AuctionQuerySet.apply_rating_delta)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    average_rating = models.FloatField(default=0)
+
+    # Puja más alta y número de pujas, mantenidos por auctions.services (ver place_bid)
+    current_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    highest_bid = models.ForeignKey('Bid', related_name='+', null=True, blank=True, on_delete=models.SET_NULL)
+    bid_count = models.PositiveIntegerField(default=0)
+    top_bidder_username = models.CharField(max_length=150, null=True, blank=True)
+
+    # Versión y fecha de la última modificación: validadores ETag / Last-Modified de la subasta
+    # y de su listado de pujas. Todo UPDATE masivo que la modifique usa version_bump()
+    version = models.PositiveIntegerField(default=1)
+    modified = models.DateTimeField(auto_now=True)
+
+    # Estado persistido por el planificador de cierres (auctions.scheduler)
+    class Status(models.TextChoices):
+        OPEN = 'open', 'Abierta'
+        CLOSED = 'closed', 'Cerrada'
+
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.OPEN)
+    winning_bid = models.ForeignKey('Bid', related_name='+', null=True, blank=True, on_delete=models.SET_NULL)
+    final_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+
+    objects = AuctionQuerySet.as_manager()
+
     class Meta:
         ordering=('id',)
+        indexes = [
+            models.Index(fields=['category', 'price'], name='auction_category_price_idx'),
+            models.Index(fields=['closing_date'], name='auction_closing_date_idx'),
+            models.Index(fields=['status', 'closing_date'], name='auction_status_closing_idx'),
+            # Órdenes del listado (?ordering=): el id desempata y hace estable la paginación por cursor
+            models.Index(fields=['price', 'id'], name='auction_price_idx'),
+            models.Index(fields=['average_rating', 'id'], name='auction_rating_idx'),
+            models.Index(fields=['bid_count', 'id'], name='auction_bid_count_idx'),
+        ]
         
+    @property
+    def is_open(self):
+        # closing_date cubre el intervalo entre el vencimiento y la pasada del planificador
+        return self.status == self.Status.OPEN and self.closing_date > timezone.now()
+
+    @classmethod
+    def is_open_expression(cls):
+        """La misma regla que is_open, calculada en la consulta (values() / annotate())."""
+        return models.ExpressionWrapper(
+            models.Q(status=cls.Status.OPEN, closing_date__gt=timezone.now()),
+            output_field=models.BooleanField(),
+        )
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version = models.F('version') + 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'version', 'modified'}
+        super().save(*args, **kwargs)
+        if not isinstance(self.version, int):
+            self.refresh_from_db(fields=['version'])
+
     def __str__(self):
         return self.title
     
@@ -42,6 +211,10 @@ class Bid(models.Model):
 
     class Meta:
         ordering = ('id',)
+        indexes = [
+            models.Index(fields=['auction', '-price'], name='bid_auction_price_idx'),
+            models.Index(fields=['bidder', '-price'], name='bid_bidder_price_idx'),
+        ]
 
     def __str__(self):
         return f"Puja de {self.price}€ por {self.bidder}"
@@ -65,6 +238,15 @@ class Rating(models.Model):
         ordering = ('-created',)
         unique_together = ('auction', 'user')
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Valores guardados: al actualizar solo se aplica la diferencia a la subasta
+        stored = dict(zip(field_names, values))
+        instance._stored_value = stored.get('value')
+        instance._stored_auction_id = stored.get('auction_id')
+        return instance
+
     def __str__(self):
         return f"{self.user.username} → {self.auction.title}: {self.value}"
     
@@ -86,6 +268,9 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('-created',)
+        indexes = [
+            models.Index(fields=['auction', '-created'], name='comment_auction_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} on {self.auction.title}: {self.title}"
\ No newline at end of file
@@ -0,0 +1,224 @@
+import base64
+import json
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPageNumberPagination(PageNumberPagination):
+    """
+    Paginación por número de página (la de siempre) con dos modos opcionales por petición:
+
+    - ``?pagination=cursor``: paginación por clave (keyset). La posición viaja en un cursor
+      opaco (``?cursor=...``) con los valores de ``view.keyset_ordering`` de la última fila,
+      así que la página 10.000 cuesta lo mismo que la primera (sin OFFSET).
+    - ``?count=false``: omite el ``COUNT(*)``. En modo cursor el total no se calcula salvo
+      que se pida con ``?count=true``.
+    """
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    default_keyset_ordering = ('id',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.setup(request)
+        if self.keyset:
+            ordering = getattr(view, 'keyset_ordering', self.default_keyset_ordering)
+            return self.paginate_keyset(queryset, request, ordering)
+        if self.count:
+            return super().paginate_queryset(queryset, request, view)
+        return self.paginate_without_count(queryset, request)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Igual que paginate_queryset, pero con el ORM asíncrono (acount / iteración asíncrona)."""
+        self.setup(request)
+        if self.keyset:
+            ordering = getattr(view, 'keyset_ordering', self.default_keyset_ordering)
+            page_queryset = self.keyset_queryset(queryset, request, ordering)
+            if self.count:
+                self.total = await queryset.acount()
+            return self.keyset_rows([row async for row in page_queryset])
+        if self.count:
+            return await self.apaginate_with_count(queryset, request)
+        return self.rows_without_count([row async for row in self.queryset_without_count(queryset, request)])
+
+    def setup(self, request):
+        self.request = request
+        self.keyset = request.query_params.get(self.mode_query_param) == 'cursor'
+        self.count = self.get_count_flag(request, default=not self.keyset)
+        self.total = None
+
+    def get_count_flag(self, request, default):
+        value = request.query_params.get(self.count_query_param)
+        if value is None:
+            return default
+        return value.lower() not in ('0', 'false', 'no')
+
+    # --- Página con COUNT(*) en asíncrono (la síncrona es la de PageNumberPagination) ---
+    async def apaginate_with_count(self, queryset, request):
+        paginator = self.django_paginator_class(queryset, self.get_page_size(request))
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        self.page.object_list = [row async for row in self.page.object_list]
+        return list(self.page)
+
+    # --- Página sin COUNT(*): se pide una fila de más para saber si hay siguiente ---
+    def paginate_without_count(self, queryset, request):
+        return self.rows_without_count(list(self.queryset_without_count(queryset, request)))
+
+    def queryset_without_count(self, queryset, request):
+        try:
+            self.page_number = int(request.query_params.get(self.page_query_param, 1))
+            if self.page_number < 1:
+                raise ValueError
+        except ValueError:
+            raise NotFound(self.invalid_page_message)
+        self.size = self.get_page_size(request)
+        offset = (self.page_number - 1) * self.size
+        return queryset[offset:offset + self.size + 1]
+
+    def rows_without_count(self, rows):
+        self.has_next = len(rows) > self.size
+        self.has_previous = self.page_number > 1
+        return rows[:self.size]
+
+    # --- Keyset ---
+    def paginate_keyset(self, queryset, request, ordering):
+        page_queryset = self.keyset_queryset(queryset, request, ordering)
+        if self.count:
+            self.total = queryset.count()
+        return self.keyset_rows(list(page_queryset))
+
+    def keyset_queryset(self, queryset, request, ordering):
+        self.ordering = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+        self.size = self.get_page_size(request)
+        self.position, self.reverse = self.decode_cursor(request, queryset.model)
+
+        order = [f"{'-' if desc != self.reverse else ''}{name}" for name, desc in self.ordering]
+        queryset = queryset.order_by(*order)
+        if self.position is not None:
+            queryset = queryset.filter(self.after(self.position, self.reverse))
+        return queryset[:self.size + 1]
+
+    def keyset_rows(self, rows):
+        has_more = len(rows) > self.size
+        rows = rows[:self.size]
+        if self.reverse:
+            rows.reverse()
+            self.has_previous, self.has_next = has_more, self.position is not None
+        else:
+            self.has_next, self.has_previous = has_more, self.position is not None
+        self.page_rows = rows
+        return rows
+
+    def after(self, position, reverse):
+        """Condición lexicográfica (a, b) > (x, y) expresada con Q para cualquier dirección."""
+        condition = Q()
+        equal = Q()
+        for (name, desc), value in zip(self.ordering, position):
+            lookup = 'lt' if desc != reverse else 'gt'
+            condition |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def encode_cursor(self, row, reverse=False):
+        position = [self.field_value(row, name) for name, _ in self.ordering]
+        payload = json.dumps({'p': position, 'r': reverse}, separators=(',', ':'))
+        token = base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, token)
+
+    @staticmethod
+    def field_value(row, name):
+        # Modelos o, en los listados de solo lectura (auctions.readonly), dicts de values()
+        value = row[name] if isinstance(row, dict) else getattr(row, name)
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+    def decode_cursor(self, request, model):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+            position = [
+                model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(self.ordering, payload['p'], strict=True)
+            ]
+            return position, bool(payload.get('r'))
+        except (ValueError, KeyError, TypeError, DjangoValidationError):
+            raise NotFound("Cursor no válido.")
+
+    # --- Respuesta ---
+    def get_next_link(self):
+        if self.keyset:
+            if not self.has_next or not self.page_rows:
+                return None
+            return self.encode_cursor(self.page_rows[-1])
+        if not self.count:
+            if not self.has_next:
+                return None
+            return replace_query_param(self.request.build_absolute_uri(), self.page_query_param, self.page_number + 1)
+        return super().get_next_link()
+
+    def get_previous_link(self):
+        if self.keyset:
+            if not self.has_previous or not self.page_rows:
+                return None
+            return self.encode_cursor(self.page_rows[0], reverse=True)
+        if not self.count:
+            if not self.has_previous:
+                return None
+            url = self.request.build_absolute_uri()
+            if self.page_number == 2:
+                return remove_query_param(url, self.page_query_param)
+            return replace_query_param(url, self.page_query_param, self.page_number - 1)
+        return super().get_previous_link()
+
+    def get_paginated_response(self, data):
+        if not self.keyset and self.count:
+            return super().get_paginated_response(data)
+        fields = [('next', self.get_next_link()), ('previous', self.get_previous_link()), ('results', data)]
+        if self.total is not None:
+            fields.insert(0, ('count', self.total))
+        return Response(OrderedDict(fields))
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['required'] = ['results']
+        return response_schema
+
+
+class OptInKeysetPagination(KeysetPageNumberPagination):
+    """
+    KeysetPageNumberPagination solo si la petición la pide (``?page=``, ``?pagination=cursor`` o
+    ``?cursor=``); sin ellos el listado va entero y sin envolver, como antes de paginarlo. Para
+    los historiales del usuario, que los clientes ya leían como lista.
+    """
+
+    def requested(self, request):
+        params = request.query_params
+        return any(name in params for name in (self.page_query_param, self.mode_query_param, self.cursor_query_param))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.requested(request):
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        if not self.requested(request):
+            return None
+        return await super().apaginate_queryset(queryset, request, view)
@@ -0,0 +1,236 @@
+"""
+Serialización de solo lectura para los GET de los listados de subastas, pujas y comentarios.
+
+En una página grande casi todo el tiempo se va en crear un modelo por fila y en pasar cada
+campo por el serializador de DRF (get_attribute, to_representation, SkipField...). Con
+``ValuesListMixin`` la página se lee con ``.values()`` y los dicts se construyen directamente,
+con el mismo resultado que el serializador de la vista:
+
+- ``ValuesPlan`` recorre los campos del serializador (ya filtrados por ``?fields=`` /
+  ``?omit=``) y decide qué columna lee cada uno y cómo se convierte: tal cual (enteros, textos,
+  claves ajenas), con el ``to_representation`` del campo (decimales, choices...) o, las fechas,
+  con la zona horaria activa resuelta una vez por página;
+- ``bidder_username`` / ``user_username`` (``source='bidder.username'``) salen del JOIN de la
+  misma consulta y los serializadores anidados (``auction_summary``), de las columnas de la
+  relación;
+- los SerializerMethodField se calculan en la consulta a partir de ``Meta.values_sources`` del
+  serializador: ``ValuesSource(expresión o columna, conversión)``.
+
+Si algún campo no se puede leer así (``source='*'``, un método sin ``values_sources``, una
+relación que puede ser nula en mitad del ``source``...) la vista usa el serializador de
+siempre. Las escrituras, la exportación y el detalle no cambian. ``AUCTION_VALUES_LISTS =
+False`` desactiva el atajo.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.utils import timezone
+from django.utils.functional import cached_property
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+ISO_8601 = 'iso-8601'
+
+
+class Unsupported(Exception):
+    """El serializador tiene un campo que ValuesPlan no sabe leer de values()."""
+
+
+class ValuesSource:
+    """
+    Valor de un SerializerMethodField calculado en la consulta: ``expression`` es una columna,
+    una expresión o una función que la crea en cada consulta (p. ej. si depende de la hora), y
+    ``convert`` lo que hace el método con el valor leído.
+    """
+
+    def __init__(self, expression, convert=None):
+        self.expression = expression
+        self.convert = convert
+
+    def resolve(self):
+        if isinstance(self.expression, str):
+            return models.F(self.expression)
+        return self.expression() if callable(self.expression) else self.expression
+
+
+def model_field(model, path):
+    """Campo de ``model`` al final de ``path`` (con ``__``), solo por relaciones no nulas hacia delante."""
+    names = path.split('__')
+    for index, name in enumerate(names):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            raise Unsupported(path)
+        if not field.concrete or field.many_to_many:
+            raise Unsupported(path)
+        if index < len(names) - 1:
+            # Con la relación a NULL, DRF omite el campo (SkipField) y values() daría None
+            if not field.many_to_one and not field.one_to_one or field.null:
+                raise Unsupported(path)
+            model = field.related_model
+    return field
+
+
+def identity_types(field):
+    """Tipos de columna que el to_representation de ``field`` devuelve sin cambios."""
+    if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+        return (models.ForeignKey, models.OneToOneField)
+    if type(field).to_representation is serializers.CharField.to_representation:
+        return (models.CharField, models.TextField)
+    if type(field).to_representation is serializers.IntegerField.to_representation:
+        return (models.IntegerField, models.AutoField)
+    if type(field).to_representation is serializers.FloatField.to_representation:
+        return (models.FloatField,)
+    if type(field).to_representation is serializers.BooleanField.to_representation:
+        return (models.BooleanField,)
+    return ()
+
+
+def datetime_converter(field):
+    """DateTimeField.to_representation con la zona horaria de la petición buscada una sola vez."""
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or tz is None:
+        return field.to_representation
+    iso = output_format.lower() == ISO_8601
+    # FastDateTimeField: isoformat() en lugar de strftime para su formato
+    fast = output_format == getattr(field, 'FAST_FORMAT', None)
+
+    def convert(value):
+        if not timezone.is_aware(value) or value.year < 1000:
+            return field.to_representation(value)
+        try:
+            value = value.astimezone(tz)
+        except OverflowError:
+            return field.to_representation(value)
+        if fast:
+            return value.isoformat(timespec='seconds')[:19] + 'Z'
+        if iso:
+            value = value.isoformat()
+            return value[:-6] + 'Z' if value.endswith('+00:00') else value
+        return value.strftime(output_format)
+
+    return convert
+
+
+class ValuesPlan:
+    """
+    Cómo construir la representación de ``serializer`` a partir de filas de ``values()``.
+    Cada entrada es (nombre, clave de la fila, conversión, plan anidado); las conversiones que
+    dependen de la petición (fechas) se preparan en cada ``represent()``.
+    """
+
+    def __init__(self, serializer, prefix=''):
+        self.model = serializer.Meta.model
+        self.columns = []
+        self.expressions = {}
+        self.entries = []
+        sources = getattr(serializer.Meta, 'values_sources', {})
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if name in sources:
+                if prefix:
+                    raise Unsupported(name)
+                key = f'values_{name}'
+                self.expressions[key] = sources[name]
+                self.entries.append((name, key, sources[name].convert, None))
+            elif isinstance(field, serializers.Serializer):
+                key = prefix + '__'.join(field.source_attrs)
+                relation = model_field(self.model, key[len(prefix):])
+                if not relation.many_to_one and not relation.one_to_one:
+                    raise Unsupported(name)
+                nested = ValuesPlan(field, prefix=key + '__')
+                if nested.expressions:
+                    raise Unsupported(name)
+                self.columns += [key, *nested.columns]
+                self.entries.append((name, key, None, nested))
+            elif isinstance(field, (serializers.SerializerMethodField, serializers.ListSerializer,
+                                    serializers.ManyRelatedField)) or field.source == '*':
+                raise Unsupported(name)
+            else:
+                key = prefix + '__'.join(field.source_attrs)
+                column = model_field(self.model, key[len(prefix):])
+                if column.is_relation and not isinstance(field, serializers.PrimaryKeyRelatedField):
+                    raise Unsupported(name)
+                self.columns.append(key)
+                self.entries.append((name, key, self.converter(field, column), None))
+
+    @staticmethod
+    def converter(field, column):
+        if isinstance(field, serializers.DateTimeField):
+            # Se sustituye en cada represent() por datetime_converter(field)
+            return field
+        if isinstance(column, identity_types(field)):
+            return None
+        if isinstance(field, serializers.RelatedField):
+            raise Unsupported(field.field_name)
+        return field.to_representation
+
+    def queryset(self, queryset, extra=()):
+        """``queryset.values()`` con las columnas del plan y las ``extra`` (orden de la paginación)."""
+        columns = list(dict.fromkeys([*self.columns, *extra]))
+        return queryset.values(*columns, **{key: source.resolve() for key, source in self.expressions.items()})
+
+    def prepare(self):
+        entries = []
+        for name, key, convert, nested in self.entries:
+            if isinstance(convert, serializers.DateTimeField):
+                convert = datetime_converter(convert)
+            entries.append((name, key, convert, nested.prepare() if nested is not None else None))
+        return entries
+
+    def represent(self, rows):
+        entries = self.prepare()
+        return [build(row, entries) for row in rows]
+
+
+def build(row, entries):
+    data = {}
+    for name, key, convert, nested in entries:
+        value = row[key]
+        if value is None:
+            data[name] = None
+        elif nested is not None:
+            data[name] = build(row, nested)
+        elif convert is None:
+            data[name] = value
+        else:
+            data[name] = convert(value)
+    return data
+
+
+@lru_cache(maxsize=256)
+def values_plan(serializer_class, selected):
+    """Plan del serializador con los campos ``selected`` (None = todos), o None si no se puede."""
+    try:
+        return ValuesPlan(serializer_class(context={'sparse_fields': selected}))
+    except Unsupported:
+        return None
+
+
+class ValuesListMixin:
+    """``list()`` de los GET con filas de ``values()`` en lugar de modelos y serializador."""
+
+    @cached_property
+    def values_plan(self):
+        if self.request.method not in ('GET', 'HEAD') or not getattr(settings, 'AUCTION_VALUES_LISTS', True):
+            return None
+        return values_plan(self.get_serializer_class(), getattr(self, 'sparse_fields', None))
+
+    def values_queryset(self, queryset):
+        # La paginación por cursor lee de la última fila las columnas del orden
+        ordering = [name.lstrip('-') for name in getattr(self, 'keyset_ordering', ())]
+        return self.values_plan.queryset(queryset, ordering)
+
+    def list(self, request, *args, **kwargs):
+        if self.values_plan is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.values_queryset(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.values_plan.represent(page))
+        return Response(self.values_plan.represent(queryset))
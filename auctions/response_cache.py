@@ -0,0 +1,217 @@
+"""
+Caché de respuestas para los listados públicos (peticiones GET anónimas).
+
+Se guarda ``response.data`` ya serializado, así que un acierto no toca la base de datos ni
+los serializadores (el renderizado sigue respetando el Accept de cada petición). La clave
+incluye el esquema y el host (los enlaces de paginación son absolutos), la ruta, los parámetros de ``view.cache_query_params`` normalizados, el
+tamaño de página y la versión de los ámbitos de la petición (``view.get_cache_scopes()``).
+
+Invalidación: las señales llaman a ``invalidate(scope)``, que cambia la versión del ámbito;
+las entradas antiguas dejan de ser alcanzables y caducan solas (TIMEOUT / MAX_ENTRIES de
+``CACHES``). La versión se cambia al momento y otra vez al hacer commit, para que ninguna
+petición concurrente pueda guardar datos leídos antes del commit con la versión nueva. Por lo
+mismo, con réplicas de lectura (myFirstApiRest.routers) un fallo de caché lee de la principal.
+
+Filas: en las vistas con ``cache_rows_scope`` cada página guarda la versión de cada fila que
+contiene (``<ámbito>:<id>``) y un acierto las comprueba con un solo ``get_many``. Así una puja
+o una valoración (``invalidate_rows``) solo descarta las páginas en las que sale esa subasta,
+más las que ordenan por lo que ha cambiado (ámbitos ``auctions:bids`` / ``auctions:ratings``);
+crear, editar, cerrar o borrar subastas cambia qué subastas salen en cada página y sigue
+invalidando el ámbito entero. Una página cuyas filas no tienen ``id`` (``?fields=``) depende
+de cualquier cambio de fila (``auctions:rows``).
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from myFirstApiRest.routers import read_from_primary
+
+AUCTIONS = "auctions"
+CATEGORIES = "categories"
+SCOPES = (AUCTIONS, CATEGORIES)
+# Filas del listado de subastas y órdenes que cambian con las pujas / valoraciones
+AUCTION_ROWS = "auctions:rows"
+AUCTION_BIDS = "auctions:bids"
+AUCTION_RATINGS = "auctions:ratings"
+
+KEY_PREFIX = "responsecache"
+
+
+def get_cache():
+    return caches[getattr(settings, "RESPONSE_CACHE_ALIAS", "default")]
+
+
+def get_timeout():
+    return getattr(settings, "RESPONSE_CACHE_TIMEOUT", 60)
+
+
+def _version_key(scope):
+    return f"{KEY_PREFIX}:version:{scope}"
+
+
+def get_version(scope):
+    return get_versions([scope])[scope]
+
+
+def get_versions(scopes):
+    """{ámbito: versión} con un solo get_many (más otro si hay que crear alguna versión)."""
+    cache = get_cache()
+    keys = {_version_key(scope): scope for scope in scopes}
+    found = cache.get_many(list(keys))
+    missing = [key for key in keys if key not in found]
+    if missing:
+        # Si la versión se ha expulsado de la caché se empieza con un valor nuevo, nunca
+        # con uno que pudiera coincidir con entradas antiguas que sigan guardadas
+        for key in missing:
+            cache.add(key, time.time_ns(), timeout=None)
+        found.update(cache.get_many(missing))
+    return {keys[key]: version for key, version in found.items()}
+
+
+def _bump(scope):
+    cache = get_cache()
+    try:
+        cache.incr(_version_key(scope))
+    except ValueError:
+        cache.set(_version_key(scope), time.time_ns(), timeout=None)
+
+
+def invalidate(*scopes):
+    for scope in scopes:
+        _bump(scope)
+        transaction.on_commit(lambda scope=scope: _bump(scope))
+
+
+def row_scope(rows_scope, pk):
+    return f"{rows_scope}:{pk}"
+
+
+def invalidate_rows(rows_scope, pks, *scopes):
+    """Han cambiado las filas ``pks`` (no qué filas salen en cada página, salvo en ``scopes``)."""
+    invalidate(rows_scope, *scopes, *(row_scope(rows_scope, pk) for pk in set(pks)))
+
+
+def _row_ids(data):
+    rows = data.get('results') if isinstance(data, dict) else data
+    if not isinstance(rows, list) or not all(isinstance(row, dict) and 'id' in row for row in rows):
+        return None
+    return [row['id'] for row in rows]
+
+
+def _count(scope, outcome):
+    cache = get_cache()
+    key = f"{KEY_PREFIX}:{outcome}:{scope}"
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def stats():
+    """Aciertos y fallos por ámbito: {'auctions': {'hits': 10, 'misses': 2}, ...}."""
+    cache = get_cache()
+    return {
+        scope: {
+            outcome: cache.get(f"{KEY_PREFIX}:{outcome}:{scope}", 0)
+            for outcome in ("hits", "misses")
+        }
+        for scope in SCOPES
+    }
+
+
+def reset_stats():
+    get_cache().delete_many([f"{KEY_PREFIX}:{outcome}:{scope}" for scope in SCOPES
+                             for outcome in ("hits", "misses")])
+
+
+class AnonymousListCacheMixin:
+    """
+    Cachea el GET de ``list()`` para usuarios anónimos. Las peticiones con parámetros que no
+    estén en ``cache_query_params`` no se cachean (su respuesta podría incluirlos en los
+    enlaces next/previous). Con ``cache_rows_scope`` se guardan también las versiones de las
+    filas de la página.
+    """
+    cache_scope = None
+    cache_rows_scope = None
+    cache_query_params = ('page',)
+
+    def list(self, request, *args, **kwargs):
+        key, response = self.cached_list_response(request)
+        if response is not None:
+            return response
+        return self.store_list_response(key, super().list(request, *args, **kwargs))
+
+    def get_cache_scopes(self, request):
+        return (self.cache_scope,)
+
+    def cached_list_response(self, request):
+        """(clave, respuesta cacheada o None). La clave es None si la petición no se cachea."""
+        key = self.get_response_cache_key(request)
+        if key is None:
+            return None, None
+        cache = get_cache()
+        entry = cache.get(key)
+        if entry is not None:
+            data, rows = entry
+            current = cache.get_many([_version_key(scope) for scope in rows])
+            if all(current.get(_version_key(scope)) == version for scope, version in rows.items()):
+                _count(self.cache_scope, "hits")
+                response = Response(data)
+                response['X-Cache'] = 'HIT'
+                return (key, None), response
+        _count(self.cache_scope, "misses")
+        # La página se va a guardar con la versión actual: no puede salir de una réplica atrasada
+        read_from_primary()
+        # Si alguna fila cambia mientras se lee la página, no se guarda (ver store_list_response)
+        rows_version = get_version(self.cache_rows_scope) if self.cache_rows_scope else None
+        return (key, rows_version), None
+
+    def store_list_response(self, key, response):
+        if key is None:
+            return response
+        key, rows_version = key
+        if response.status_code == 200:
+            rows = self.get_row_versions(response.data, rows_version)
+            if rows is not None:
+                get_cache().set(key, (response.data, rows), get_timeout())
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def get_row_versions(self, data, rows_version):
+        """
+        Versiones de las filas de la página, leídas después de la consulta. Solo valen si ninguna
+        fila ha cambiado desde antes de la consulta (la versión se cambia también al hacer commit,
+        ver invalidate); si no, None y la página no se guarda.
+        """
+        if self.cache_rows_scope is None:
+            return {}
+        pks = _row_ids(data)
+        scopes = [self.cache_rows_scope] if pks is None else [row_scope(self.cache_rows_scope, pk) for pk in pks]
+        versions = get_versions([self.cache_rows_scope, *scopes])
+        if versions.pop(self.cache_rows_scope) != rows_version:
+            return None
+        if pks is None:
+            versions[self.cache_rows_scope] = rows_version
+        return versions
+
+    def get_response_cache_key(self, request):
+        if request.user.is_authenticated:
+            return None
+        params = request.query_params
+        if set(params) - set(self.cache_query_params):
+            return None
+
+        # El orden de los parámetros no cambia la respuesta; el de los valores repetidos sí
+        normalized = [(name, params.getlist(name)) for name in sorted(params)]
+        page_size = self.paginator.get_page_size(request) if self.paginator else None
+        raw = repr((request.scheme, request.get_host(), request.path, normalized, page_size))
+        digest = hashlib.sha256(raw.encode()).hexdigest()
+        scopes = self.get_cache_scopes(request)
+        versions = get_versions(scopes)
+        version = '.'.join(str(versions[scope]) for scope in scopes)
+        return f"{KEY_PREFIX}:page:{self.cache_scope}:{version}:{digest}"
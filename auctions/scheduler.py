@@ -0,0 +1,82 @@
+"""
+Planificador de cierres de subastas (``manage.py run_closing_scheduler``).
+
+Mantiene en memoria un montículo (closing_date, id) con las subastas abiertas que vencen
+dentro del horizonte, duerme hasta el siguiente vencimiento y las cierra por lotes con
+``services.close_due_auctions``, que persiste status / winning_bid / final_price. El montículo
+se recarga cada ``refresh`` segundos (subastas nuevas o con closing_date modificado); como la
+recarga incluye las ya vencidas, al arrancar se ponen al día las que cerraron con el
+planificador parado.
+
+Se pueden lanzar varios planificadores: el UPDATE de cierre solo toca subastas abiertas y, en
+PostgreSQL, los lotes se reparten con SKIP LOCKED. Con el broker de eventos en memoria el evento
+``closed`` solo llega a los streams de este proceso; los del servidor ASGI terminan solos tras
+``AUCTION_EVENTS_CLOSE_GRACE`` salvo que se configure un broker compartido.
+"""
+import heapq
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from . import services
+from .models import Auction
+
+
+class AuctionClosingScheduler:
+    def __init__(self, batch_size=None, refresh=None):
+        self.batch_size = batch_size or getattr(settings, 'AUCTION_CLOSING_BATCH_SIZE', 500)
+        self.refresh_interval = timedelta(seconds=refresh or getattr(settings, 'AUCTION_CLOSING_REFRESH', 60))
+        self.queue = []
+        self.next_refresh = None
+        self.stopped = threading.Event()
+
+    def refresh(self, now=None):
+        """Recarga las subastas abiertas que vencen antes de la próxima recarga (y las ya vencidas)."""
+        now = now or timezone.now()
+        self.next_refresh = now + self.refresh_interval
+        upcoming = (
+            Auction.objects.filter(status=Auction.Status.OPEN, closing_date__lte=self.next_refresh)
+            .order_by().values_list('closing_date', 'pk')
+        )
+        self.queue = list(upcoming)
+        heapq.heapify(self.queue)
+
+    def run_pending(self, now=None):
+        """Cierra las subastas de la cola que ya han vencido. Devuelve las cerradas."""
+        now = now or timezone.now()
+        due = []
+        while self.queue and self.queue[0][0] <= now:
+            due.append(heapq.heappop(self.queue)[1])
+        closed = []
+        for start in range(0, len(due), self.batch_size):
+            closed.extend(services.close_due_auctions(self.batch_size, auction_ids=due[start:start + self.batch_size]))
+        return closed
+
+    def catch_up(self):
+        """Cierra todas las subastas vencidas (arranque tras una parada, ``--once``). Devuelve cuántas."""
+        total = 0
+        while closed := services.close_due_auctions(self.batch_size):
+            total += len(closed)
+        return total
+
+    def next_wakeup(self):
+        if self.queue:
+            return min(self.queue[0][0], self.next_refresh)
+        return self.next_refresh
+
+    def run(self, on_closed=None):
+        """Bucle principal; termina con ``stop()``."""
+        while not self.stopped.is_set():
+            close_old_connections()
+            if self.next_refresh is None or timezone.now() >= self.next_refresh:
+                self.refresh()
+            closed = self.run_pending()
+            if closed and on_closed:
+                on_closed(closed)
+            self.stopped.wait(max(0.0, (self.next_wakeup() - timezone.now()).total_seconds()))
+
+    def stop(self):
+        self.stopped.set()
@@ -0,0 +1,117 @@
+"""
+Backends de búsqueda de texto para el parámetro ``search`` del listado de subastas.
+
+- ``IContainsSearchBackend``: el comportamiento original (LIKE sobre título y descripción).
+- ``PostgresSearchBackend``: columna ``search_vector`` generada (tsvector) con índice GIN y
+  resultados ordenados por relevancia.
+- ``SQLiteFTSSearchBackend``: tabla virtual FTS5 sincronizada mediante señales.
+
+Los dos backends nativos ignoran mayúsculas y acentos ("camion" encuentra "camión"): FTS5 con
+``remove_diacritics 2`` y PostgreSQL con la configuración ``auction_search`` (``simple`` +
+``unaccent``, migración 0015).
+
+Se elige con ``settings.AUCTION_SEARCH_BACKEND`` (ruta con puntos); por defecto se usa el
+backend nativo de la base de datos configurada.
+"""
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Auction
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(term):
+    return TOKEN_RE.findall(term.lower())
+
+
+class IContainsSearchBackend:
+    def filter(self, queryset, term):
+        return queryset.filter(Q(title__icontains=term) | Q(description__icontains=term))
+
+    def index(self, auction):
+        pass
+
+    def remove(self, auction_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+
+class PostgresSearchBackend(IContainsSearchBackend):
+    """
+    La columna search_vector es GENERATED ALWAYS ... STORED (migraciones 0009 y 0015), así que
+    PostgreSQL la mantiene sola: index/remove/rebuild no tienen nada que hacer. La consulta usa
+    la misma configuración que la columna, para quitar los acentos también de los términos.
+    """
+    config = "auction_search"
+
+    def filter(self, queryset, term):
+        tokens = tokenize(term)
+        if not tokens:
+            return queryset.none()
+        # Búsqueda por prefijo de cada palabra, para que funcione mientras el usuario escribe
+        query = " & ".join(f"{token}:*" for token in tokens)
+        tsquery = f"to_tsquery('{self.config}', %s)"
+        return queryset.alias(
+            search_match=RawSQL(f"auctions_auction.search_vector @@ {tsquery}", [query],
+                                output_field=BooleanField()),
+        ).filter(search_match=True).annotate(
+            search_rank=RawSQL(f"ts_rank(auctions_auction.search_vector, {tsquery})", [query],
+                               output_field=FloatField()),
+        ).order_by('-search_rank', 'id')
+
+
+class SQLiteFTSSearchBackend(IContainsSearchBackend):
+    table = "auctions_auction_fts"
+
+    def filter(self, queryset, term):
+        tokens = tokenize(term)
+        if not tokens:
+            return queryset.none()
+        # Cada palabra entre comillas (sin operadores FTS5) y con búsqueda por prefijo
+        match = " ".join(f'"{token}"*' for token in tokens)
+        return queryset.filter(
+            pk__in=RawSQL(f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s", [match])
+        )
+
+    def index(self, auction):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [auction.pk])
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, title, description) VALUES (%s, %s, %s)",
+                [auction.pk, auction.title, auction.description],
+            )
+
+    def remove(self, auction_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [auction_id])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, title, description) "
+                f"SELECT id, title, description FROM {Auction._meta.db_table}"
+            )
+
+
+NATIVE_BACKENDS = {
+    "postgresql": PostgresSearchBackend,
+    "sqlite": SQLiteFTSSearchBackend,
+}
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    path = getattr(settings, "AUCTION_SEARCH_BACKEND", None)
+    if path:
+        return import_string(path)()
+    return NATIVE_BACKENDS.get(connection.vendor, IContainsSearchBackend)()
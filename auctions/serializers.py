@@ -1,10 +1,36 @@
 from rest_framework import serializers
 from django.utils import timezone
 from .models import Category, Auction, Bid, Rating, Comment
+from django.utils.functional import cached_property
 from drf_spectacular.utils import extend_schema_field
-from datetime import timedelta
-from django.db.models import Avg
-
+from datetime import datetime, timedelta
+from .sparse import SparseFieldsSerializerMixin
+from .readonly import ValuesSource
+from functools import partial
+
+
+class FastDateTimeField(serializers.DateTimeField):
+    """
+    DateTimeField que busca la zona horaria activa una vez por serializador y no una por valor
+    (es un Local de asgiref: la mitad del coste del campo en un listado), y que con el formato
+    de la API ("%Y-%m-%dT%H:%M:%SZ") usa isoformat() en lugar de strftime. Mismo resultado.
+    """
+    FAST_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+    @cached_property
+    def output_timezone(self):
+        # Los campos se copian en cada serializador: la caché dura una petición
+        return self.timezone if hasattr(self, 'timezone') else self.default_timezone()
+
+    def to_representation(self, value):
+        if (self.format != self.FAST_FORMAT or not isinstance(value, datetime) or value.year < 1000
+                or not timezone.is_aware(value) or self.output_timezone is None):
+            return super().to_representation(value)
+        try:
+            value = value.astimezone(self.output_timezone)
+        except OverflowError:
+            self.fail('overflow')
+        return value.isoformat(timespec='seconds')[:19] + 'Z'
 
 class CategoryListCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -16,9 +42,16 @@ class CategoryDetailSerializer(serializers.ModelSerializer):
         model = Category
         fields = '__all__'
 
-class AuctionListCreateSerializer(serializers.ModelSerializer):
-    creation_date = serializers.DateTimeField(format="%Y-%m-%dT%H:%M:%SZ",read_only=True)
-    closing_date = serializers.DateTimeField(format="%Y-%m-%dT%H:%M:%SZ")
+# Contrato público de una subasta. Las columnas internas (version / modified para los ETag,
+# rating_sum, highest_bid) no se exponen: lista explícita en lugar de '__all__'
+AUCTION_FIELDS = ['id', 'creation_date', 'closing_date', 'isOpen', 'average_rating', 'title', 'description',
+                  'price', 'stock', 'brand', 'thumbnail', 'rating_count', 'current_price', 'bid_count',
+                  'top_bidder_username', 'status', 'final_price', 'category', 'auctioneer', 'winning_bid']
+
+
+class AuctionListCreateSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
+    creation_date = FastDateTimeField(format="%Y-%m-%dT%H:%M:%SZ",read_only=True)
+    closing_date = FastDateTimeField(format="%Y-%m-%dT%H:%M:%SZ")
     isOpen = serializers.SerializerMethodField(read_only=True)
     average_rating = serializers.SerializerMethodField(read_only=True)
 
@@ -38,24 +71,34 @@ class AuctionListCreateSerializer(serializers.ModelSerializer):
 
     @extend_schema_field(serializers.BooleanField()) 
     def get_isOpen(self, obj):
-        return obj.closing_date > timezone.now()   
+        return obj.is_open
 
     @extend_schema_field(serializers.FloatField())
     def get_average_rating(self, obj):
-        avg = obj.ratings.aggregate(avg=Avg('value'))['avg'] or 0
-        return round(avg, 2)
+        return round(obj.average_rating, 2)
     
     class Meta:
         model = Auction
-        fields = '__all__' 
+        fields = AUCTION_FIELDS
+        read_only_fields = ('rating_count', 'current_price', 'status', 'winning_bid', 'final_price', 'bid_count',
+                            'top_bidder_username')
+        # Columnas que leen los SerializerMethodField (?fields= / ?omit=, ver auctions.sparse)
+        sparse_sources = {'isOpen': ('status', 'closing_date'), 'average_rating': ('average_rating',)}
+        # Los mismos campos calculados en la consulta de los listados (ver auctions.readonly)
+        values_sources = {'isOpen': ValuesSource(Auction.is_open_expression, bool),
+                          'average_rating': ValuesSource('average_rating', partial(round, ndigits=2))}
         
-class AuctionDetailSerializer(serializers.ModelSerializer):
-    creation_date = serializers.DateTimeField(format="%Y-%m-%dT%H:%M:%SZ",read_only=True)
-    closing_date = serializers.DateTimeField(format="%Y-%m-%dT%H:%M:%SZ")
+class AuctionDetailSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
+    creation_date = FastDateTimeField(format="%Y-%m-%dT%H:%M:%SZ",read_only=True)
+    closing_date = FastDateTimeField(format="%Y-%m-%dT%H:%M:%SZ")
     isOpen = serializers.SerializerMethodField(read_only=True)
     average_rating = serializers.SerializerMethodField(read_only=True)
 
     def validate_closing_date(self, value):
+        # Cerrada por el planificador: winning_bid / final_price ya están fijados y no admite pujas
+        if self.instance is not None and self.instance.status == Auction.Status.CLOSED:
+            raise serializers.ValidationError("La subasta ya está cerrada: no se puede cambiar la fecha de cierre.")
+
         if value <= timezone.now():
             raise serializers.ValidationError("Closing date must be greater than now.")
         
@@ -67,19 +110,22 @@ class AuctionDetailSerializer(serializers.ModelSerializer):
 
     @extend_schema_field(serializers.BooleanField()) 
     def get_isOpen(self, obj):
-        return obj.closing_date > timezone.now()
+        return obj.is_open
     
     @extend_schema_field(serializers.FloatField())
     def get_average_rating(self, obj):
-        avg = obj.ratings.aggregate(avg=Avg('value'))['avg'] or 0
-        return round(avg, 2)
+        return round(obj.average_rating, 2)
     
     class Meta:
         model = Auction
-        fields = '__all__'
-
-class BidListCreateSerializer(serializers.ModelSerializer):
-    creation_date = serializers.DateTimeField(format="%Y-%m-%dT%H:%M:%SZ", read_only=True)
+        fields = AUCTION_FIELDS
+        read_only_fields = ('rating_count', 'current_price', 'status', 'winning_bid', 'final_price', 'bid_count',
+                            'top_bidder_username')
+        # Columnas que leen los SerializerMethodField (?fields= / ?omit=, ver auctions.sparse)
+        sparse_sources = {'isOpen': ('status', 'closing_date'), 'average_rating': ('average_rating',)}
+
+class BidListCreateSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
+    creation_date = FastDateTimeField(format="%Y-%m-%dT%H:%M:%SZ", read_only=True)
     bidder_username = serializers.CharField(source="bidder.username", read_only=True)
 
     class Meta:
@@ -89,8 +135,22 @@ class BidListCreateSerializer(serializers.ModelSerializer):
 
 
 
+class BidAuctionSummarySerializer(serializers.ModelSerializer):
+    closing_date = FastDateTimeField(format="%Y-%m-%dT%H:%M:%SZ", read_only=True)
+
+    class Meta:
+        model = Auction
+        fields = ['id', 'title', 'thumbnail', 'closing_date', 'current_price']
+        read_only_fields = fields
+
+
+class UserBidSerializer(BidListCreateSerializer):
+    """Pujas del usuario con un resumen de su subasta (evita una petición por puja)."""
+    auction_summary = BidAuctionSummarySerializer(source='auction', read_only=True)
+
+
 class BidDetailSerializer(serializers.ModelSerializer):
-    creation_date = serializers.DateTimeField(format="%Y-%m-%dT%H:%M:%SZ", read_only=True)
+    creation_date = FastDateTimeField(format="%Y-%m-%dT%H:%M:%SZ", read_only=True)
 
     class Meta:
         model = Bid
@@ -102,7 +162,7 @@ class RatingSerializer(serializers.ModelSerializer):
         fields = ['id', 'auction', 'user', 'value']
         read_only_fields = ['user']
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     user_username = serializers.CharField(source='user.username', read_only=True)
     created       = serializers.DateTimeField(read_only=True)
     updated       = serializers.DateTimeField(read_only=True)
@@ -0,0 +1,142 @@
+"""
+Colocación de pujas.
+
+La validación (subasta abierta, precio mayor que la puja actual) y la escritura se hacen
+con un UPDATE condicional sobre Auction.current_price dentro de una transacción: la fila
+de la subasta queda bloqueada hasta el commit, así que dos pujas concurrentes nunca pueden
+aceptarse ambas con un precio que no respete el orden estricto.
+"""
+import enum
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Exists, F, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from users.models import CustomUser
+
+from . import events, response_cache
+from .models import Auction, Bid, version_bump
+
+
+class BidOutcome(enum.Enum):
+    ACCEPTED = "accepted"
+    OUTBID = "outbid"
+    CLOSED = "closed"
+
+
+@dataclass(frozen=True)
+class BidResult:
+    outcome: BidOutcome
+    bid: Bid | None = None
+    current_price: Decimal | None = None
+
+    @property
+    def accepted(self):
+        return self.outcome is BidOutcome.ACCEPTED
+
+
+def _open_auction(auction_id):
+    # status lo mantiene el planificador; closing_date cubre el rato hasta su siguiente pasada
+    return Auction.objects.filter(pk=auction_id, status=Auction.Status.OPEN, closing_date__gt=timezone.now())
+
+
+def _current_username(user):
+    """
+    Nombre del usuario leído en el propio UPDATE: ``request.user`` puede venir de la caché de
+    usuarios de otro worker (users.authentication) con el nombre de antes de un cambio.
+    """
+    return Subquery(CustomUser.objects.filter(pk=user.pk).values('username')[:1])
+
+
+def _rejection(auction_id, exclude_bid=None):
+    """Explica por qué falló el UPDATE condicional (solo se consulta en el camino de rechazo)."""
+    auction = Auction.objects.filter(pk=auction_id).values('status', 'closing_date', 'current_price').first()
+    if auction is None:
+        raise Auction.DoesNotExist
+    if auction['status'] != Auction.Status.OPEN or auction['closing_date'] <= timezone.now():
+        return BidResult(BidOutcome.CLOSED)
+    current_price = auction['current_price']
+    if exclude_bid is not None:
+        top = Bid.objects.filter(auction_id=auction_id).exclude(pk=exclude_bid.pk).order_by('-price').first()
+        current_price = top.price if top else None
+    return BidResult(BidOutcome.OUTBID, current_price=current_price)
+
+
+def place_bid(auction_id, bidder, price):
+    """Registra una puja nueva si la subasta sigue abierta y el precio supera la puja actual."""
+    with transaction.atomic():
+        updated = _open_auction(auction_id).filter(
+            Q(current_price__isnull=True) | Q(current_price__lt=price)
+        ).update(current_price=price, bid_count=F('bid_count') + 1, top_bidder_username=_current_username(bidder),
+                 **version_bump())
+        if not updated:
+            return _rejection(auction_id)
+
+        bid = Bid.objects.create(auction_id=auction_id, bidder=bidder, price=price)
+        Auction.objects.filter(pk=auction_id).update(highest_bid=bid)
+        events.publish_after_commit(auction_id, events.BID, bid=bid.pk, bidder=bidder.username,
+                                    price=price, current_price=price)
+    return BidResult(BidOutcome.ACCEPTED, bid=bid, current_price=price)
+
+
+def update_bid(bid, price):
+    """Cambia el precio de una puja existente; debe superar al resto de pujas de la subasta."""
+    with transaction.atomic():
+        # Si ya es la puja más alta basta con que supere a las demás; si no, a current_price.
+        # En ambos casos la condición se evalúa en el propio UPDATE sobre la fila de la subasta.
+        higher_bids = Bid.objects.filter(
+            auction_id=OuterRef('pk'), price__gte=price
+        ).exclude(pk=bid.pk)
+        updated = _open_auction(bid.auction_id).filter(
+            Q(highest_bid=bid.pk, current_price=bid.price) & ~Exists(higher_bids)
+            | Q(current_price__lt=price)
+        ).update(current_price=price, highest_bid=bid.pk, top_bidder_username=_current_username(bid.bidder),
+                 **version_bump())
+        if not updated:
+            return _rejection(bid.auction_id, exclude_bid=bid)
+
+        bid.price = price
+        bid.save(update_fields=['price'])
+        events.publish_after_commit(bid.auction_id, events.PRICE, bid=bid.pk, current_price=price)
+    return BidResult(BidOutcome.ACCEPTED, bid=bid, current_price=price)
+
+
+def delete_bid(bid):
+    """Elimina una puja de una subasta abierta; la señal post_delete recalcula la puja más alta."""
+    with transaction.atomic():
+        if not _open_auction(bid.auction_id).exists():
+            return BidResult(BidOutcome.CLOSED)
+        auction_id = bid.auction_id
+        bid.delete()
+        current_price = Auction.objects.filter(pk=auction_id).values_list('current_price', flat=True).first()
+        events.publish_after_commit(auction_id, events.PRICE, current_price=current_price)
+    return BidResult(BidOutcome.ACCEPTED, current_price=current_price)
+
+
+def close_due_auctions(batch_size=500, auction_ids=None):
+    """
+    Cierra un lote de subastas vencidas y devuelve las cerradas ([{pk, winning_bid, final_price}]).
+
+    Con PostgreSQL las filas se bloquean con SKIP LOCKED, así que varios planificadores a la vez
+    se reparten las subastas; en cualquier caso el UPDATE solo cierra las que siguen abiertas.
+    """
+    with transaction.atomic():
+        due = Auction.objects.due().order_by('closing_date')
+        if auction_ids is not None:
+            due = due.filter(pk__in=auction_ids)
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        batch = list(due.values_list('pk', flat=True)[:batch_size])
+        if not batch:
+            return []
+        Auction.objects.filter(pk__in=batch).close()
+        closed = list(Auction.objects.filter(pk__in=batch, status=Auction.Status.CLOSED)
+                      .values('pk', 'winning_bid', 'final_price'))
+        for auction in closed:
+            events.publish_after_commit(auction['pk'], events.CLOSED, winning_bid=auction['winning_bid'],
+                                        final_price=auction['final_price'])
+        # UPDATE masivo: no hay señales que invaliden los listados cacheados
+        response_cache.invalidate(response_cache.AUCTIONS)
+    return closed
@@ -0,0 +1,100 @@
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import response_cache
+from .models import Auction, Bid, Category, Rating
+from .search import get_search_backend
+
+
+# --- Valoraciones: mantienen los agregados desnormalizados de Auction ---
+@receiver(post_save, sender=Rating)
+def rating_saved(sender, instance, created, **kwargs):
+    auction_ids = {instance.auction_id}
+    if created:
+        Auction.objects.filter(pk=instance.auction_id).apply_rating_delta(instance.value, 1)
+    else:
+        old_value = getattr(instance, '_stored_value', None)
+        old_auction_id = getattr(instance, '_stored_auction_id', None)
+        if old_value is None:
+            # Instancia no cargada de la base de datos: se recalcula esa subasta
+            Auction.objects.filter(pk=instance.auction_id).rebuild_rating_stats()
+        elif old_auction_id != instance.auction_id:
+            auction_ids.add(old_auction_id)
+            Auction.objects.filter(pk=old_auction_id).apply_rating_delta(-old_value, -1)
+            Auction.objects.filter(pk=instance.auction_id).apply_rating_delta(instance.value, 1)
+        elif old_value != instance.value:
+            Auction.objects.filter(pk=instance.auction_id).apply_rating_delta(instance.value - old_value, 0)
+    instance._stored_value = instance.value
+    instance._stored_auction_id = instance.auction_id
+    # Listados cacheados: las páginas con esas subastas y las ordenadas por valoración
+    response_cache.invalidate_rows(response_cache.AUCTION_ROWS, auction_ids, response_cache.AUCTION_RATINGS)
+
+
+@receiver(post_delete, sender=Rating)
+def rating_deleted(sender, instance, **kwargs):
+    # También se ejecuta en los borrados en cascada (usuario o subasta eliminados)
+    value = getattr(instance, '_stored_value', None) or instance.value
+    auction_id = getattr(instance, '_stored_auction_id', None) or instance.auction_id
+    Auction.objects.filter(pk=auction_id).apply_rating_delta(-value, -1)
+    response_cache.invalidate_rows(response_cache.AUCTION_ROWS, [auction_id], response_cache.AUCTION_RATINGS)
+
+
+# --- Pujas: al borrar una puja (también en cascada) se recalcula la más alta ---
+@receiver(post_delete, sender=Bid)
+def bid_deleted(sender, instance, **kwargs):
+    Auction.objects.filter(pk=instance.auction_id).rebuild_bid_summary()
+
+
+# --- Usuarios: el listado de pujas y top_bidder_username muestran el nombre del pujador ---
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and 'username' not in update_fields):
+        return
+    renamed = list(Auction.objects.filter(highest_bid__bidder=instance).exclude(
+        top_bidder_username=instance.username,
+    ).values_list('pk', flat=True))
+    if renamed:
+        Auction.objects.filter(pk__in=renamed).update(top_bidder_username=instance.username)
+        # Los listados públicos cacheados muestran top_bidder_username
+        response_cache.invalidate_rows(response_cache.AUCTION_ROWS, renamed)
+    Auction.objects.filter(pk__in=Bid.objects.filter(bidder=instance).values('auction')).touch()
+
+
+# --- Subastas: índice de búsqueda de texto (FTS5 en SQLite) ---
+@receiver(post_save, sender=Auction)
+def auction_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or {'title', 'description'} & set(update_fields):
+        get_search_backend().index(instance)
+
+
+@receiver(post_delete, sender=Auction)
+def auction_deleted(sender, instance, **kwargs):
+    get_search_backend().remove(instance.pk)
+
+
+
+# --- Caché de respuestas: cualquier escritura que cambie un listado público lo invalida ---
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, **kwargs):
+    # El listado de subastas filtra por nombre de categoría
+    response_cache.invalidate(response_cache.CATEGORIES, response_cache.AUCTIONS)
+
+
+@receiver(post_save, sender=Auction)
+@receiver(post_delete, sender=Auction)
+def auction_listing_changed(sender, **kwargs):
+    # Altas, bajas y ediciones (título, categoría, precio, cierre...) cambian qué subastas
+    # salen en cada página del listado
+    response_cache.invalidate(response_cache.AUCTIONS)
+
+
+@receiver(post_save, sender=Bid)
+@receiver(post_delete, sender=Bid)
+def bid_listing_changed(sender, instance, **kwargs):
+    # Solo cambian las páginas con esa subasta y las ordenadas por número de pujas
+    response_cache.invalidate_rows(response_cache.AUCTION_ROWS, [instance.auction_id], response_cache.AUCTION_BIDS)
+
+
+# Las valoraciones invalidan sus subastas en rating_saved / rating_deleted (conocen la anterior)
@@ -0,0 +1,150 @@
+"""
+Campos a la carta (sparse fieldsets) en las lecturas de subastas, pujas y comentarios.
+
+``?fields=id,title,price`` devuelve solo esos campos y ``?omit=description,brand`` todos menos
+esos (``?omit=`` vacío, la representación completa). Sin ninguno de los dos se usan los
+``sparse_default_fields`` de la vista: la tarjeta en el listado público de subastas, todos los
+campos en el resto. Solo en GET / HEAD: las escrituras validan y devuelven el objeto entero.
+
+Lo que no se pide tampoco se lee: la vista difiere (``.defer()``) las columnas de los campos
+que quedan fuera. Las columnas de cada campo salen de su ``source`` (``bidder.username`` →
+``bidder__username``; un serializador anidado aporta las suyas) o, para los
+SerializerMethodField, de ``Meta.sparse_sources`` del serializador; un campo del que no se
+sabe qué lee no difiere nada. Nunca se difieren la clave primaria, las columnas de
+``sparse_required_columns`` (validadores ETag), las del orden de la paginación por cursor ni
+las claves de los ``select_related``.
+"""
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.utils.functional import cached_property
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+
+class SparseFieldsSerializerMixin:
+    """Serializador que se queda con los campos de ``context['sparse_fields']`` (None = todos)."""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selected = self.context.get('sparse_fields')
+        if selected is None:
+            return fields
+        return {name: field for name, field in fields.items() if name in selected}
+
+
+def is_model_path(model, path):
+    """``path`` (con ``__``) lleva a una columna de ``model``: algo que defer() puede diferir."""
+    names = path.split('__')
+    for index, name in enumerate(names):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return False
+        if index < len(names) - 1:
+            if not field.is_relation or field.many_to_many or field.one_to_many:
+                return False
+            model = field.related_model
+    return field.concrete and not field.many_to_many
+
+
+def field_columns(serializer, name, field, prefix=''):
+    """Rutas de ``defer()`` que lee un campo del serializador, o None si no se sabe."""
+    sources = getattr(getattr(serializer, 'Meta', None), 'sparse_sources', {})
+    if name in sources:
+        return {prefix + column for column in sources[name]}
+    if field.source == '*':
+        return None
+    path = prefix + '__'.join(field.source_attrs)
+    if not is_model_path(serializer.Meta.model, path[len(prefix):]):
+        return None
+    columns = {path}
+    if len(field.source_attrs) > 1:
+        # bidder.username necesita también la clave bidder
+        columns.add(prefix + field.source_attrs[0])
+    if isinstance(field, serializers.Serializer):
+        for nested_name, nested_field in field.fields.items():
+            nested = field_columns(field, nested_name, nested_field, path + '__')
+            if nested is None:
+                return None
+            columns |= nested
+    return columns
+
+
+@lru_cache(maxsize=None)
+def available_fields(serializer_class):
+    return tuple(serializer_class().fields)
+
+
+@lru_cache(maxsize=256)
+def deferred_columns(serializer_class, selected):
+    """Columnas de los campos que no están en ``selected`` y no lee ninguno de los que sí."""
+    serializer = serializer_class()
+    needed, unneeded = set(), set()
+    for name, field in serializer.fields.items():
+        columns = field_columns(serializer, name, field)
+        if name in selected:
+            if columns is None:
+                return frozenset()
+            needed |= columns
+        elif columns is not None:
+            unneeded |= columns
+    return frozenset(unneeded - needed)
+
+
+def parse_names(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class SparseFieldsetMixin:
+    """
+    Vista con ``?fields=`` / ``?omit=``. ``sparse_default_fields``: campos sin parámetros (None =
+    todos); ``sparse_required_columns``: columnas que la vista lee aunque no se pidan.
+    """
+    sparse_default_fields = None
+    sparse_required_columns = ()
+
+    @cached_property
+    def sparse_fields(self):
+        if self.request.method not in ('GET', 'HEAD'):
+            return None
+        params = self.request.query_params
+        available = available_fields(self.get_serializer_class())
+        if FIELDS_PARAM in params:
+            param, selected = FIELDS_PARAM, parse_names(params[FIELDS_PARAM])
+            unknown = selected - set(available)
+        elif OMIT_PARAM in params:
+            param, omitted = OMIT_PARAM, parse_names(params[OMIT_PARAM])
+            unknown = omitted - set(available)
+            selected = set(available) - omitted
+        else:
+            return None if self.sparse_default_fields is None else frozenset(self.sparse_default_fields)
+        if unknown:
+            raise ValidationError({param: f"Campos desconocidos: {', '.join(sorted(unknown))}. "
+                                          f"Disponibles: {', '.join(available)}."})
+        return frozenset(selected)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['sparse_fields'] = self.sparse_fields
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.sparse_fields is None:
+            return queryset
+        deferred = deferred_columns(self.get_serializer_class(), self.sparse_fields)
+        keep = {queryset.model._meta.pk.name, *self.sparse_required_columns}
+        keep.update(name.lstrip('-') for name in getattr(self, 'keyset_ordering', ()))
+        related = queryset.query.select_related
+        related = set(related) if isinstance(related, dict) else set()
+        keep |= related
+        # Las columnas de otra tabla solo se leen (y difieren) si la relación va en select_related
+        deferred = sorted(
+            column for column in deferred
+            if column not in keep and ('__' not in column or column.split('__')[0] in related)
+        )
+        return queryset.defer(*deferred) if deferred else queryset
@@ -1,3 +1,1810 @@
-from django.test import TestCase
+import asyncio
+import csv
+import gzip
+import importlib.util
+import io
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import warnings
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import dj_database_url
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import clear_url_caches, resolve, reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from django.utils.translation import gettext_lazy
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from myFirstApiRest.database import database_config, warm_up_connections
+from myFirstApiRest.instrumentation import REQUESTS, RequestProfilingMiddleware
+from myFirstApiRest.renderers import OrjsonParser, OrjsonRenderer
+from users.models import CustomUser
+from . import events, response_cache, services
+from .asgi import StreamingASGIHandler
+from .async_views import AsyncReadView
+from .benchmarking import ASGIStream, build_request, compare_to_baseline
+from .models import Category, Auction, Bid, Rating, Comment
+from .readonly import ValuesPlan, values_plan
+from .scheduler import AuctionClosingScheduler
+from .search import PostgresSearchBackend
+from .serializers import AuctionDetailSerializer, AuctionListCreateSerializer, FastDateTimeField
+from .views import AuctionListCreate
+
+
+def create_user(username, **extra):
+    return CustomUser.objects.create_user(
+        username=username, password="Secreta.123", email=f"{username}@example.com",
+        birth_date=date(1990, 1, 1), **extra
+    )
+
+def create_auction(auctioneer, category, **extra):
+    data = {
+        "title": "Subasta de prueba",
+        "description": "Descripción de prueba",
+        "price": Decimal("10.00"),
+        "stock": 1,
+        "brand": "MarcaX",
+        "thumbnail": "http://example.com/img.png",
+        "closing_date": timezone.now() + timedelta(days=20),
+    }
+    data.update(extra)
+    return Auction.objects.create(auctioneer=auctioneer, category=category, **data)
+
+
+def reload_urlconf():
+    importlib.reload(importlib.import_module("auctions.urls"))
+    importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+    clear_url_caches()
+
+
+class AsyncReadURLsMixin:
+    """Rutas de lectura con las vistas asíncronas, como las monta asgi.py (ASYNC_READ_VIEWS)."""
+
+    @classmethod
+    def setUpClass(cls):
+        # Las limpiezas van en orden inverso: se recargan las rutas ya sin ASYNC_READ_VIEWS
+        cls.addClassCleanup(reload_urlconf)
+        cls.enterClassContext(override_settings(ASYNC_READ_VIEWS=True))
+        reload_urlconf()
+        super().setUpClass()
+
+
+class AuctionListQueriesTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_user("owner")
+        cls.raters = [create_user(f"rater{i}") for i in range(3)]
+        cls.category = Category.objects.create(name="Libros")
+        for i in range(12):
+            auction = create_auction(cls.owner, cls.category, title=f"Subasta {i}")
+            for rater, value in zip(cls.raters, (5, 4, 2)):
+                Rating.objects.create(auction=auction, user=rater, value=value)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_list_reports_average_and_count(self):
+        response = self.client.get(reverse("auctions:auction-list-create"))
+        self.assertEqual(response.status_code, 200)
+        first = response.data["results"][0]
+        self.assertEqual(first["average_rating"], 3.67)
+        self.assertEqual(first["rating_count"], 3)
+
+    def test_list_query_count_does_not_depend_on_page_size(self):
+        url = reverse("auctions:auction-list-create")
+        for page_size in (2, 5, 12):
+            with mock.patch.object(PageNumberPagination, "page_size", page_size):
+                # COUNT(*) de la paginación + la página anotada
+                with self.assertNumQueries(2):
+                    response = self.client.get(url)
+            self.assertEqual(len(response.data["results"]), page_size)
+
+    def test_detail_single_query(self):
+        auction = Auction.objects.first()
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("auctions:auction-detail", args=[auction.pk]))
+        self.assertEqual(response.data["average_rating"], 3.67)
+
+    def test_user_auctions_paginated_on_request(self):
+        self.client.force_authenticate(self.owner)
+        # Sin parámetros, la lista entera sin envolver (el contrato de siempre), en una consulta
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("auctions:action-from-users"))
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 12)
+        # COUNT(*) de la paginación + la página
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("auctions:action-from-users"), {"page": 1})
+        self.assertEqual(response.data["count"], 12)
+        self.assertEqual(len(response.data["results"]), 5)
+
+
+
+class ListQueryCountTests(APITestCase):
+    """Ninguno de los listados hace una consulta por fila (usuarios, subastas)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_user("owner")
+        cls.users = [create_user(f"user{i}") for i in range(4)]
+        cls.category = Category.objects.create(name="Libros")
+        cls.auction = create_auction(cls.owner, cls.category)
+        cls.others = [create_auction(cls.owner, cls.category, title=f"Otra {i}") for i in range(3)]
+        for i, user in enumerate(cls.users):
+            services.place_bid(cls.auction.pk, user, Decimal(20 + i))
+            Comment.objects.create(auction=cls.auction, user=user, title=f"Comentario {i}", body="...")
+        for i, auction in enumerate(cls.others):
+            services.place_bid(auction.pk, cls.users[0], Decimal(30 + i))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_bid_list(self):
+        # Subasta (validadores ETag) + COUNT(*) + página con los pujadores
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("auctions:bid-list-create", args=[self.auction.pk]))
+        self.assertEqual([bid["bidder_username"] for bid in response.data["results"]],
+                         ["user3", "user2", "user1", "user0"])
+
+    def test_comment_list(self):
+        # Subasta + COUNT(*) + página con los autores
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("auctions:comment-list-create", args=[self.auction.pk]))
+        self.assertEqual(len({comment["user_username"] for comment in response.data["results"]}), 4)
+
+    def test_user_bids_embed_auction_summary(self):
+        self.client.force_authenticate(self.users[0])
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("auctions:user-bids"))
+        self.assertEqual(len(response.data), 4)
+        first = response.data[0]
+        self.assertEqual(first["bidder_username"], "user0")
+        self.assertEqual(first["auction"], self.others[2].pk)
+        self.assertEqual(first["auction_summary"]["title"], "Otra 2")
+        self.assertEqual(first["auction_summary"]["current_price"], "32.00")
+        self.assertEqual(set(first["auction_summary"]),
+                         {"id", "title", "thumbnail", "closing_date", "current_price"})
+
+
+class AuctionRatingStatsTests(APITestCase):
+    def setUp(self):
+        self.owner = create_user("owner")
+        self.rater = create_user("rater")
+        self.other = create_user("other")
+        self.category = Category.objects.create(name="Libros")
+        self.auction = create_auction(self.owner, self.category)
+
+    def assertStats(self, rating_sum, rating_count, average):
+        self.auction.refresh_from_db()
+        self.assertEqual(self.auction.rating_sum, rating_sum)
+        self.assertEqual(self.auction.rating_count, rating_count)
+        self.assertAlmostEqual(self.auction.average_rating, average)
+
+    def test_create_update_delete_through_api(self):
+        self.client.force_authenticate(self.rater)
+        response = self.client.post(reverse("auctions:rating-list-create"),
+                                    {"auction": self.auction.pk, "value": 4})
+        self.assertEqual(response.status_code, 201)
+        self.assertStats(4, 1, 4.0)
+
+        Rating.objects.create(auction=self.auction, user=self.other, value=1)
+        self.assertStats(5, 2, 2.5)
+
+        url = reverse("auctions:rating-detail", args=[response.data["id"]])
+        self.client.patch(url, {"value": 2})
+        self.assertStats(3, 2, 1.5)
+
+        self.client.delete(url)
+        self.assertStats(1, 1, 1.0)
+
+    def test_cascade_delete_of_user(self):
+        Rating.objects.create(auction=self.auction, user=self.rater, value=5)
+        Rating.objects.create(auction=self.auction, user=self.other, value=3)
+        self.other.delete()
+        self.assertStats(5, 1, 5.0)
+        self.rater.delete()
+        self.assertStats(0, 0, 0.0)
+
+    def test_rebuild_command_repairs_drift(self):
+        Rating.objects.create(auction=self.auction, user=self.rater, value=5)
+        Rating.objects.create(auction=self.auction, user=self.other, value=2)
+        Auction.objects.filter(pk=self.auction.pk).update(rating_sum=99, rating_count=1, average_rating=99)
+        out = StringIO()
+        call_command("rebuild_rating_stats", stdout=out)
+        self.assertIn("1 subasta", out.getvalue())
+        self.assertStats(7, 2, 3.5)
+
+    def test_rebuild_repairs_average_alone(self):
+        Rating.objects.create(auction=self.auction, user=self.rater, value=5)
+        Rating.objects.create(auction=self.auction, user=self.other, value=2)
+        # Suma y número bien, media mal: también es una desviación
+        Auction.objects.filter(pk=self.auction.pk).update(average_rating=1.0)
+        self.assertEqual(Auction.objects.rebuild_rating_stats(), 1)
+        self.assertStats(7, 2, 3.5)
+        self.assertEqual(Auction.objects.rebuild_rating_stats(), 0)
+
+        # Una media no exacta calculada por apply_rating_delta no se toma por desviación
+        Rating.objects.create(auction=self.auction, user=create_user("third"), value=3)
+        self.assertStats(10, 3, 10 / 3)
+        self.assertEqual(Auction.objects.rebuild_rating_stats(), 0)
+
+
+class BidPlacementTests(APITestCase):
+    def setUp(self):
+        self.owner = create_user("owner")
+        self.bidder = create_user("bidder")
+        self.rival = create_user("rival")
+        self.category = Category.objects.create(name="Libros")
+        self.auction = create_auction(self.owner, self.category)
+        self.url = reverse("auctions:bid-list-create", args=[self.auction.pk])
+
+    def test_accepted_bid_updates_current_price(self):
+        self.client.force_authenticate(self.bidder)
+        response = self.client.post(self.url, {"price": "15.00"})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["bidder_username"], "bidder")
+        self.auction.refresh_from_db()
+        self.assertEqual(self.auction.current_price, Decimal("15.00"))
+        self.assertEqual(self.auction.highest_bid_id, response.data["id"])
+
+    def test_outbid_and_closed_are_rejected(self):
+        services.place_bid(self.auction.pk, self.rival, Decimal("20.00"))
+        self.client.force_authenticate(self.bidder)
+        response = self.client.post(self.url, {"price": "20.00"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("20.00", str(response.data))
+
+        Auction.objects.filter(pk=self.auction.pk).update(closing_date=timezone.now() - timedelta(minutes=1))
+        result = services.place_bid(self.auction.pk, self.bidder, Decimal("50.00"))
+        self.assertIs(result.outcome, services.BidOutcome.CLOSED)
+
+    def test_top_bidder_name_is_read_in_the_update(self):
+        # request.user de la caché de otro worker, con el nombre anterior al cambio
+        stale = CustomUser.objects.get(pk=self.bidder.pk)
+        CustomUser.objects.filter(pk=self.bidder.pk).update(username="bidder2")
+        bid = services.place_bid(self.auction.pk, stale, Decimal("15.00")).bid
+        self.auction.refresh_from_db()
+        self.assertEqual(self.auction.top_bidder_username, "bidder2")
+
+        CustomUser.objects.filter(pk=self.bidder.pk).update(username="bidder3")
+        services.update_bid(bid, Decimal("16.00"))
+        self.auction.refresh_from_db()
+        self.assertEqual(self.auction.top_bidder_username, "bidder3")
+        self.assertEqual(Auction.objects.bid_summary_drift().count(), 0)
+
+    def test_unknown_auction_returns_404(self):
+        self.client.force_authenticate(self.bidder)
+        response = self.client.post(reverse("auctions:bid-list-create", args=[999]), {"price": "5.00"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_update_uses_same_rules(self):
+        low = services.place_bid(self.auction.pk, self.bidder, Decimal("11.00")).bid
+        services.place_bid(self.auction.pk, self.rival, Decimal("12.00"))
+        self.client.force_authenticate(self.bidder)
+        url = reverse("auctions:bid-detail", args=[self.auction.pk, low.pk])
+
+        response = self.client.patch(url, {"price": "12.00"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.patch(url, {"price": "13.00"})
+        self.assertEqual(response.status_code, 200)
+        self.auction.refresh_from_db()
+        self.assertEqual(self.auction.highest_bid_id, low.pk)
+
+        # La puja más alta puede bajar mientras siga por encima de las demás
+        response = self.client.patch(url, {"price": "12.50"})
+        self.assertEqual(response.status_code, 200)
+        self.auction.refresh_from_db()
+        self.assertEqual(self.auction.current_price, Decimal("12.50"))
+
+    def test_delete_recomputes_highest_bid(self):
+        second = services.place_bid(self.auction.pk, self.rival, Decimal("11.00")).bid
+        top = services.place_bid(self.auction.pk, self.bidder, Decimal("14.00")).bid
+        self.client.force_authenticate(self.bidder)
+        response = self.client.delete(reverse("auctions:bid-detail", args=[self.auction.pk, top.pk]))
+        self.assertEqual(response.status_code, 204)
+        self.auction.refresh_from_db()
+        self.assertEqual(self.auction.current_price, Decimal("11.00"))
+        self.assertEqual(self.auction.highest_bid_id, second.pk)
+
+
+class BidSummaryTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = create_user("owner")
+        self.bidder = create_user("bidder")
+        self.rival = create_user("rival")
+        self.auction = create_auction(self.owner, Category.objects.create(name="Libros"))
+        self.detail_url = reverse("auctions:auction-detail", args=[self.auction.pk])
+
+    def summary(self):
+        data = self.client.get(self.detail_url).data
+        return data["current_price"], data["bid_count"], data["top_bidder_username"]
+
+    def test_summary_follows_bids(self):
+        self.assertEqual(self.summary(), (None, 0, None))
+        low = services.place_bid(self.auction.pk, self.bidder, Decimal("12.00")).bid
+        top = services.place_bid(self.auction.pk, self.rival, Decimal("15.00")).bid
+        self.assertEqual(self.summary(), ("15.00", 2, "rival"))
+
+        services.update_bid(low, Decimal("20.00"))
+        self.assertEqual(self.summary(), ("20.00", 2, "bidder"))
+        services.delete_bid(low)
+        self.assertEqual(self.summary(), ("15.00", 1, "rival"))
+
+        self.rival.username = "renombrado"
+        self.rival.save()
+        self.assertEqual(self.summary(), ("15.00", 1, "renombrado"))
+        services.delete_bid(top)
+        self.assertEqual(self.summary(), (None, 0, None))
+
+    def test_list_exposes_summary_without_extra_queries(self):
+        services.place_bid(self.auction.pk, self.bidder, Decimal("12.00"))
+        url = reverse("auctions:auction-list-create")
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        result = response.data["results"][0]
+        self.assertEqual((result["current_price"], result["bid_count"], result["top_bidder_username"]),
+                         ("12.00", 1, "bidder"))
+        self.assertEqual(len(ctx.captured_queries), 2)
+
+    def test_reconciliation_command(self):
+        services.place_bid(self.auction.pk, self.bidder, Decimal("12.00"))
+        services.place_bid(self.auction.pk, self.rival, Decimal("15.00"))
+        call_command("rebuild_bid_summary", "--check", stdout=StringIO())
+
+        Auction.objects.filter(pk=self.auction.pk).update(bid_count=7, top_bidder_username=None)
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command("rebuild_bid_summary", "--check", stdout=out)
+        self.assertIn("bid_count: 7 → 2", out.getvalue())
+        self.assertIn("top_bidder_username: None → rival", out.getvalue())
+
+        out = StringIO()
+        call_command("rebuild_bid_summary", stdout=out)
+        self.assertIn("1 subasta(s) corregida(s)", out.getvalue())
+        self.assertEqual(self.summary(), ("15.00", 2, "rival"))
+        call_command("rebuild_bid_summary", "--check", stdout=StringIO())
+
+
+class BidContentionTests(TransactionTestCase):
+    def test_concurrent_bids_keep_strict_price_order(self):
+        owner = create_user("owner")
+        bidders = [create_user(f"bidder{i}") for i in range(8)]
+        auction = create_auction(owner, Category.objects.create(name="Libros"))
+        prices = [Decimal(p) for p in range(11, 91)]
+        random.Random(1).shuffle(prices)
+        barrier = threading.Barrier(len(bidders))
+
+        def worker(bidder, offset):
+            barrier.wait()
+            try:
+                for price in prices[offset::len(bidders)]:
+                    while True:
+                        try:
+                            services.place_bid(auction.pk, bidder, price)
+                            break
+                        except OperationalError:
+                            # SQLite en memoria no espera al bloqueo: se reintenta
+                            time.sleep(0.001)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(b, i)) for i, b in enumerate(bidders)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        accepted = list(Bid.objects.filter(auction=auction).order_by("id").values_list("price", flat=True))
+        self.assertTrue(accepted)
+        self.assertTrue(all(a < b for a, b in zip(accepted, accepted[1:])), accepted)
+        auction.refresh_from_db()
+        self.assertEqual(auction.current_price, max(accepted))
+        self.assertEqual(auction.highest_bid.price, max(accepted))
+
+
+class AuctionSearchTests(APITestCase):
+    def setUp(self):
+        self.owner = create_user("owner")
+        self.category = Category.objects.create(name="Música")
+        self.guitar = create_auction(self.owner, self.category, title="Guitarra eléctrica",
+                                     description="Poco uso, con funda")
+        self.camera = create_auction(self.owner, self.category, title="Cámara réflex",
+                                     description="Incluye objetivo y guitarra de regalo")
+        self.lamp = create_auction(self.owner, self.category, title="Lámpara", description="De pie")
+        self.url = reverse("auctions:auction-list-create")
+
+    def search(self, term):
+        response = self.client.get(self.url, {"search": term})
+        self.assertEqual(response.status_code, 200)
+        return sorted(item["id"] for item in response.data["results"])
+
+    def test_matches_title_and_description_prefixes(self):
+        self.assertEqual(self.search("guitar"), [self.guitar.pk, self.camera.pk])
+        self.assertEqual(self.search("camara reflex"), [self.camera.pk])
+        self.assertEqual(self.search("funda"), [self.guitar.pk])
+
+    def test_accents_are_ignored(self):
+        # Con el backend nativo de la base de datos de los tests (FTS5 o PostgreSQL)
+        self.assertEqual(self.search("electrica"), [self.guitar.pk])
+        self.assertEqual(self.search("CAMARA"), [self.camera.pk])
+        # Los acentos de la búsqueda también se ignoran, aunque sobren
+        self.assertEqual(self.search("lámpára"), [self.lamp.pk])
+        self.assertEqual(self.search("gúitarra"), [self.guitar.pk, self.camera.pk])
+
+    def test_postgres_config_ignores_accents(self):
+        # Misma regla en PostgreSQL: la columna y la consulta usan simple + unaccent
+        migration = importlib.import_module("auctions.migrations.0015_auction_search_unaccent")
+        self.assertEqual(PostgresSearchBackend.config, migration.SEARCH_CONFIG)
+        forward = "\n".join(migration.POSTGRES_FORWARD)
+        self.assertIn("CREATE EXTENSION IF NOT EXISTS unaccent", forward)
+        self.assertIn(f"{migration.SEARCH_CONFIG} ALTER MAPPING FOR hword, hword_part, word WITH unaccent, simple",
+                      forward)
+        self.assertIn(f"to_tsvector('{migration.SEARCH_CONFIG}', coalesce(title, ''))", forward)
+
+    def test_minimum_length_is_kept(self):
+        response = self.client.get(self.url, {"search": "gu"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("search", response.data)
+
+    def test_index_follows_updates_and_deletes(self):
+        self.guitar.title = "Bajo eléctrico"
+        self.guitar.save()
+        self.assertEqual(self.search("bajo"), [self.guitar.pk])
+        self.camera.delete()
+        self.assertEqual(self.search("guitarra"), [])
+
+
+class AuctionListFilterTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = create_user("owner")
+        self.bidder = create_user("bidder")
+        self.category = Category.objects.create(name="Libros")
+        now = timezone.now()
+        self.soon = create_auction(self.owner, self.category, price=Decimal("30.00"),
+                                   closing_date=now + timedelta(hours=2))
+        self.later = create_auction(self.owner, self.category, price=Decimal("10.00"))
+        self.ended = create_auction(self.owner, self.category, price=Decimal("20.00"))
+        Auction.objects.filter(pk=self.ended.pk).update(closing_date=now - timedelta(hours=1))
+        self.closed = create_auction(self.owner, self.category, price=Decimal("40.00"))
+        Auction.objects.filter(pk=self.closed.pk).update(status=Auction.Status.CLOSED)
+        for price in ("11.00", "12.00"):
+            services.place_bid(self.later.pk, self.bidder, Decimal(price))
+        services.place_bid(self.soon.pk, self.bidder, Decimal("31.00"))
+        self.url = reverse("auctions:auction-list-create")
+
+    def ids(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [auction["id"] for auction in response.data["results"]]
+
+    def test_status_filter_matches_is_open(self):
+        self.assertEqual(self.ids(status="open"), [self.soon.pk, self.later.pk])
+        self.assertEqual(self.ids(status="closed"), [self.ended.pk, self.closed.pk])
+        response = self.client.get(self.url, {"status": "abierta"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_ending_within(self):
+        self.assertEqual(self.ids(ending_within="3h"), [self.soon.pk])
+        self.assertEqual(self.ids(ending_within="1 00:00:00"), [self.soon.pk])
+        self.assertEqual(self.ids(ending_within="P30D"), [self.soon.pk, self.later.pk])
+        self.assertEqual(self.ids(ending_within="30m"), [])
+        # Desbordamientos: 999999999d cabe en un timedelta, pero ahora + eso pasa del año 9999
+        for value in ("0h", "pronto", "-1d", "999999999d", "9999999999d", "P999999999D"):
+            self.assertEqual(self.client.get(self.url, {"ending_within": value}).status_code, 400)
+
+    def test_ordering(self):
+        self.assertEqual(self.ids(ordering="price"), [self.later.pk, self.ended.pk, self.soon.pk, self.closed.pk])
+        self.assertEqual(self.ids(ordering="-bid_count", status="open"), [self.later.pk, self.soon.pk])
+        self.assertEqual(self.ids(ordering="closing_date", status="open"), [self.soon.pk, self.later.pk])
+        self.assertEqual(self.client.get(self.url, {"ordering": "title"}).status_code, 400)
+
+    def test_ordering_with_cursor_pagination(self):
+        Rating.objects.create(auction=self.ended, user=self.bidder, value=5)
+        Rating.objects.create(auction=self.soon, user=self.bidder, value=3)
+        seen, pages = [], 0
+        params = {"ordering": "-average_rating", "pagination": "cursor"}
+        url = self.url
+        # Una subasta por página: cada una sale del cursor de la anterior (media float + id)
+        with mock.patch.object(PageNumberPagination, "page_size", 1):
+            while url:
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, 200)
+                seen.extend(auction["id"] for auction in response.data["results"])
+                url, params = response.data["next"], None
+                pages += 1
+        self.assertEqual(seen, [self.ended.pk, self.soon.pk, self.closed.pk, self.later.pk])
+        self.assertEqual(pages, 4)
+
+    def test_bid_count_is_maintained(self):
+        self.later.refresh_from_db()
+        self.assertEqual(self.later.bid_count, 2)
+        Bid.objects.filter(auction=self.later).first().delete()
+        self.later.refresh_from_db()
+        self.assertEqual(self.later.bid_count, 1)
+
+
+class KeysetPaginationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_user("owner")
+        cls.bidder = create_user("bidder")
+        cls.category = Category.objects.create(name="Libros")
+        cls.auction = create_auction(cls.owner, cls.category)
+        # Precios repetidos para comprobar el desempate por id
+        Bid.objects.bulk_create([
+            Bid(auction=cls.auction, bidder=cls.bidder, price=Decimal(100 + i // 3)) for i in range(33)
+        ])
+        cls.url = reverse("auctions:bid-list-create", args=[cls.auction.pk])
+
+    def walk(self, url, params):
+        pages, queries = [], []
+        while url:
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data)
+            queries.append(ctx.captured_queries)
+            url, params = response.data["next"], None
+        return pages, queries
+
+    def test_cursor_mode_walks_every_row_once_in_order(self):
+        pages, _ = self.walk(self.url, {"pagination": "cursor"})
+        ids = [row["id"] for page in pages for row in page["results"]]
+        expected = list(Bid.objects.filter(auction=self.auction).order_by("-price", "id").values_list("id", flat=True))
+        self.assertEqual(ids, expected)
+        self.assertNotIn("count", pages[0])
+
+        # El enlace "previous" devuelve exactamente la página anterior
+        response = self.client.get(pages[2]["previous"])
+        self.assertEqual(response.data["results"], pages[1]["results"])
+
+    def test_cursor_mode_has_constant_query_cost(self):
+        _, queries = self.walk(self.url, {"pagination": "cursor"})
+        self.assertEqual(len({len(q) for q in queries[:-1]}), 1)
+        for captured in queries:
+            sql = " ".join(q["sql"] for q in captured).upper()
+            self.assertNotIn("OFFSET", sql)
+            self.assertNotIn("COUNT(", sql)
+
+    def test_page_mode_can_skip_count(self):
+        response = self.client.get(self.url, {"page": 2, "count": "false"})
+        self.assertNotIn("count", response.data)
+        self.assertEqual(len(response.data["results"]), 5)
+        self.assertIn("page=3", response.data["next"])
+
+        default = self.client.get(self.url, {"page": 2})
+        self.assertEqual(default.data["count"], 33)
+        self.assertEqual(default.data["results"], response.data["results"])
+
+    def test_invalid_cursor_is_404(self):
+        response = self.client.get(self.url, {"pagination": "cursor", "cursor": "no-es-un-cursor"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_comments_and_auctions_support_cursor_mode(self):
+        for i in range(7):
+            Comment.objects.create(auction=self.auction, user=self.bidder, title=f"c{i}", body="...")
+            create_auction(self.owner, self.category, title=f"Subasta {i}")
+        comments, _ = self.walk(reverse("auctions:comment-list-create", args=[self.auction.pk]),
+                                {"pagination": "cursor"})
+        self.assertEqual(sum(len(page["results"]) for page in comments), 7)
+        auctions, _ = self.walk(reverse("auctions:auction-list-create"),
+                                {"pagination": "cursor", "category": self.category.pk, "count": "true"})
+        self.assertEqual(auctions[0]["count"], 8)
+        self.assertEqual(sum(len(page["results"]) for page in auctions), 8)
+
+
+class SparseFieldsetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = create_user("owner")
+        self.bidder = create_user("bidder")
+        self.category = Category.objects.create(name="Libros")
+        self.auctions = [create_auction(self.owner, self.category, description="Larga " * 200) for _ in range(3)]
+        for price in ("11.00", "12.00"):
+            services.place_bid(self.auctions[0].pk, self.bidder, Decimal(price))
+        Comment.objects.create(auction=self.auctions[0], user=self.bidder, title="Hola", body="Comentario")
+        self.list_url = reverse("auctions:auction-list-create")
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        sql = " ".join(query["sql"] for query in queries.captured_queries)
+        return response, len(queries), sql
+
+    def test_list_defaults_to_card(self):
+        response, _, sql = self.get(self.list_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("description", response.data["results"][0])
+        self.assertIn("isOpen", response.data["results"][0])
+        self.assertNotIn('"description"', sql)
+
+        response, _, sql = self.get(self.list_url, omit="")
+        self.assertIn("description", response.data["results"][0])
+        self.assertIn('"description"', sql)
+
+    def test_fields_and_omit(self):
+        response, queries, sql = self.get(self.list_url, fields="id,title,isOpen")
+        self.assertEqual(set(response.data["results"][0]), {"id", "title", "isOpen"})
+        self.assertNotIn('"brand"', sql)
+        # Los campos diferidos no se leen después fila a fila
+        self.assertEqual(queries, self.get(self.list_url, omit="")[1])
+
+        response, _, sql = self.get(self.list_url, omit="description,brand")
+        self.assertNotIn("description", response.data["results"][0])
+        self.assertIn("stock", response.data["results"][0])
+        self.assertNotIn('"description"', sql)
+
+        response = self.client.get(self.list_url, {"fields": "id,descripcion"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("descripcion", str(response.data["fields"]))
+
+    def test_bids_and_comments(self):
+        url = reverse("auctions:bid-list-create", args=[self.auctions[0].pk])
+        full, queries, _ = self.get(url)
+        response, sparse_queries, sql = self.get(url, fields="price,bidder_username")
+        self.assertEqual(response.data["results"][0], {"price": "12.00", "bidder_username": "bidder"})
+        self.assertEqual(sparse_queries, queries)
+        self.assertNotIn('"creation_date"', sql)
+        self.assertNotEqual(response["ETag"], full["ETag"])
+
+        url = reverse("auctions:comment-list-create", args=[self.auctions[0].pk])
+        response, _, sql = self.get(url, omit="body")
+        self.assertNotIn("body", response.data["results"][0])
+        self.assertEqual(response.data["results"][0]["user_username"], "bidder")
+        self.assertNotIn('"body"', sql)
+
+    def test_detail_keeps_validators(self):
+        url = reverse("auctions:auction-detail", args=[self.auctions[0].pk])
+        response, queries, sql = self.get(url, fields="title,current_price")
+        self.assertEqual(response.data, {"title": "Subasta de prueba", "current_price": "12.00"})
+        self.assertEqual(queries, 1)
+        self.assertNotIn('"description"', sql)
+        again = self.client.get(url, {"fields": "title,current_price"}, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+    def test_user_history_export(self):
+        self.client.force_authenticate(self.bidder)
+        response = self.client.get(reverse("auctions:user-bids"),
+                                   {"fields": "price,auction_summary", "export": "csv"})
+        header = b"".join(response.streaming_content).decode().splitlines()[0]
+        self.assertEqual(header, "auction_summary.id,auction_summary.title,auction_summary.thumbnail,"
+                                 "auction_summary.closing_date,auction_summary.current_price,price")
+
+    def test_writes_ignore_fieldsets(self):
+        self.client.force_authenticate(self.bidder)
+        url = reverse("auctions:bid-list-create", args=[self.auctions[1].pk])
+        response = self.client.post(f"{url}?fields=price", {"price": "15.00"})
+        self.assertEqual(response.status_code, 201)
+        self.assertIn("bidder_username", response.data)
+
+
+class JSONBackendTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = create_user("owner")
+        self.bidder = create_user("bidder")
+        self.category = Category.objects.create(name="Libros")
+        self.auction = create_auction(self.owner, self.category, title="Línea\u2028nueva «ñ»")
+        services.place_bid(self.auction.pk, self.bidder, Decimal("12.50"))
+        Rating.objects.create(auction=self.auction, user=self.bidder, value=4)
+
+    def assertSameJSON(self, data, **kwargs):
+        expected = JSONRenderer().render(data, **kwargs)
+        self.assertEqual(OrjsonRenderer().render(data, **kwargs), expected)
+        return expected
+
+    def test_renderer_matches_drf(self):
+        urls = [
+            reverse("auctions:auction-list-create") + "?omit=",
+            reverse("auctions:auction-detail", args=[self.auction.pk]),
+            reverse("auctions:bid-list-create", args=[self.auction.pk]),
+        ]
+        for url in urls:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.assertSameJSON(response.data), response.content)
+            if "bid" not in url:
+                self.assertIn(b"\\u2028", response.content)
+
+    def test_renderer_edge_cases(self):
+        self.assertSameJSON({"precio": Decimal("10.50"), "fecha": timezone.now(), "dia": date(2024, 1, 2),
+                             "texto": gettext_lazy("Texto"), "separadores": "\u2028\u2029", "nada": None})
+        # orjson no puede: enteros grandes y claves que no son texto pasan por DRF
+        self.assertSameJSON({"grande": 2 ** 70, 1: "uno"})
+        self.assertSameJSON({"a": [1, 2]}, accepted_media_type="application/json; indent=4")
+        self.assertEqual(OrjsonRenderer().render(None), b"")
+
+    def test_parser_matches_drf(self):
+        for body in ['{"price": "12.50", "title": "\u00f1", "n": 12345678901234567890123}',
+                     "[1, 2.5, null, -9223372036854775809, 1e-05]"]:
+            payload = body.encode()
+            self.assertEqual(OrjsonParser().parse(io.BytesIO(payload)), JSONParser().parse(io.BytesIO(payload)))
+        for body in [b'{"price": ', b"\xff"]:
+            with self.assertRaises(ParseError) as expected:
+                JSONParser().parse(io.BytesIO(body))
+            with self.assertRaises(ParseError) as got:
+                OrjsonParser().parse(io.BytesIO(body))
+            self.assertEqual(str(got.exception.detail), str(expected.exception.detail))
+        payload = '{"title": "ñ"}'.encode("latin-1")
+        self.assertEqual(OrjsonParser().parse(io.BytesIO(payload), parser_context={"encoding": "latin-1"}),
+                         {"title": "ñ"})
+
+    def test_fast_datetime_field_matches_drf(self):
+        fast = FastDateTimeField(format="%Y-%m-%dT%H:%M:%SZ")
+        values = [timezone.now(), timezone.now().replace(microsecond=0),
+                  timezone.make_aware(datetime(2024, 10, 27, 3, 30)),
+                  datetime(2024, 3, 31, 1, 0, tzinfo=dt_timezone.utc)]
+        for value in values:
+            drf = serializers.DateTimeField(format="%Y-%m-%dT%H:%M:%SZ")
+            self.assertEqual(fast.to_representation(value), drf.to_representation(value))
+        with timezone.override("America/New_York"):
+            value = timezone.now()
+            expected = serializers.DateTimeField(format="%Y-%m-%dT%H:%M:%SZ").to_representation(value)
+            self.assertEqual(FastDateTimeField(format="%Y-%m-%dT%H:%M:%SZ").to_representation(value), expected)
+
+
+class ValuesListParityTests(APITestCase):
+    """Los listados leídos con values() (auctions.readonly) devuelven lo mismo que los serializadores."""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = create_user("owner")
+        self.bidder = create_user("bidder")
+        self.category = Category.objects.create(name="Libros")
+        self.auctions = [create_auction(self.owner, self.category, title=f"Subasta {i}") for i in range(7)]
+        for auction, price in zip(self.auctions[:3], ("11.00", "12.50", "99.99")):
+            services.place_bid(auction.pk, self.bidder, Decimal(price))
+        services.place_bid(self.auctions[0].pk, self.owner, Decimal("13.10"))
+        # Cerrada, vencida sin pasar el planificador y una media con redondeo delicado
+        Auction.objects.filter(pk=self.auctions[1].pk).update(status=Auction.Status.CLOSED, final_price=Decimal("12.50"))
+        Auction.objects.filter(pk=self.auctions[2].pk).update(closing_date=timezone.now() - timedelta(hours=1))
+        Auction.objects.filter(pk=self.auctions[3].pk).update(rating_sum=107, rating_count=40, average_rating=2.675)
+        for auction in self.auctions[:2]:
+            Comment.objects.create(auction=auction, user=self.bidder, title="Hola", body="Comentario «ñ»")
+
+    def assertSameResponse(self, url, params=None, user=None):
+        self.client.force_authenticate(user)
+        with mock.patch.object(ValuesPlan, "represent", autospec=True, side_effect=ValuesPlan.represent) as fast:
+            cache.clear()
+            response = self.client.get(url, params)
+        self.assertTrue(fast.called, url)
+        with override_settings(AUCTION_VALUES_LISTS=False):
+            cache.clear()
+            expected = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, expected.content)
+        return response
+
+    def test_auction_lists(self):
+        url = reverse("auctions:auction-list-create")
+        responses = [self.assertSameResponse(url, params) for params in [
+            None, {"omit": ""}, {"fields": "id,isOpen,average_rating,closing_date"},
+            {"ordering": "-average_rating", "pagination": "cursor"},
+            {"fields": "title", "ordering": "-bid_count", "pagination": "cursor"},
+            {"status": "open", "count": "false"},
+        ]]
+        # El cursor sale de columnas que no están en la respuesta (bid_count, id)
+        self.assertIsNotNone(responses[4].data["next"])
+        self.assertSameResponse(responses[4].data["next"])
+        # status=open: ni la cerrada ni la vencida
+        self.assertEqual([row["id"] for row in responses[5].data["results"]],
+                         [auction.pk for auction in self.auctions if auction not in self.auctions[1:3]])
+        self.assertSameResponse(url, {"ordering": "price", "pagination": "cursor"}, user=self.bidder)
+        self.assertSameResponse(reverse("auctions:action-from-users"), {"omit": ""}, user=self.owner)
+
+    def test_bid_and_comment_lists(self):
+        for auction in self.auctions[:2]:
+            self.assertSameResponse(reverse("auctions:bid-list-create", args=[auction.pk]))
+            self.assertSameResponse(reverse("auctions:bid-list-create", args=[auction.pk]), {"pagination": "cursor"})
+            self.assertSameResponse(reverse("auctions:comment-list-create", args=[auction.pk]))
+        response = self.assertSameResponse(reverse("auctions:user-bids"), user=self.bidder)
+        self.assertEqual(response.data[0]["auction_summary"]["current_price"], "99.99")
+        self.assertSameResponse(reverse("auctions:user-bids"), {"page": 1}, user=self.bidder)
+        self.assertSameResponse(reverse("auctions:user-bids"), {"fields": "auction_summary,price"}, user=self.bidder)
+
+    def test_unsupported_serializers_keep_drf(self):
+        # Un SerializerMethodField sin Meta.values_sources no se sabe calcular en la consulta
+        self.assertIsNone(values_plan(AuctionDetailSerializer, None))
+        self.assertIsNotNone(values_plan(AuctionListCreateSerializer, None))
+        self.client.force_authenticate(self.bidder)
+        url = reverse("auctions:bid-list-create", args=[self.auctions[3].pk])
+        with mock.patch.object(ValuesPlan, "represent") as fast:
+            response = self.client.post(url, {"price": "20.00"})
+        self.assertEqual(response.status_code, 201)
+        fast.assert_not_called()
+
+
+
+class AsyncValuesListParityTests(AsyncReadURLsMixin, ValuesListParityTests):
+    """Lo mismo con las vistas asíncronas (AsyncReadView.list_response)."""
+
+class ResponseCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = create_user("owner")
+        self.rater = create_user("rater")
+        self.category = Category.objects.create(name="Libros")
+        self.auction = create_auction(self.owner, self.category, title="Primera")
+        self.url = reverse("auctions:auction-list-create")
+
+    def get(self, url=None, params=None, expected="HIT"):
+        response = self.client.get(url or self.url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Cache"], expected)
+        return response.data
+
+    def test_hits_skip_database_and_are_counted(self):
+        self.get(params={"category": self.category.pk, "page": 1}, expected="MISS")
+        with self.assertNumQueries(0):
+            self.get(params={"page": 1, "category": self.category.pk})
+        self.assertEqual(response_cache.stats()["auctions"], {"hits": 1, "misses": 1})
+
+        # Usuarios autenticados y parámetros desconocidos no pasan por la caché
+        self.client.force_authenticate(self.owner)
+        self.assertNotIn("X-Cache", self.client.get(self.url))
+        self.client.force_authenticate(None)
+        self.assertNotIn("X-Cache", self.client.get(self.url, {"format": "json"}))
+
+    def test_writes_are_never_served_stale(self):
+        self.get(expected="MISS")
+        services.place_bid(self.auction.pk, self.rater, Decimal("15.00"))
+        self.assertEqual(self.get(expected="MISS")["results"][0]["current_price"], "15.00")
+
+        Rating.objects.create(auction=self.auction, user=self.rater, value=4)
+        self.assertEqual(self.get(expected="MISS")["results"][0]["average_rating"], 4.0)
+
+        self.auction.title = "Renombrada"
+        self.auction.save()
+        self.assertEqual(self.get(expected="MISS")["results"][0]["title"], "Renombrada")
+
+        create_auction(self.owner, self.category, title="Segunda")
+        self.assertEqual(self.get(expected="MISS")["count"], 2)
+        self.get()
+
+    def test_top_bidder_rename_invalidates_listing(self):
+        services.place_bid(self.auction.pk, self.rater, Decimal("15.00"))
+        self.assertEqual(self.get(expected="MISS")["results"][0]["top_bidder_username"], "rater")
+        # Guardar al usuario sin cambiar el nombre no invalida nada
+        self.rater.save()
+        self.get()
+
+        self.rater.username = "rater2"
+        self.rater.save()
+        self.assertEqual(self.get(expected="MISS")["results"][0]["top_bidder_username"], "rater2")
+
+    def test_bids_and_ratings_only_invalidate_their_pages(self):
+        other = create_auction(self.owner, Category.objects.create(name="Cómics"), title="Segunda")
+        mine, theirs = {"category": self.category.pk}, {"category": other.category_id}
+        by_bids, by_rating = {**theirs, "ordering": "-bid_count"}, {**theirs, "ordering": "-average_rating"}
+        for params in (mine, theirs, by_bids, by_rating):
+            self.get(params=params, expected="MISS")
+
+        services.place_bid(self.auction.pk, self.rater, Decimal("15.00"))
+        self.assertEqual(self.get(params=mine, expected="MISS")["results"][0]["bid_count"], 1)
+        self.get(params=theirs)
+        self.get(params=by_rating)
+        # Una puja puede cambiar qué subastas salen en una página ordenada por pujas
+        self.get(params=by_bids, expected="MISS")
+
+        rating = Rating.objects.create(auction=self.auction, user=self.rater, value=4)
+        self.get(params=mine, expected="MISS")
+        self.get(params=theirs)
+        self.get(params=by_bids)
+        self.get(params=by_rating, expected="MISS")
+
+        # Una valoración que cambia de subasta invalida las dos
+        rating.auction = other
+        rating.save()
+        self.assertEqual(self.get(params=mine, expected="MISS")["results"][0]["rating_count"], 0)
+        self.assertEqual(self.get(params=theirs, expected="MISS")["results"][0]["rating_count"], 1)
+
+    def test_pages_without_ids_depend_on_every_row(self):
+        other = create_auction(self.owner, Category.objects.create(name="Cómics"), title="Segunda")
+        params = {"category": other.category_id, "fields": "title"}
+        self.get(params=params, expected="MISS")
+        self.get(params=params)
+        services.place_bid(self.auction.pk, self.rater, Decimal("15.00"))
+        self.get(params=params, expected="MISS")
+
+    def test_page_read_during_a_write_is_not_stored(self):
+        get_queryset = AuctionListCreate.get_queryset
+
+        def bid_while_reading(view):
+            services.place_bid(self.auction.pk, self.rater, Decimal("15.00"))
+            return get_queryset(view)
+
+        with mock.patch.object(AuctionListCreate, "get_queryset", bid_while_reading):
+            self.get(expected="MISS")
+        self.get(expected="MISS")
+        self.get()
+
+    def test_category_changes_invalidate_both_listings(self):
+        categories_url = reverse("auctions:category-list-create")
+        self.get(categories_url, expected="MISS")
+        self.get(params={"category": "Libros"}, expected="MISS")
+
+        self.category.name = "Cómics"
+        self.category.save()
+        self.assertEqual(self.get(categories_url, expected="MISS")["results"][0]["name"], "Cómics")
+        response = self.client.get(self.url, {"category": "Libros"})
+        self.assertEqual(response.status_code, 400)
+
+        # Las pujas no cambian el listado de categorías
+        services.place_bid(self.auction.pk, self.rater, Decimal("15.00"))
+        self.get(categories_url)
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.owner = create_user("owner")
+        self.bidder = create_user("bidder")
+        self.auction = create_auction(self.owner, Category.objects.create(name="Libros"))
+        for price in ("11.00", "12.00", "13.00"):
+            services.place_bid(self.auction.pk, self.bidder, Decimal(price))
+        self.detail_url = reverse("auctions:auction-detail", args=[self.auction.pk])
+        self.bids_url = reverse("auctions:bid-list-create", args=[self.auction.pk])
+
+    def test_internal_columns_are_not_exposed(self):
+        internal = {"version", "modified", "rating_sum", "highest_bid"}
+        detail = self.client.get(self.detail_url)
+        self.assertFalse(internal & set(detail.data))
+        self.assertIn("ETag", detail)
+        listing = self.client.get(reverse("auctions:auction-list-create"), {"omit": ""})
+        self.assertFalse(internal & set(listing.data["results"][0]))
+        response = self.client.get(self.detail_url, {"fields": "version"})
+        self.assertEqual(response.status_code, 400)
+
+    def assertNotModified(self, url, response, queries=1):
+        with self.assertNumQueries(queries):
+            again = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again["ETag"], response["ETag"])
+        self.assertEqual(again.content, b"")
+        return again
+
+    def test_304_skips_serialization_and_saves_bandwidth(self):
+        for url in (self.detail_url, self.bids_url):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("Last-Modified", response)
+            self.assertGreater(len(response.content), 100)
+            with mock.patch("rest_framework.serializers.ModelSerializer.to_representation",
+                               side_effect=AssertionError("serializado en un 304")):
+                self.assertNotModified(url, response)
+
+            modified_since = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+            self.assertEqual(modified_since.status_code, 304)
+
+    def test_writes_change_the_etag(self):
+        detail = self.client.get(self.detail_url)["ETag"]
+        bids = self.client.get(self.bids_url)["ETag"]
+        self.assertNotEqual(detail, bids)
+        self.assertNotEqual(bids, self.client.get(self.bids_url, {"page": 1})["ETag"])
+
+        etags = {detail}
+        services.place_bid(self.auction.pk, self.bidder, Decimal("20.00"))
+        etags.add(self.client.get(self.detail_url)["ETag"])
+        Rating.objects.create(auction=self.auction, user=self.bidder, value=3)
+        etags.add(self.client.get(self.detail_url)["ETag"])
+        self.auction.refresh_from_db()
+        self.auction.title = "Otro título"
+        self.auction.save()
+        etags.add(self.client.get(self.detail_url)["ETag"])
+        self.assertEqual(len(etags), 4)
+
+        response = self.client.get(self.bids_url, HTTP_IF_NONE_MATCH=bids)
+        self.assertEqual(response.status_code, 200)
+        bids = response["ETag"]
+        self.bidder.username = "renombrado"
+        self.bidder.save()
+        response = self.client.get(self.bids_url, HTTP_IF_NONE_MATCH=bids)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"][0]["bidder_username"], "renombrado")
+
+    def test_closing_changes_the_etag(self):
+        response = self.client.get(self.detail_url)
+        Auction.objects.filter(pk=self.auction.pk).update(closing_date=timezone.now() - timedelta(seconds=1))
+        again = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(again.status_code, 200)
+        self.assertFalse(again.data["isOpen"])
+
+        # El cierre persistido por el planificador también cambia el ETag
+        services.close_due_auctions()
+        closed = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=again["ETag"])
+        self.assertEqual(closed.status_code, 200)
+        self.assertEqual(closed.data["status"], "closed")
+
+
+class AuctionEventStreamTests(TransactionTestCase):
+    def setUp(self):
+        self.owner = create_user("owner")
+        self.bidder = create_user("bidder")
+        self.category = Category.objects.create(name="Libros")
+        self.auction = create_auction(self.owner, self.category)
+        self.application = StreamingASGIHandler()
+
+    def path(self, auction):
+        return reverse("auctions:auction-events", args=[auction.pk])
+
+    async def test_accepted_bids_and_price_changes_are_pushed(self):
+        stream = await ASGIStream(self.application, self.path(self.auction)).start()
+        try:
+            _, retry = await stream.next_chunk()
+            self.assertEqual(stream.status, 200)
+            self.assertTrue(retry.startswith("retry:"))
+            self.assertEqual(events.get_broker().subscriber_count(events.channel_name(self.auction.pk)), 1)
+
+            result = await sync_to_async(services.place_bid)(self.auction.pk, self.bidder, Decimal("15.00"))
+            _, chunk = await stream.next_chunk()
+            self.assertIn("event: bid", chunk)
+            self.assertIn(f'"bid": {result.bid.pk}', chunk)
+            self.assertIn('"current_price": "15.00"', chunk)
+
+            # Una puja rechazada no publica nada
+            await sync_to_async(services.place_bid)(self.auction.pk, self.bidder, Decimal("14.00"))
+            await sync_to_async(services.delete_bid)(result.bid)
+            _, chunk = await stream.next_chunk()
+            self.assertIn("event: price", chunk)
+            self.assertIn('"current_price": null', chunk)
+        finally:
+            await stream.close()
+        self.assertEqual(events.get_broker().subscriber_count(), 0)
+
+    async def test_idle_subscribers_do_not_hold_threads(self):
+        threads = threading.active_count()
+        streams = [ASGIStream(self.application, self.path(self.auction)) for _ in range(50)]
+        for stream in streams:
+            await stream.start()
+        for stream in streams:
+            await stream.next_chunk()
+        try:
+            self.assertLess(threading.active_count() - threads, 5)
+        finally:
+            for stream in streams:
+                await stream.close()
+
+    async def test_stream_ends_with_scheduler_closed_event(self):
+        closing = await sync_to_async(create_auction)(
+            self.owner, self.category, closing_date=timezone.now() + timedelta(milliseconds=200))
+        result = await sync_to_async(services.place_bid)(closing.pk, self.bidder, Decimal("15.00"))
+        stream = await ASGIStream(self.application, self.path(closing)).start()
+        try:
+            await stream.next_chunk()
+            await asyncio.sleep(0.3)
+            await sync_to_async(services.close_due_auctions)()
+            _, chunk = await stream.next_chunk()
+            self.assertIn("event: closed", chunk)
+            self.assertIn(f'"winning_bid": {result.bid.pk}', chunk)
+            await stream.wait()
+        finally:
+            await stream.close()
+        self.assertTrue(stream.finished)
+
+    @override_settings(AUCTION_EVENTS_CLOSE_GRACE=0)
+    async def test_stream_ends_without_scheduler(self):
+        closing = await sync_to_async(create_auction)(
+            self.owner, self.category, closing_date=timezone.now() + timedelta(milliseconds=300))
+        stream = await ASGIStream(self.application, self.path(closing)).start()
+        try:
+            await stream.next_chunk()
+            _, chunk = await stream.next_chunk()
+            self.assertIn("event: closed", chunk)
+        finally:
+            await stream.close()
+        self.assertTrue(stream.finished)
+
+    async def test_closed_auction_ends_immediately(self):
+        closing = await sync_to_async(create_auction)(self.owner, self.category)
+        await Auction.objects.filter(pk=closing.pk).aupdate(
+            status=Auction.Status.CLOSED, closing_date=timezone.now() - timedelta(minutes=1))
+        stream = await ASGIStream(self.application, self.path(closing)).start()
+        try:
+            await stream.next_chunk()
+            _, chunk = await stream.next_chunk()
+            self.assertIn('"winning_bid": null', chunk)
+            await stream.wait()
+        finally:
+            await stream.close()
+        self.assertTrue(stream.finished)
+
+    async def test_unknown_auction_is_404(self):
+        stream = await ASGIStream(self.application, "/api/auctions/999/events/").start()
+        await stream.wait()
+        self.assertEqual(stream.status, 404)
+
+    def test_wsgi_request_returns_immediately(self):
+        # Con WSGI el stream bloquearía el worker hasta el cierre (dentro de 20 días)
+        started = time.monotonic()
+        response = self.client.get(self.path(self.auction))
+        self.assertEqual(response.status_code, 501)
+        self.assertFalse(response.streaming)
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(events.get_broker().subscriber_count(), 0)
+
+
+class ReadViewSelectionTests(SimpleTestCase):
+    def test_wsgi_uses_the_sync_drf_views(self):
+        for name, args in [("auction-list-create", []), ("auction-detail", [1]), ("bid-list-create", [1]),
+                           ("comment-list-create", [1]), ("category-list-create", [])]:
+            match = resolve(reverse(f"auctions:{name}", args=args))
+            self.assertFalse(issubclass(match.func.view_class, AsyncReadView), name)
+            self.assertFalse(asyncio.iscoroutinefunction(match.func), name)
+
+
+class AsyncReadViewTests(AsyncReadURLsMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = create_user("owner")
+        self.category = Category.objects.create(name="Libros")
+        self.auction = create_auction(self.owner, self.category)
+        services.place_bid(self.auction.pk, self.owner, Decimal("12.00"))
+        Comment.objects.create(auction=self.auction, user=self.owner, title="Hola", body="...")
+        self.urls = [
+            reverse("auctions:auction-list-create"),
+            reverse("auctions:category-list-create"),
+            reverse("auctions:auction-detail", args=[self.auction.pk]),
+            reverse("auctions:bid-list-create", args=[self.auction.pk]),
+            reverse("auctions:comment-list-create", args=[self.auction.pk]),
+        ]
+
+    def test_anonymous_reads_never_use_the_sync_view(self):
+        with mock.patch.object(AsyncReadView, "get_sync_view", side_effect=AssertionError("vista síncrona")):
+            for url in self.urls:
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200, url)
+                self.assertEqual(response["Content-Type"], "application/json")
+            self.assertEqual(self.client.get(self.urls[3]).data["results"][0]["bidder_username"], "owner")
+            self.assertEqual(self.client.get(self.urls[4]).data["results"][0]["user_username"], "owner")
+            # Los errores mantienen el formato de DRF
+            self.assertEqual(self.client.get(self.urls[0], {"category": "Nada"}).status_code, 400)
+            self.assertEqual(self.client.get(self.urls[0], {"page": 9}).status_code, 404)
+            self.assertEqual(self.client.get(reverse("auctions:bid-list-create", args=[999])).status_code, 404)
+
+    def test_authenticated_browsable_and_write_requests_are_delegated(self):
+        response = self.client.get(self.urls[0], HTTP_AUTHORIZATION="Bearer no-es-un-token")
+        self.assertEqual(response.status_code, 401)
+        response = self.client.get(self.urls[2], HTTP_ACCEPT="text/html")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("text/html", response["Content-Type"])
+
+        self.client.force_authenticate(self.owner)
+        response = self.client.post(self.urls[4], {"title": "Otro", "body": "..."})
+        self.assertEqual(response.status_code, 201)
+        response = self.client.put(self.urls[0], {})
+        self.assertEqual(response.status_code, 405)
+
+
+class AsyncReadViewASGITests(AsyncReadURLsMixin, TransactionTestCase):
+    def test_middleware_keeps_the_chain_async(self):
+        # Un solo middleware síncrono haría que Django ejecutara las vistas asíncronas en un hilo
+        for path in settings.MIDDLEWARE:
+            self.assertTrue(getattr(import_string(path), "async_capable", False), path)
+
+    async def test_served_by_the_asgi_application(self):
+        await sync_to_async(create_auction)(await sync_to_async(create_user)("owner"),
+                                            await sync_to_async(Category.objects.create)(name="Libros"))
+        with mock.patch.object(AsyncReadView, "get_sync_view", side_effect=AssertionError("vista síncrona")):
+            stream = await ASGIStream(StreamingASGIHandler(), reverse("auctions:auction-list-create"),
+                                      accept="application/json").start()
+            await stream.wait()
+        self.assertEqual(stream.status, 200)
+        _, body = await stream.next_chunk()
+        self.assertIn('"count":1', body)
+
+
+class AuctionClosingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = create_user("owner")
+        self.bidder = create_user("bidder")
+        self.rival = create_user("rival")
+        self.category = Category.objects.create(name="Libros")
+        self.auction = create_auction(self.owner, self.category)
+
+    def expire(self, *auctions):
+        Auction.objects.filter(pk__in=[a.pk for a in auctions]).update(
+            closing_date=timezone.now() - timedelta(minutes=1))
+
+    def test_close_persists_winner_and_final_price(self):
+        services.place_bid(self.auction.pk, self.rival, Decimal("12.00"))
+        top = services.place_bid(self.auction.pk, self.bidder, Decimal("15.00")).bid
+        empty = create_auction(self.owner, self.category)
+        self.expire(self.auction, empty)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            closed = services.close_due_auctions()
+        self.assertEqual({a["pk"] for a in closed}, {self.auction.pk, empty.pk})
+
+        self.auction.refresh_from_db()
+        self.assertEqual(self.auction.status, Auction.Status.CLOSED)
+        self.assertEqual(self.auction.winning_bid_id, top.pk)
+        self.assertEqual(self.auction.final_price, Decimal("15.00"))
+        self.assertFalse(self.auction.is_open)
+        empty.refresh_from_db()
+        self.assertEqual(empty.status, Auction.Status.CLOSED)
+        self.assertIsNone(empty.winning_bid_id)
+
+        response = self.client.get(reverse("auctions:auction-detail", args=[self.auction.pk]))
+        self.assertEqual(response.data["status"], "closed")
+        self.assertEqual(response.data["winning_bid"], top.pk)
+        self.assertFalse(response.data["isOpen"])
+
+    def test_close_is_idempotent_and_skips_open_auctions(self):
+        self.expire(self.auction)
+        self.assertEqual(len(services.close_due_auctions()), 1)
+        version = Auction.objects.get(pk=self.auction.pk).version
+        self.assertEqual(services.close_due_auctions(), [])
+        self.assertEqual(Auction.objects.get(pk=self.auction.pk).version, version)
+
+        later = create_auction(self.owner, self.category)
+        self.assertEqual(services.close_due_auctions(auction_ids=[later.pk]), [])
+        later.refresh_from_db()
+        self.assertEqual(later.status, Auction.Status.OPEN)
+
+    def test_bids_are_rejected_on_closed_auction(self):
+        Auction.objects.filter(pk=self.auction.pk).update(status=Auction.Status.CLOSED)
+        result = services.place_bid(self.auction.pk, self.bidder, Decimal("50.00"))
+        self.assertIs(result.outcome, services.BidOutcome.CLOSED)
+
+        self.client.force_authenticate(self.bidder)
+        response = self.client.post(reverse("auctions:bid-list-create", args=[self.auction.pk]), {"price": "60.00"})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Bid.objects.filter(auction=self.auction).exists())
+
+    def test_closing_date_of_closed_auction_cannot_change(self):
+        services.place_bid(self.auction.pk, self.bidder, Decimal("15.00"))
+        self.expire(self.auction)
+        services.close_due_auctions()
+        self.client.force_authenticate(self.owner)
+        url = reverse("auctions:auction-detail", args=[self.auction.pk])
+        response = self.client.patch(url, {"closing_date": (timezone.now() + timedelta(days=30)).isoformat()})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("closing_date", response.data)
+        self.auction.refresh_from_db()
+        self.assertEqual(self.auction.status, Auction.Status.CLOSED)
+        self.assertLess(self.auction.closing_date, timezone.now())
+
+        # El resto de la subasta se sigue pudiendo editar
+        response = self.client.patch(url, {"title": "Otro título"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["status"], "closed")
+
+    def test_scheduler_catches_up_in_batches(self):
+        overdue = [create_auction(self.owner, self.category) for _ in range(5)]
+        self.expire(*overdue)
+        out = StringIO()
+        call_command("run_closing_scheduler", "--once", "--batch-size", "2", stdout=out)
+        self.assertIn("5 subasta(s)", out.getvalue())
+        self.assertEqual(Auction.objects.filter(status=Auction.Status.CLOSED).count(), 5)
+        self.auction.refresh_from_db()
+        self.assertEqual(self.auction.status, Auction.Status.OPEN)
+
+    def test_scheduler_closes_queued_auctions_when_due(self):
+        scheduler = AuctionClosingScheduler(batch_size=10, refresh=60)
+        soon = create_auction(self.owner, self.category, closing_date=timezone.now() + timedelta(seconds=5))
+        scheduler.refresh()
+        self.assertEqual(scheduler.queue, [(soon.closing_date, soon.pk)])
+        self.assertEqual(scheduler.run_pending(), [])
+
+        self.expire(soon)
+        closed = scheduler.run_pending(now=timezone.now() + timedelta(seconds=10))
+        self.assertEqual([a["pk"] for a in closed], [soon.pk])
+        self.assertEqual(scheduler.queue, [])
+
+
+class UserHistoryExportTests(TransactionTestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        self.owner = create_user("owner")
+        self.bidder = create_user("bidder")
+        category = Category.objects.create(name="Libros")
+        self.auctions = [create_auction(self.owner, category, title=f"Subasta, {i}") for i in range(7)]
+        for i, auction in enumerate(self.auctions):
+            services.place_bid(auction.pk, self.bidder, Decimal(10 + i))
+
+    def test_user_bids_are_paginated(self):
+        self.client.force_authenticate(self.bidder)
+        url, params = reverse("auctions:user-bids"), {"pagination": "cursor"}
+        pages = []
+        with mock.patch.object(PageNumberPagination, "page_size", 3):
+            while url:
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, 200)
+                pages.append([bid["price"] for bid in response.data["results"]])
+                url, params = response.data["next"], None
+        self.assertEqual(pages, [["16.00", "15.00", "14.00"], ["13.00", "12.00", "11.00"], ["10.00"]])
+
+    def export(self, user, url_name, export_format):
+        self.client.force_authenticate(user)
+        response = self.client.get(reverse(url_name), {"export": export_format})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_ndjson_export_streams_every_row(self):
+        with mock.patch("auctions.views.UserBidListView.export_chunk_size", 3):
+            response, body = self.export(self.bidder, "auctions:user-bids", "ndjson")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertIn('filename="mis-pujas.ndjson"', response["Content-Disposition"])
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row["price"] for row in rows], [f"{p}.00" for p in range(16, 9, -1)])
+        self.assertEqual(rows[0]["auction_summary"]["title"], "Subasta, 6")
+
+    def test_csv_export_flattens_nested_fields(self):
+        response, body = self.export(self.bidder, "auctions:user-bids", "csv")
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(rows[0]["auction_summary.title"], "Subasta, 6")
+        self.assertEqual(rows[0]["bidder_username"], "bidder")
+
+        response, body = self.export(self.owner, "auctions:action-from-users", "csv")
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual([row["title"] for row in rows], [a.title for a in self.auctions])
+
+    def test_unknown_export_format(self):
+        self.client.force_authenticate(self.bidder)
+        response = self.client.get(reverse("auctions:user-bids"), {"export": "xml"})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_asgi_export_iterates_asynchronously(self):
+        token = str(await sync_to_async(AccessToken.for_user)(self.bidder))
+        stream = ASGIStream(StreamingASGIHandler(), reverse("auctions:user-bids") + "?export=ndjson",
+                            accept="application/json", headers=[("Authorization", f"Bearer {token}")])
+        with warnings.catch_warnings():
+            # Django avisa (y acumula todo en memoria) si recibe un iterador síncrono en ASGI
+            warnings.simplefilter("error")
+            await stream.start()
+            await stream.wait()
+        self.assertEqual(stream.status, 200)
+        body = ""
+        while not stream.chunks.empty():
+            body += (await stream.next_chunk())[1]
+        self.assertEqual(len(body.splitlines()), 7)
+
+
+class BulkExportImportTests(TransactionTestCase):
+    reset_sequences = True
+
+    def setUp(self):
+        self.owner = create_user("owner")
+        self.bidder = create_user("bidder")
+        self.rival = create_user("rival")
+        self.category = Category.objects.create(name="Libros")
+        self.auctions = [create_auction(self.owner, self.category, title=f"Subasta {i}") for i in range(3)]
+        for auction in self.auctions:
+            services.place_bid(auction.pk, self.bidder, Decimal("11.00"))
+            services.place_bid(auction.pk, self.rival, Decimal("12.50"))
+            Rating.objects.create(auction=auction, user=self.bidder, value=4)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def snapshot(self):
+        return list(Auction.objects.order_by("pk").values_list(
+            "pk", "title", "creation_date", "current_price", "bid_count", "top_bidder_username",
+            "rating_count", "average_rating"))
+
+    def wipe(self):
+        Auction.objects.update(highest_bid=None)
+        Bid.objects.all()._raw_delete(Bid.objects.db)
+        Rating.objects.all()._raw_delete(Rating.objects.db)
+        Auction.objects.all()._raw_delete(Auction.objects.db)
+
+    def test_ndjson_gzip_round_trip(self):
+        before = self.snapshot()
+        err = StringIO()
+        call_command("export_auctions", self.path("subastas.ndjson.gz"), "--with-related", stderr=err)
+        self.assertIn("12 filas (3 auction, 6 bid, 3 rating)", err.getvalue())
+        self.assertIn("filas/s", err.getvalue())
+        with gzip.open(self.path("subastas.ndjson.gz"), "rt") as exported:
+            first = json.loads(exported.readline())
+        self.assertEqual(first["model"], "auctions.auction")
+        self.assertNotIn("current_price", first["fields"])
+
+        self.wipe()
+        out = StringIO()
+        call_command("import_auctions", self.path("subastas.ndjson.gz"), "--batch-size", "2", stdout=out)
+        self.assertIn("12 filas", out.getvalue())
+        self.assertEqual(self.snapshot(), before)
+        # La secuencia sigue por encima de las claves importadas
+        self.assertGreater(create_auction(self.owner, self.category).pk, self.auctions[-1].pk)
+
+    def test_bids_csv_export_and_import(self):
+        call_command("export_bids", self.path("pujas.csv"), "--format", "csv", "--auction", str(self.auctions[0].pk),
+                     stderr=StringIO())
+        with open(self.path("pujas.csv"), newline="") as exported:
+            rows = list(csv.DictReader(exported))
+        self.assertEqual([row["price"] for row in rows], ["11.00", "12.50"])
+
+        Bid.objects.filter(auction=self.auctions[0]).delete()
+        call_command("import_auctions", self.path("pujas.csv"), "--csv", "bid", stdout=StringIO())
+        auction = Auction.objects.get(pk=self.auctions[0].pk)
+        self.assertEqual((auction.current_price, auction.bid_count, auction.top_bidder_username),
+                         (Decimal("12.50"), 2, "rival"))
+
+    def test_import_validates_invariants(self):
+        auction = self.auctions[0]
+        records = [
+            {"model": "auctions.bid", "pk": None,
+             "fields": {"auction": auction.pk, "price": "12.50", "bidder": self.bidder.pk}},
+            {"model": "auctions.bid", "pk": None,
+             "fields": {"auction": auction.pk, "price": "20.00", "bidder": 999}},
+            {"model": "auctions.rating", "pk": None,
+             "fields": {"auction": auction.pk, "user": self.bidder.pk, "value": 3}},
+            {"model": "auctions.rating", "pk": None,
+             "fields": {"auction": auction.pk, "user": self.rival.pk, "value": 6}},
+            {"model": "auctions.bid", "pk": None,
+             "fields": {"auction": auction.pk, "price": "13.00", "bidder": self.rival.pk}},
+        ]
+        with open(self.path("datos.ndjson"), "w") as source:
+            source.write("\n".join(json.dumps(record) for record in records))
+
+        with self.assertRaises(CommandError):
+            call_command("import_auctions", self.path("datos.ndjson"), stdout=StringIO())
+        self.assertEqual(Bid.objects.count(), 6)
+
+        err = StringIO()
+        call_command("import_auctions", self.path("datos.ndjson"), "--skip-invalid", stdout=StringIO(), stderr=err)
+        self.assertIn("4 registro(s) omitido(s)", err.getvalue())
+        self.assertIn("la puja debe superar a la anterior (12.50)", err.getvalue())
+        self.assertIn("no existe", err.getvalue())
+        self.assertIn("ya ha valorado", err.getvalue())
+        self.assertIn("entre 1 y 5", err.getvalue())
+        auction.refresh_from_db()
+        self.assertEqual((auction.current_price, auction.bid_count), (Decimal("13.00"), 3))
+
+    def test_import_rejects_bids_after_closing(self):
+        auction = self.auctions[0]
+        late = (auction.closing_date + timedelta(minutes=1)).isoformat()
+        on_time = (auction.closing_date - timedelta(minutes=1)).isoformat()
+        new_auction = {"title": "Nueva", "description": "d", "price": "10.00", "stock": 1, "brand": "b",
+                       "category": self.category.pk, "thumbnail": "https://example.com/a.png",
+                       "creation_date": "2024-01-01T00:00:00Z", "closing_date": "2024-01-02T00:00:00Z",
+                       "auctioneer": self.owner.pk}
+        records = [
+            {"model": "auctions.bid", "pk": None,
+             "fields": {"auction": auction.pk, "price": "20.00", "creation_date": late, "bidder": self.bidder.pk}},
+            {"model": "auctions.bid", "pk": None,
+             "fields": {"auction": auction.pk, "price": "15.00", "creation_date": on_time, "bidder": self.bidder.pk}},
+            {"model": "auctions.auction", "pk": 100, "fields": new_auction},
+            {"model": "auctions.bid", "pk": None,
+             "fields": {"auction": 100, "price": "11.00", "creation_date": "2024-01-03T00:00:00Z",
+                        "bidder": self.bidder.pk}},
+        ]
+        with open(self.path("datos.ndjson"), "w") as source:
+            source.write("\n".join(json.dumps(record) for record in records))
+
+        err = StringIO()
+        call_command("import_auctions", self.path("datos.ndjson"), "--skip-invalid", stdout=StringIO(), stderr=err)
+        self.assertIn("2 registro(s) omitido(s)", err.getvalue())
+        self.assertEqual(err.getvalue().count("posterior al cierre"), 2)
+        # La puja tardía no cuenta como anterior: la de 15.00 se acepta
+        auction.refresh_from_db()
+        self.assertEqual((auction.current_price, auction.bid_count), (Decimal("15.00"), 3))
+        self.assertFalse(Bid.objects.filter(auction_id=100).exists())
+
+    def test_imports_django_fixture(self):
+        # La fixture del repositorio (UTF-16, formato de loaddata)
+        fixture = os.path.join(settings.BASE_DIR, "auctions", "fixtures", "initial_auctions.json")
+        self.wipe()
+        self.assertTrue(CustomUser.objects.filter(pk=2).exists())  # subastador de la fixture
+        for pk in range(1, 5):
+            Category.objects.get_or_create(pk=pk, defaults={"name": f"Categoría {pk}"})
+        call_command("import_auctions", fixture, stdout=StringIO())
+        self.assertEqual(Auction.objects.filter(auctioneer_id=2).count(), 5)
+
+
+class BenchmarkBaselineTests(SimpleTestCase):
+    config = {"database": "sqlite", "server": "asgi", "concurrency": 32}
+
+    def results(self, config=None, **stats):
+        endpoint = {"queries": 2.0, "rps": 100.0, "p95_ms": 50.0, "errors": 0, **stats}
+        return {"config": config or self.config, "endpoints": {"auction-list": endpoint}}
+
+    def test_no_regressions_within_tolerance(self):
+        current = self.results(rps=80.0, p95_ms=60.0)
+        self.assertEqual(compare_to_baseline(current, self.results(), tolerance=0.25), [])
+
+    def test_reports_regressions(self):
+        current = self.results(queries=3.0, rps=70.0, p95_ms=70.0, errors=2)
+        regressions = compare_to_baseline(current, self.results(), tolerance=0.25)
+        self.assertEqual(len(regressions), 4)
+        self.assertIn("auction-list: 3 consultas por petición (antes 2)", regressions)
+
+    def test_other_config_only_compares_queries(self):
+        other = {**self.config, "server": "wsgi"}
+        self.assertEqual(compare_to_baseline(self.results(other, rps=10.0), self.results()), [])
+        self.assertEqual(len(compare_to_baseline(self.results(other, queries=5.0), self.results())), 1)
+        # Sin servidor (--no-server) solo hay consultas
+        current = {"config": {**self.config, "server": None}, "endpoints": {"auction-list": {"queries": 2.0}}}
+        self.assertEqual(compare_to_baseline(current, self.results()), [])
+
+    def test_build_request(self):
+        self.assertEqual(build_request("/api/auctions/"), ("GET", "/api/auctions/", None))
+        self.assertEqual(build_request(lambda: ("POST", "/api/token/", {"username": "a"})),
+                         ("POST", "/api/token/", b'{"username": "a"}'))
+
+
+PROFILED_MIDDLEWARE = ["myFirstApiRest.instrumentation.RequestProfilingMiddleware", *settings.MIDDLEWARE]
+
+
+@override_settings(MIDDLEWARE=PROFILED_MIDDLEWARE, REQUEST_PROFILING_SAMPLE_RATE=1.0)
+class RequestProfilingTests(TransactionTestCase):
+    def setUp(self):
+        self.owner = create_user("owner")
+        self.category = Category.objects.create(name="Libros")
+        self.auction = create_auction(self.owner, self.category)
+        services.place_bid(self.auction.pk, create_user("bidder"), Decimal("11.00"))
+        self.client = APIClient()
+
+    def server_timing(self, response):
+        return dict(
+            (entry.split(";")[0], entry) for entry in response["Server-Timing"].split(", ")
+        )
+
+    def test_server_timing_header(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("auctions:bid-list-create", args=[self.auction.pk]))
+        self.assertEqual(response.status_code, 200)
+        timing = self.server_timing(response)
+        self.assertEqual(set(timing), {"total", "db", "serializer"})
+        self.assertRegex(timing["db"], rf'db;dur=[\d.]+;desc="{len(queries)} consultas"')
+
+    async def test_async_views_are_profiled(self):
+        stream = await ASGIStream(StreamingASGIHandler(), reverse("auctions:bid-list-create", args=[self.auction.pk]),
+                                  accept="application/json").start()
+        await stream.wait()
+        self.assertEqual(stream.status, 200)
+        # Las consultas de la vista asíncrona (sync_to_async) también se cuentan
+        self.assertRegex(stream.headers["server-timing"], r'db;dur=[\d.]+;desc="[1-9]\d* consultas"')
+
+    def test_metrics_endpoint(self):
+        self.client.get(reverse("auctions:auction-detail", args=[self.auction.pk]))
+        self.client.force_login(create_user("admin", is_staff=True))
+        body = self.client.get(reverse("metrics")).content.decode()
+        labels = 'route="api/auctions/<int:pk>/",method="GET"'
+        self.assertIn(f'http_requests_total{{{labels},status="200"}}', body)
+        self.assertRegex(body, rf'http_request_duration_seconds_bucket{{{labels},le="\+Inf"}} [1-9]')
+        self.assertRegex(body, rf'http_request_queries_count{{{labels}}} [1-9]')
+        self.assertIn("# TYPE http_request_serializer_seconds histogram", body)
+
+    def test_metrics_are_never_public(self):
+        # Sin token configurado solo entra el staff
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+        self.client.force_login(self.owner)
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+        self.client.logout()
+
+        with override_settings(REQUEST_METRICS_TOKEN="secreto"):
+            self.assertEqual(self.client.get(reverse("metrics")).status_code, 401)
+            self.client.credentials(HTTP_AUTHORIZATION="Bearer otro")
+            self.assertEqual(self.client.get(reverse("metrics")).status_code, 401)
+            self.client.credentials(HTTP_AUTHORIZATION="Bearer secreto")
+            self.assertEqual(self.client.get(reverse("metrics")).status_code, 200)
+
+    def test_flags_repeated_queries(self):
+        def view(request):
+            for auction in Auction.objects.all():
+                list(auction.bids.all())
+            create_auction(self.owner, self.category)
+            create_auction(self.owner, self.category)
+            return HttpResponse()
+
+        for _ in range(2):
+            self.auction = create_auction(self.owner, self.category)
+        middleware = RequestProfilingMiddleware(view)
+        with self.assertLogs("myFirstApiRest.instrumentation", "WARNING") as logs:
+            response = middleware(RequestFactory().get("/"))
+        self.assertIn("3 repetidas", response["Server-Timing"])
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("Consulta repetida 3 veces en GET <unmatched>", logs.output[0])
+
+    @override_settings(REQUEST_PROFILING_SAMPLE_RATE=0.0)
+    def test_unsampled_requests_only_count(self):
+        url = reverse("auctions:auction-detail", args=[self.auction.pk])
+        before = REQUESTS.series[("api/auctions/<int:pk>/", "GET", "200")]
+        response = self.client.get(url)
+        self.assertNotIn("Server-Timing", response)
+        self.assertEqual(REQUESTS.series[("api/auctions/<int:pk>/", "GET", "200")], before + 1)
+
+    @override_settings(MIDDLEWARE=settings.MIDDLEWARE)
+    def test_metrics_need_the_middleware(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 404)
+
+
+class DatabaseConfigTests(SimpleTestCase):
+    def config(self, **env):
+        with mock.patch.dict(os.environ, {"DATABASE_URL": "postgres://u:p@db.example.com:5432/pujas", **env}):
+            return database_config()
+
+    def test_persistent_connections_by_default(self):
+        with mock.patch.dict(os.environ):
+            for name in ("DB_CONN_MAX_AGE", "DB_CONN_HEALTH_CHECKS", "DB_POOL"):
+                os.environ.pop(name, None)
+            config = self.config()
+        self.assertEqual((config["CONN_MAX_AGE"], config["CONN_HEALTH_CHECKS"]), (60, True))
+        self.assertNotIn("pool", config.get("OPTIONS", {}))
+
+        config = self.config(DB_CONN_MAX_AGE="0", DB_CONN_HEALTH_CHECKS="0")
+        self.assertEqual((config["CONN_MAX_AGE"], config["CONN_HEALTH_CHECKS"]), (0, False))
+        self.assertIsNone(self.config(DB_CONN_MAX_AGE="")["CONN_MAX_AGE"])
+
+    @mock.patch("myFirstApiRest.database.pool_installed", return_value=True)
+    def test_pool(self, pool_installed):
+        config = self.config(DB_POOL="1", DB_POOL_MAX_SIZE="20")
+        self.assertEqual(config["CONN_MAX_AGE"], 0)
+        self.assertEqual(config["OPTIONS"]["pool"], {"min_size": 2, "max_size": 20, "timeout": 10.0})
+
+        with self.assertRaises(ImproperlyConfigured):
+            self.config(DB_POOL="1", DATABASE_URL="sqlite:///pujas.sqlite3")
+
+        # Sin psycopg_pool (requirements.txt antiguo, solo psycopg2) falla al arrancar
+        pool_installed.return_value = False
+        with self.assertRaisesMessage(ImproperlyConfigured, "psycopg[binary,pool]"):
+            self.config(DB_POOL="1")
+
+    @mock.patch("myFirstApiRest.database.pool_installed", return_value=True)
+    def test_pool_auto(self, pool_installed):
+        # El valor de asgi.py: pool con PostgreSQL si está instalado y, si no, sin error
+        self.assertIn("pool", self.config(DB_POOL="auto")["OPTIONS"])
+        self.assertNotIn("pool", self.config(DB_POOL="auto", DATABASE_URL="sqlite:///pujas.sqlite3").get("OPTIONS", {}))
+        pool_installed.return_value = False
+        self.assertNotIn("pool", self.config(DB_POOL="auto").get("OPTIONS", {}))
+
+    def test_warm_up_only_reusable_connections(self):
+        connection = mock.Mock(alias="default", settings_dict={"OPTIONS": {}, "CONN_MAX_AGE": 0})
+        with mock.patch("django.db.connections.all", return_value=[connection]):
+            warm_up_connections()
+            connection.ensure_connection.assert_not_called()
+
+            connection.settings_dict["CONN_MAX_AGE"] = 60
+            warm_up_connections()
+            connection.ensure_connection.assert_called_once()
+            connection.close.assert_not_called()
+
+            # Con el pool la conexión se devuelve en cuanto se abre; un fallo no impide arrancar
+            connection.settings_dict = {"OPTIONS": {"pool": {"min_size": 2}}, "CONN_MAX_AGE": 0}
+            warm_up_connections()
+            connection.close.assert_called_once()
+            connection.ensure_connection.side_effect = OperationalError
+            with self.assertLogs("myFirstApiRest.database", "WARNING"):
+                warm_up_connections()
+
+
+class DotenvSettingsTests(SimpleTestCase):
+    def load_settings(self, **dotenv):
+        """Ejecuta myFirstApiRest/settings.py con ``dotenv`` como contenido de .env."""
+        def load_dotenv(*args, **kwargs):
+            for name, value in dotenv.items():
+                os.environ.setdefault(name, value)
+
+        spec = importlib.util.spec_from_file_location(
+            "myFirstApiRest.dotenv_settings", os.path.join(settings.BASE_DIR, "myFirstApiRest", "settings.py"))
+        module = importlib.util.module_from_spec(spec)
+        with mock.patch.dict(os.environ), mock.patch("dotenv.load_dotenv", load_dotenv):
+            for name in dotenv:
+                os.environ.pop(name, None)
+            spec.loader.exec_module(module)
+        return module
+
+    def test_request_profiling_from_dotenv(self):
+        module = self.load_settings(REQUEST_PROFILING="1", REQUEST_PROFILING_SAMPLE_RATE="0.25",
+                                    REQUEST_METRICS_TOKEN="secreto")
+        self.assertEqual(module.MIDDLEWARE[0], "myFirstApiRest.instrumentation.RequestProfilingMiddleware")
+        self.assertEqual(module.REQUEST_PROFILING_SAMPLE_RATE, 0.25)
+        self.assertEqual(module.REQUEST_METRICS_TOKEN, "secreto")
+
+    def test_async_read_views_from_dotenv(self):
+        self.assertTrue(self.load_settings(ASYNC_READ_VIEWS="1").ASYNC_READ_VIEWS)
+        self.assertFalse(self.load_settings(ASYNC_READ_VIEWS="0").ASYNC_READ_VIEWS)
+
+
+class ReadReplicaRoutingTests(TransactionTestCase):
+    """Principal en memoria y réplica en un fichero SQLite aparte, con datos distintos."""
+    # La réplica se añade en setUpClass: '__all__' la incluye a partir de entonces
+    databases = '__all__'
+    client_class = APIClient
+
+    @classmethod
+    def setUpClass(cls):
+        cls.replica_dir = tempfile.TemporaryDirectory()
+        config = dj_database_url.parse(f"sqlite:///{cls.replica_dir.name}/replica.sqlite3")
+        connections.settings['replica1'] = connections.configure_settings(
+            {**connections.settings, 'replica1': config})['replica1']
+        call_command('migrate', database='replica1', verbosity=0)
+        cls.enterClassContext(override_settings(
+            DATABASE_REPLICAS=['replica1'],
+            DATABASE_ROUTERS=['myFirstApiRest.routers.ReadReplicaRouter'],
+            MIDDLEWARE=[*settings.MIDDLEWARE, 'myFirstApiRest.routers.ReadReplicaMiddleware'],
+        ))
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica1'].close()
+        del connections['replica1']
+        del connections.settings['replica1']
+        cls.replica_dir.cleanup()
+
+    def setUp(self):
+        cache.clear()
+        self.owner = create_user("owner")
+        self.bidder = create_user("bidder", locality="Sevilla")
+        self.category = Category.objects.create(name="Libros")
+        self.auction = create_auction(self.owner, self.category, title="En la réplica")
+        # La réplica va con retraso: tiene la subasta con el título antiguo y ya cerrada
+        for instance in (self.owner, self.bidder, self.category, Auction.objects.get(pk=self.auction.pk)):
+            type(instance).objects.using('replica1').bulk_create([instance])
+        Auction.objects.using('replica1').filter(pk=self.auction.pk).update(
+            closing_date=timezone.now() - timedelta(days=1))
+        Auction.objects.filter(pk=self.auction.pk).update(title="En la principal")
+        self.detail = reverse("auctions:auction-detail", args=[self.auction.pk])
+        self.bids = reverse("auctions:bid-list-create", args=[self.auction.pk])
+
+    def test_safe_reads_use_replica(self):
+        self.assertEqual(self.client.get(self.detail).json()["title"], "En la réplica")
+        # Fuera de una petición, la principal
+        self.assertEqual(Auction.objects.get(pk=self.auction.pk).title, "En la principal")
+
+    def test_bid_validation_and_read_your_writes_use_primary(self):
+        self.client.force_authenticate(self.bidder)
+        # En la réplica la subasta está cerrada: la validación tiene que leer de la principal
+        response = self.client.post(self.bids, {"price": "15.00"})
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(Bid.objects.using('replica1').exists())
+
+        # El que acaba de pujar ve su puja; otro usuario lee de la réplica
+        self.assertEqual(len(self.client.get(self.bids, {"pagination": "count"}).json()["results"]), 1)
+        self.client.force_authenticate(self.owner)
+        self.assertEqual(len(self.client.get(self.bids, {"pagination": "count"}).json()["results"]), 0)
+
+        with override_settings(DATABASE_REPLICA_PIN_SECONDS=0):
+            self.client.force_authenticate(self.bidder)
+            self.client.post(self.bids, {"price": "20.00"})
+            self.assertEqual(len(self.client.get(self.bids, {"pagination": "count"}).json()["results"]), 0)
+
+    def test_cached_list_pages_are_read_from_primary(self):
+        # El fallo de caché guarda la página con la versión actual: tiene que leerse de la principal
+        url = reverse("auctions:auction-list-create")
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["results"][0]["title"], "En la principal")
+        self.assertEqual(self.client.get(url).json()["results"][0]["title"], "En la principal")
+        # Lo que no se cachea sigue yendo a la réplica
+        self.assertEqual(self.client.get(url, {"fields": "title", "unknown": 1}).json()["results"][0]["title"],
+                         "En la réplica")
+
+    def test_users_always_use_primary(self):
+        self.client.force_authenticate(self.bidder)
+        response = self.client.patch(reverse("users:user-profile"), {"locality": "Madrid"})
+        self.assertEqual(response.status_code, 200)
+        cache.clear()
+        self.assertEqual(self.client.get(reverse("users:user-profile")).json()["locality"], "Madrid")
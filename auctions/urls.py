@@ -1,24 +1,37 @@
+from django.conf import settings
 from django.urls import path
-from .views import (CategoryListCreate, CategoryRetrieveUpdateDestroy, AuctionListCreate, AuctionRetrieveUpdateDestroy,
-                     BidListCreate, BidRetrieveUpdateDestroy, UserAuctionListView, UserBidListView,RatingListCreate,
-                     RatingRetrieveUpdateDestroy, CommentListCreate, CommentRetrieveUpdateDestroy)
+from .views import (CategoryRetrieveUpdateDestroy, BidRetrieveUpdateDestroy, UserAuctionListView, UserBidListView,
+                     RatingListCreate, RatingRetrieveUpdateDestroy, CommentRetrieveUpdateDestroy, auction_events)
+from .async_views import AuctionListAsync, AuctionDetailAsync, BidListAsync, CategoryListAsync, CommentListAsync
+
+
+def read_view(async_view):
+    """
+    Con ASGI (ASYNC_READ_VIEWS) la vista de lectura asíncrona; con WSGI, la vista DRF síncrona que
+    envuelve: en un worker síncrono la asíncrona solo añadiría el salto por async_to_sync.
+    """
+    if getattr(settings, 'ASYNC_READ_VIEWS', False):
+        return async_view.as_view()
+    return async_view.drf_view.as_view()
+
 
 app_name = "auctions"
 urlpatterns = [
     path('ratings/', RatingListCreate.as_view(), name='rating-list-create'),
     path('ratings/<int:pk>/', RatingRetrieveUpdateDestroy.as_view(), name='rating-detail'),
 
-    path('categories/', CategoryListCreate.as_view(), name='category-list-create'),
+    path('categories/', read_view(CategoryListAsync), name='category-list-create'),
     path('categories/<int:pk>/', CategoryRetrieveUpdateDestroy.as_view(), name='category-detail'),
 
-    path('', AuctionListCreate.as_view(), name='auction-list-create'),
-    path('<int:pk>/', AuctionRetrieveUpdateDestroy.as_view(), name='auction-detail'),
+    path('', read_view(AuctionListAsync), name='auction-list-create'),
+    path('<int:pk>/', read_view(AuctionDetailAsync), name='auction-detail'),
 
-    path('<int:auction_id>/bid/', BidListCreate.as_view(), name='bid-list-create'),
+    path('<int:auction_id>/bid/', read_view(BidListAsync), name='bid-list-create'),
     path('<int:auction_id>/bid/<int:pk>/', BidRetrieveUpdateDestroy.as_view(), name='bid-detail'),
+    path('<int:auction_id>/events/', auction_events, name='auction-events'),
 
     # comentarios
-    path('<int:auction_id>/comments/', CommentListCreate.as_view(), name='comment-list-create'),
+    path('<int:auction_id>/comments/', read_view(CommentListAsync), name='comment-list-create'),
     path('<int:auction_id>/comments/<int:pk>/', CommentRetrieveUpdateDestroy.as_view(), name='comment-detail'),
 
     path('users/', UserAuctionListView.as_view(), name='action-from-users'),
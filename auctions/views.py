@@ -1,24 +1,42 @@
+import asyncio
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework import generics, status, permissions
-from rest_framework.views import APIView
-from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny, SAFE_METHODS
 from rest_framework.exceptions import ValidationError
+from django.db import transaction
 from django.db.models import Q
 from django.utils import timezone
+from django.utils.dateparse import parse_duration
 
 from .models import Category, Auction, Bid, Rating, Comment
 from .serializers import (
     CategoryListCreateSerializer, CategoryDetailSerializer,
     AuctionListCreateSerializer, AuctionDetailSerializer,
-    BidListCreateSerializer, BidDetailSerializer, RatingSerializer, CommentSerializer
+    BidListCreateSerializer, BidDetailSerializer, UserBidSerializer, RatingSerializer, CommentSerializer
 )
 from .permissions import IsOwnerOrAdmin  
+from .pagination import KeysetPageNumberPagination, OptInKeysetPagination
+from . import events, services
+from .search import get_search_backend
+from . import response_cache
+from .response_cache import AnonymousListCacheMixin
+from .conditional import ConditionalRetrieveMixin, ConditionalAuctionListMixin
+from .export import StreamingExportMixin
+from .sparse import SparseFieldsetMixin
+from .readonly import ValuesListMixin
 
 # --- Categorías ---
-class CategoryListCreate(generics.ListCreateAPIView):
+class CategoryListCreate(AnonymousListCacheMixin, generics.ListCreateAPIView):
     queryset = Category.objects.all()
     serializer_class = CategoryListCreateSerializer
+    pagination_class = KeysetPageNumberPagination
+    cache_scope = response_cache.CATEGORIES
 
     def get_permissions(self):
         if self.request.method == "POST":
@@ -32,20 +50,84 @@ class CategoryRetrieveUpdateDestroy(generics.RetrieveUpdateDestroyAPIView):
 
     
 # --- Subastas ---
-class AuctionListCreate(generics.ListCreateAPIView):
+DURATION_RE = re.compile(r'(\d+)([smhd])')
+DURATION_UNITS = {'s': 'seconds', 'm': 'minutes', 'h': 'hours', 'd': 'days'}
+
+
+def parse_ending_within(value):
+    """Duración positiva en formato corto (30m, 2h, 1d) o el de Django / ISO 8601; si no, None."""
+    match = DURATION_RE.fullmatch(value)
+    try:
+        duration = timedelta(**{DURATION_UNITS[match[2]]: int(match[1])}) if match else parse_duration(value)
+    except OverflowError:
+        # Más de 999999999 días
+        return None
+    if duration is None or duration <= timedelta(0):
+        return None
+    return duration
+
+
+class AuctionListCreate(SparseFieldsetMixin, AnonymousListCacheMixin, ValuesListMixin, generics.ListCreateAPIView):
     queryset = Auction.objects.all()
     serializer_class = AuctionListCreateSerializer
+    pagination_class = KeysetPageNumberPagination
+    # Tarjeta del listado: lo que pintan los clientes (todo con ?omit=, a medida con ?fields=)
+    sparse_default_fields = ('id', 'title', 'thumbnail', 'price', 'current_price', 'closing_date', 'isOpen',
+                             'status', 'category', 'average_rating', 'rating_count', 'bid_count',
+                             'top_bidder_username')
+    cache_scope = response_cache.AUCTIONS
+    cache_rows_scope = response_cache.AUCTION_ROWS
+    cache_query_params = ('search', 'category', 'min_price', 'max_price', 'status', 'ending_within',
+                          'ordering', 'page', 'pagination', 'cursor', 'count', 'fields', 'omit')
+    # Órdenes en los que una puja o una valoración cambia qué subastas salen en cada página
+    cache_ordering_scopes = {'bid_count': response_cache.AUCTION_BIDS,
+                             'average_rating': response_cache.AUCTION_RATINGS}
+    ordering_fields = ('closing_date', 'price', 'average_rating', 'bid_count')
+
+    def get_cache_scopes(self, request):
+        ordering = request.query_params.get("ordering", "").lstrip('-')
+        if ordering in self.cache_ordering_scopes:
+            return (self.cache_scope, self.cache_ordering_scopes[ordering])
+        return (self.cache_scope,)
 
     def get_queryset(self):
+        queryset, category_name = self.filter_auctions(self.request.query_params)
+        if category_name is not None and not Category.objects.filter(name=category_name).exists():
+            raise self.unknown_category(category_name)
+        return queryset
+
+    @staticmethod
+    def unknown_category(name):
+        return ValidationError({"category": f"La categoría '{name}' no existe."})
+
+    @property
+    def keyset_ordering(self):
+        return self.get_ordering(self.request.query_params)
+
+    def get_ordering(self, params):
+        """``?ordering=campo`` o ``-campo``; el id desempata en el mismo sentido (índices <campo, id>)."""
+        ordering = params.get("ordering")
+        if not ordering:
+            return ('id',)
+        if ordering.lstrip('-') not in self.ordering_fields:
+            raise ValidationError({"ordering": f"Valores permitidos: {', '.join(self.ordering_fields)} "
+                                               "(con '-' para orden descendente)."})
+        return (ordering, '-id' if ordering.startswith('-') else 'id')
+
+    def filter_auctions(self, params):
+        """
+        Aplica los filtros de la petición sin tocar la base de datos. Devuelve el queryset y,
+        si se filtra por nombre de categoría, ese nombre (hay que comprobar que existe).
+        """
         queryset = Auction.objects.all()
-        params = self.request.query_params
+        category_name = None
 
         # Filtro por búsqueda de texto
         search = params.get("search")
         if search:
             if len(search) < 3:
                 raise ValidationError({"search": "La búsqueda debe tener al menos 3 caracteres."})
-            queryset = queryset.filter(Q(title__icontains=search) | Q(description__icontains=search))
+            queryset = get_search_backend().filter(queryset, search)
 
         # Filtro por categoría (puede ser ID o nombre exacto)
         category = params.get("category")
@@ -53,8 +135,7 @@ class AuctionListCreate(generics.ListCreateAPIView):
             if category.isdigit():
                 queryset = queryset.filter(category__id=int(category))
             else:
-                if not Category.objects.filter(name=category).exists():
-                    raise ValidationError({"category": f"La categoría '{category}' no existe."})
+                category_name = category
                 queryset = queryset.filter(category__name=category)
 
         # Filtro por rango de precios
@@ -81,18 +162,49 @@ class AuctionListCreate(generics.ListCreateAPIView):
             except ValueError:
                 raise ValidationError({"max_price": "Debe ser un número válido."})
 
-        return queryset
+        # Filtro por estado, con la misma regla que isOpen (índice status + closing_date)
+        now = timezone.now()
+        auction_status = params.get("status")
+        if auction_status == Auction.Status.OPEN:
+            queryset = queryset.filter(status=Auction.Status.OPEN, closing_date__gt=now)
+        elif auction_status == Auction.Status.CLOSED:
+            queryset = queryset.filter(Q(status=Auction.Status.CLOSED) | Q(closing_date__lte=now))
+        elif auction_status:
+            raise ValidationError({"status": "Debe ser 'open' o 'closed'."})
+
+        # Subastas abiertas que cierran dentro del plazo indicado ("terminan pronto")
+        ending_within = params.get("ending_within")
+        if ending_within:
+            duration = parse_ending_within(ending_within)
+            try:
+                deadline = now + duration if duration is not None else None
+            except OverflowError:
+                # La duración cabe en un timedelta pero la fecha límite pasa del año 9999
+                deadline = None
+            if deadline is None:
+                raise ValidationError({"ending_within": "Duración no válida (p. ej. 30m, 2h, 1d o 01:30:00)."})
+            queryset = queryset.filter(status=Auction.Status.OPEN, closing_date__gt=now,
+                                       closing_date__lte=deadline)
 
+        if params.get("ordering"):
+            queryset = queryset.order_by(*self.get_ordering(params))
 
+        return queryset, category_name
 
-class AuctionRetrieveUpdateDestroy(generics.RetrieveUpdateDestroyAPIView):
+
+
+class AuctionRetrieveUpdateDestroy(SparseFieldsetMixin, ConditionalRetrieveMixin, generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsOwnerOrAdmin] 
     queryset = Auction.objects.all()
     serializer_class = AuctionDetailSerializer
+    # Validadores ETag (auction_validators)
+    sparse_required_columns = ('version', 'modified', 'closing_date', 'status')
 
 # --- Pujas (Bids) ---
-class BidListCreate(generics.ListCreateAPIView):
+class BidListCreate(SparseFieldsetMixin, ConditionalAuctionListMixin, ValuesListMixin, generics.ListCreateAPIView):
     serializer_class = BidListCreateSerializer
+    pagination_class = KeysetPageNumberPagination
+    keyset_ordering = ('-price', 'id')
     
     def get_permissions(self):
         if self.request.method in SAFE_METHODS:      # GET, HEAD, OPTIONS
@@ -100,30 +212,88 @@ class BidListCreate(generics.ListCreateAPIView):
         return [IsAuthenticated()]
 
     def get_auction(self):
+        # En GET la subasta ya se ha leído para calcular el ETag (ConditionalAuctionListMixin)
+        auction = getattr(self, 'auction', None)
+        if auction is not None:
+            return auction
         return get_object_or_404(Auction, pk=self.kwargs["auction_id"])
 
     def get_queryset(self):
         auction = self.get_auction()
-        return Bid.objects.filter(auction=auction).order_by('-price')
+        # bidder_username en la misma consulta (sin una consulta de usuario por puja)
+        return (
+            Bid.objects.filter(auction=auction).order_by('-price', 'id')
+            .select_related('bidder')
+            .only('id', 'auction', 'price', 'creation_date', 'bidder', 'bidder__username')
+        )
 
     def perform_create(self, serializer):
-        auction = self.get_auction()
-
-        # Validación de subasta abierta
-        if auction.closing_date <= timezone.now():
-            raise ValidationError("No se puede pujar. La subasta ya ha cerrado.")
-
-        # Validación de precio mayor a la puja anterior
-        last_bid = Bid.objects.filter(auction=auction).order_by('-price').first()
         new_price = serializer.validated_data.get('price')
         if new_price <= 0:
             raise ValidationError("La puja debe ser un número positivo.")
 
-        if last_bid and new_price <= last_bid.price:
-            raise ValidationError(f"La puja debe ser mayor que la actual: {last_bid.price}€.")
+        try:
+            result = services.place_bid(self.kwargs["auction_id"], self.request.user, new_price)
+        except Auction.DoesNotExist:
+            raise Http404
+        if result.outcome is services.BidOutcome.CLOSED:
+            raise ValidationError("No se puede pujar. La subasta ya ha cerrado.")
+        if result.outcome is services.BidOutcome.OUTBID:
+            raise ValidationError(f"La puja debe ser mayor que la actual: {result.current_price}€.")
+
+        serializer.instance = result.bid
+
+async def auction_events(request, auction_id):
+    """
+    GET /api/auctions/<id>/events/ → server-sent events con las pujas y cambios de precio de
+    la subasta y un evento ``closed`` (con la puja ganadora) cuando el planificador la cierra.
+    Requiere el servidor ASGI: con WSGI el stream ocuparía un worker hasta el cierre de la
+    subasta (StreamingHttpResponse lo consume entero con async_to_sync antes de enviar nada),
+    así que responde 501 al momento.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse("Los eventos de la subasta requieren el servidor ASGI.", status=501,
+                            content_type='text/plain; charset=utf-8')
+    fields = ('status', 'closing_date', 'winning_bid', 'final_price')
+    auction = await Auction.objects.filter(pk=auction_id).values(*fields).afirst()
+    if auction is None:
+        raise Http404
+    closing_date = auction['closing_date']
+    keepalive = getattr(settings, 'AUCTION_EVENTS_KEEPALIVE', 15)
+    # Si el planificador no llega a publicar el cierre, el stream termina igualmente
+    deadline = closing_date + timedelta(seconds=getattr(settings, 'AUCTION_EVENTS_CLOSE_GRACE', 60))
+
+    def closed_event(auction):
+        return events.build_event(auction_id, events.CLOSED, winning_bid=auction['winning_bid'],
+                                  final_price=auction['final_price'])
+
+    async def stream():
+        async with events.get_broker().subscribe(events.channel_name(auction_id)) as subscription:
+            yield "retry: 3000\n\n"
+            if auction['status'] == Auction.Status.CLOSED:
+                yield closed_event(auction)
+                return
+            while True:
+                remaining = (deadline - timezone.now()).total_seconds()
+                if remaining <= 0:
+                    current = await Auction.objects.filter(pk=auction_id).values(*fields).afirst()
+                    yield closed_event(current or auction)
+                    return
+                try:
+                    message = await subscription.get(timeout=min(keepalive, remaining))
+                except asyncio.TimeoutError:
+                    if deadline > timezone.now():
+                        yield ": keepalive\n\n"
+                    continue
+                yield message
+                if message.startswith(f"event: {events.CLOSED}\n"):
+                    return
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
-        # Guardar la puja
-        serializer.save(auction=auction, bidder=self.request.user)
 
 class BidRetrieveUpdateDestroy(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = BidDetailSerializer
@@ -134,43 +304,58 @@ class BidRetrieveUpdateDestroy(generics.RetrieveUpdateDestroyAPIView):
         return Bid.objects.filter(auction=self.auction, bidder=self.request.user)
 
     def perform_update(self, serializer):
-        # Solo permitir editar si la subasta sigue abierta
-        if self.auction.closing_date <= timezone.now():
-            raise ValidationError("No puedes editar la puja. La subasta ya ha cerrado.")
-
-        last_bid = Bid.objects.filter(auction=self.auction).exclude(pk=self.get_object().pk).order_by('-price').first()
-        new_price = serializer.validated_data.get('price')
-
+        new_price = serializer.validated_data.get('price', serializer.instance.price)
         if new_price <= 0:
             raise ValidationError("La puja debe ser un número positivo.")
 
-        if last_bid and new_price <= last_bid.price:
-            raise ValidationError(f"La puja debe ser mayor que la actual: {last_bid.price}€.")
-
-        serializer.save()
+        # Validación y escritura del precio en la misma transacción que place_bid
+        result = services.update_bid(serializer.instance, new_price)
+        if result.outcome is services.BidOutcome.CLOSED:
+            raise ValidationError("No puedes editar la puja. La subasta ya ha cerrado.")
+        if result.outcome is services.BidOutcome.OUTBID:
+            raise ValidationError(f"La puja debe ser mayor que la actual: {result.current_price}€.")
 
     def perform_destroy(self, instance):
-        if instance.auction.closing_date <= timezone.now():
+        result = services.delete_bid(instance)
+        if result.outcome is services.BidOutcome.CLOSED:
             raise ValidationError("No puedes eliminar la puja. La subasta ya ha cerrado.")
-        instance.delete()
 
 
-class UserAuctionListView(APIView):
+class UserAuctionListView(SparseFieldsetMixin, StreamingExportMixin, ValuesListMixin, generics.ListAPIView):
+    """
+    Subastas del usuario autenticado: la lista entera o, con ``?page=`` / ``?pagination=cursor``,
+    paginada; ``?export=ndjson|csv`` las descarga todas en streaming.
+    """
+    serializer_class = AuctionListCreateSerializer
     permission_classes = [IsAuthenticated]
-    
-    def get(self, request, *args, **kwargs):
-        # Obtener las subastas del usuario autenticado
-        user_auctions = Auction.objects.filter(auctioneer=request.user)
-        serializer = AuctionListCreateSerializer(user_auctions, many=True)
-        return Response(serializer.data)
-    
-class UserBidListView(APIView):
+    pagination_class = OptInKeysetPagination
+    keyset_ordering = ('id',)
+    export_filename = 'mis-subastas'
+
+    def get_queryset(self):
+        return Auction.objects.filter(auctioneer=self.request.user).order_by('id')
+
+
+class UserBidListView(SparseFieldsetMixin, StreamingExportMixin, ValuesListMixin, generics.ListAPIView):
+    """
+    Pujas del usuario autenticado: la lista entera o, con ``?page=`` / ``?pagination=cursor``,
+    paginada; ``?export=ndjson|csv`` las descarga todas en streaming.
+    """
+    serializer_class = UserBidSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = OptInKeysetPagination
+    keyset_ordering = ('-price', 'id')
+    export_filename = 'mis-pujas'
+
+    def get_queryset(self):
+        # Cada puja lleva un resumen de su subasta, leído con un JOIN en la misma consulta
+        return (
+            Bid.objects.filter(bidder=self.request.user).order_by('-price', 'id')
+            .select_related('bidder', 'auction')
+            .only('id', 'price', 'creation_date', 'bidder', 'bidder__username', 'auction',
+                  'auction__title', 'auction__thumbnail', 'auction__closing_date', 'auction__current_price')
+        )
 
-    def get(self, request):
-        user_bids = Bid.objects.filter(bidder=request.user).order_by('-price')
-        serializer = BidListCreateSerializer(user_bids, many=True)
-        return Response(serializer.data)
 
 class RatingListCreate(generics.ListCreateAPIView):
     """
@@ -188,7 +373,9 @@ class RatingListCreate(generics.ListCreateAPIView):
         return qs
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        # La valoración y el ajuste de los agregados de la subasta van en la misma transacción
+        with transaction.atomic():
+            serializer.save(user=self.request.user)
 
 
 class RatingRetrieveUpdateDestroy(generics.RetrieveUpdateDestroyAPIView):
@@ -200,18 +387,37 @@ class RatingRetrieveUpdateDestroy(generics.RetrieveUpdateDestroyAPIView):
 
     def get_queryset(self):
         return Rating.objects.filter(user=self.request.user)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
     
-class CommentListCreate(generics.ListCreateAPIView):
+class CommentListCreate(SparseFieldsetMixin, ValuesListMixin, generics.ListCreateAPIView):
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPageNumberPagination
+    keyset_ordering = ('-created', 'id')
+
+    def get_auction(self):
+        # La vista asíncrona de lectura ya ha comprobado la subasta
+        auction = getattr(self, 'auction', None)
+        if auction is not None:
+            return auction
+        return get_object_or_404(Auction, pk=self.kwargs['auction_id'])
 
     def get_queryset(self):
-        auction = get_object_or_404(Auction, pk=self.kwargs['auction_id'])
-        return Comment.objects.filter(auction=auction)
+        return (
+            Comment.objects.filter(auction=self.get_auction())
+            .select_related('user')
+            .only('id', 'auction', 'user', 'user__username', 'title', 'body', 'created', 'updated')
+        )
 
     def perform_create(self, serializer):
-        auction = get_object_or_404(Auction, pk=self.kwargs['auction_id'])
-        serializer.save(user=self.request.user, auction=auction)
+        serializer.save(user=self.request.user, auction=self.get_auction())
 
 
 class CommentRetrieveUpdateDestroy(generics.RetrieveUpdateDestroyAPIView):
@@ -9,8 +9,25 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myFirstApiRest.settings')
+# Con ASGI cada petición usa su propia conexión: las persistentes no se reutilizarían, solo se
+# acumularían. Las conexiones se reutilizan con el pool de psycopg, activo por defecto si la
+# base de datos es PostgreSQL y está instalado (DB_POOL=auto, myFirstApiRest.database)
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
+os.environ.setdefault('DB_POOL', 'auto')
+# Lecturas con las vistas asíncronas (auctions.async_views); WSGI sigue con las de DRF
+os.environ.setdefault('ASYNC_READ_VIEWS', '1')
 
-application = get_asgi_application()
+django.setup(set_prefix=False)
+
+# Igual que get_asgi_application(), pero sin un hilo por conexión en los streams de eventos
+from auctions.asgi import StreamingASGIHandler  # noqa: E402
+
+application = StreamingASGIHandler()
+
+if os.getenv('DB_WARMUP', '1') == '1':
+    from myFirstApiRest.database import warm_up_connections  # noqa: E402
+
+    warm_up_connections()
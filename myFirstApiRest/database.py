@@ -0,0 +1,111 @@
+"""
+Conexiones a la base de datos: reutilización configurable y apertura al arrancar.
+
+``database_config`` construye ``DATABASES['default']`` a partir de ``DATABASE_URL`` y de:
+
+- ``DB_CONN_MAX_AGE`` (60 por defecto): segundos que cada worker reutiliza su conexión en vez
+  de abrir una (TCP + TLS + autenticación) por petición. 0 = una conexión por petición, vacío
+  = sin límite. El punto de entrada ASGI lo pone a 0: allí las conexiones no se reutilizan
+  entre peticiones y solo se acumularían; la reutilización la da el pool (``DB_POOL=auto``).
+- ``DB_CONN_HEALTH_CHECKS`` (1 por defecto): comprobar una conexión reutilizada antes de la
+  primera consulta de cada petición, para que un corte del servidor no se convierta en un 500.
+- ``DB_POOL`` (0 por defecto): pool de conexiones de psycopg (solo PostgreSQL con psycopg 3 y
+  ``psycopg_pool``, ``psycopg[binary,pool]`` en requirements.txt; si falta, error al arrancar).
+  Tamaño ``DB_POOL_MIN_SIZE`` / ``DB_POOL_MAX_SIZE`` por proceso y espera máxima por una
+  conexión libre ``DB_POOL_TIMEOUT``. Excluye las conexiones persistentes: con el pool,
+  CONN_MAX_AGE es 0 y cada petición devuelve la conexión al pool. ``auto`` (el valor por
+  defecto en asgi.py) lo activa solo si la base de datos es PostgreSQL y el pool está instalado.
+
+``warm_up_connections`` abre las conexiones al arrancar cada worker (``DB_WARMUP``, 1 por
+defecto, desde wsgi.py / asgi.py), así la primera petición no paga el establecimiento. No
+debe usarse con ``gunicorn --preload``: la conexión se abriría en el proceso maestro y la
+heredarían todos los workers.
+"""
+import importlib.util
+import logging
+import os
+
+import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
+
+logger = logging.getLogger(__name__)
+
+POSTGRES_ENGINES = ('django.db.backends.postgresql', 'django.contrib.gis.db.backends.postgis')
+
+
+def env_flag(name, default):
+    return os.getenv(name, default).lower() in ('1', 'true', 'yes', 'on')
+
+
+def pool_installed():
+    return importlib.util.find_spec('psycopg_pool') is not None
+
+
+def use_pool(config):
+    setting = os.getenv("DB_POOL", "0").lower()
+    postgres = config.get('ENGINE') in POSTGRES_ENGINES
+    if setting == 'auto':
+        return postgres and pool_installed()
+    if setting not in ('1', 'true', 'yes', 'on'):
+        return False
+    if not postgres:
+        raise ImproperlyConfigured("DB_POOL solo está disponible con PostgreSQL (psycopg 3).")
+    if not pool_installed():
+        raise ImproperlyConfigured(
+            "DB_POOL necesita psycopg 3 con el pool: pip install 'psycopg[binary,pool]'."
+        )
+    return True
+
+
+def database_config(url=None):
+    max_age = os.getenv("DB_CONN_MAX_AGE", "60")
+    config = dj_database_url.config(
+        default=url or os.getenv("DATABASE_URL"),
+        conn_max_age=int(max_age) if max_age else None,
+        conn_health_checks=env_flag("DB_CONN_HEALTH_CHECKS", "1"),
+    )
+    if use_pool(config):
+        config['CONN_MAX_AGE'] = 0
+        config.setdefault('OPTIONS', {})['pool'] = {
+            'min_size': int(os.getenv("DB_POOL_MIN_SIZE", 2)),
+            'max_size': int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+            'timeout': float(os.getenv("DB_POOL_TIMEOUT", 10)),
+        }
+    return config
+
+
+def replica_configs():
+    """
+    Alias ``replica1``, ``replica2``... para las URLs de ``DATABASE_REPLICA_URLS`` (separadas
+    por comas), con las mismas opciones de conexión que la principal (ver myFirstApiRest.routers).
+    En los tests son espejos de la principal.
+    """
+    urls = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+    replicas = {}
+    for number, url in enumerate(urls, 1):
+        config = database_config(url)
+        config['TEST'] = {'MIRROR': 'default'}
+        replicas[f'replica{number}'] = config
+    return replicas
+
+
+def warm_up_connections():
+    """
+    Abre la conexión de cada base de datos que la vaya a reutilizar: con el pool lo llena hasta
+    ``min_size`` y le devuelve la conexión; con conexiones persistentes la deja abierta en este
+    hilo (el que atiende las peticiones en los workers síncronos de gunicorn). Un fallo solo
+    se registra: el worker arranca igual y la conexión se intentará en la primera petición.
+    """
+    from django.db import DatabaseError, connections
+
+    for connection in connections.all():
+        pooled = bool(connection.settings_dict['OPTIONS'].get('pool'))
+        if not pooled and connection.settings_dict['CONN_MAX_AGE'] == 0:
+            continue
+        try:
+            connection.ensure_connection()
+        except DatabaseError:
+            logger.warning("No se ha podido abrir la conexión '%s' al arrancar", connection.alias, exc_info=True)
+            continue
+        if pooled:
+            connection.close()
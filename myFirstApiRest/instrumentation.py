@@ -0,0 +1,274 @@
+"""
+Instrumentación por petición (opcional): ``RequestProfilingMiddleware`` mide el tiempo total,
+las consultas SQL (número y tiempo), el tiempo de los serializadores y detecta consultas
+repetidas (patrón N+1). Lo expone de dos formas:
+
+- cabecera ``Server-Timing`` en cada respuesta perfilada (visible en las herramientas del
+  navegador);
+- ``GET /metrics/`` en formato de texto de Prometheus, con histogramas por ruta. Cada proceso
+  (worker) tiene su propio registro: Prometheus debe rascar cada worker o agregarlos.
+
+Con ``REQUEST_PROFILING_SAMPLE_RATE`` < 1 solo una fracción de las peticiones se perfila a fondo
+(consultas, serializadores, Server-Timing); el tiempo total y el contador de peticiones se
+registran siempre, porque solo cuestan un perf_counter. En las respuestas en streaming (SSE,
+exportaciones) se mide hasta que la vista devuelve la respuesta, no el envío del cuerpo.
+"""
+import bisect
+import hmac
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import Http404, HttpResponse
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger(__name__)
+
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+_current_profile = ContextVar('request_profile', default=None)
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets, labelnames=('route', 'method')):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.labelnames = labelnames
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self.lock:
+            counts, total = self.series.get(labels, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.series[labels] = (counts, total + value)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self.lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in self.series.items()]
+        for labels, counts, total in sorted(series):
+            label_text = format_labels(self.labelnames, labels)
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                yield f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}'
+            yield f"{self.name}_sum{{{label_text}}} {total}"
+            yield f"{self.name}_count{{{label_text}}} {cumulative}"
+
+
+class CounterMetric:
+    def __init__(self, name, documentation, labelnames=('route', 'method')):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.series = Counter()
+        self.lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self.lock:
+            self.series[labels] += amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        with self.lock:
+            series = sorted(self.series.items())
+        for labels, value in series:
+            yield f"{self.name}{{{format_labels(self.labelnames, labels)}}} {value}"
+
+
+def format_labels(names, values):
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"') for value in values)
+    return ','.join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+
+REQUESTS = CounterMetric('http_requests_total', 'Peticiones atendidas.', ('route', 'method', 'status'))
+DURATION = Histogram('http_request_duration_seconds', 'Tiempo total de la petición.', TIME_BUCKETS)
+DB_TIME = Histogram('http_request_db_seconds', 'Tiempo en consultas SQL (peticiones muestreadas).', TIME_BUCKETS)
+QUERIES = Histogram('http_request_queries', 'Consultas SQL por petición (peticiones muestreadas).', QUERY_BUCKETS)
+SERIALIZER_TIME = Histogram('http_request_serializer_seconds',
+                            'Tiempo en serializadores (peticiones muestreadas).', TIME_BUCKETS)
+DUPLICATES = CounterMetric('http_requests_duplicate_queries_total',
+                           'Peticiones muestreadas con consultas repetidas (posible N+1).')
+METRICS = (REQUESTS, DURATION, DB_TIME, QUERIES, SERIALIZER_TIME, DUPLICATES)
+
+
+class RequestProfile:
+    """Consultas y tiempos de una petición muestreada."""
+
+    def __init__(self):
+        self.queries = Counter()
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # execute_wrapper: ``sql`` es la plantilla con %s, así que dos consultas que solo
+        # cambian en los parámetros cuentan como la misma
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries[sql] += 1
+
+    @property
+    def query_count(self):
+        return sum(self.queries.values())
+
+    def duplicates(self, threshold):
+        return {sql: count for sql, count in self.queries.items() if count >= threshold}
+
+
+def install_serializer_timer():
+    """
+    Envuelve ``BaseSerializer.data`` (una sola vez por proceso) para sumar su tiempo al perfil de
+    la petición en curso. Serializer.data y ListSerializer.data pasan por él con super(), y los
+    serializadores anidados usan to_representation, así que no se cuenta dos veces.
+    """
+    data = BaseSerializer.data
+    if getattr(data.fget, 'profiled', False):
+        return
+
+    def timed_data(serializer):
+        profile = _current_profile.get()
+        if profile is None:
+            return data.fget(serializer)
+        profile.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return data.fget(serializer)
+        finally:
+            profile.serializer_depth -= 1
+            if not profile.serializer_depth:
+                profile.serializer_time += time.perf_counter() - start
+
+    timed_data.profiled = True
+    BaseSerializer.data = property(timed_data)
+
+
+class RequestProfilingMiddleware:
+    """
+    Debe ir el primero de ``MIDDLEWARE`` para medir la petición completa. Configuración:
+
+    - ``REQUEST_PROFILING_SAMPLE_RATE``: fracción de peticiones perfiladas a fondo (1.0).
+    - ``REQUEST_PROFILING_DUPLICATE_THRESHOLD``: repeticiones de la misma consulta a partir de
+      las que se marca la petición como N+1 (3).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = float(getattr(settings, 'REQUEST_PROFILING_SAMPLE_RATE', 1.0))
+        self.duplicate_threshold = getattr(settings, 'REQUEST_PROFILING_DUPLICATE_THRESHOLD', 3)
+        install_serializer_timer()
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        profile = self.start_profile()
+        if profile is None:
+            return self.finish(request, self.get_response(request), start, profile)
+        token = _current_profile.set(profile)
+        try:
+            with self.wrap_connections(profile):
+                response = self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        return self.finish(request, response, start, profile)
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        profile = self.start_profile()
+        if profile is None:
+            return self.finish(request, await self.get_response(request), start, profile)
+        token = _current_profile.set(profile)
+        # Las conexiones son por hilo y las vistas asíncronas consultan con sync_to_async, que
+        # dentro de una petición ASGI usa siempre el mismo hilo: los wrappers se instalan en él
+        wrappers = await sync_to_async(self.wrap_connections)(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(wrappers.close)()
+            _current_profile.reset(token)
+        return self.finish(request, response, start, profile)
+
+    def start_profile(self):
+        if self.sample_rate >= 1 or random.random() < self.sample_rate:
+            return RequestProfile()
+        return None
+
+    def wrap_connections(self, profile):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(profile))
+        return stack
+
+    def finish(self, request, response, start, profile):
+        elapsed = time.perf_counter() - start
+        match = request.resolver_match
+        route = match.route if match is not None else '<unmatched>'
+        labels = (route, request.method)
+        REQUESTS.inc((*labels, str(response.status_code)))
+        DURATION.observe(labels, elapsed)
+        if profile is None:
+            return response
+
+        DB_TIME.observe(labels, profile.db_time)
+        QUERIES.observe(labels, profile.query_count)
+        SERIALIZER_TIME.observe(labels, profile.serializer_time)
+        duplicates = profile.duplicates(self.duplicate_threshold)
+        if duplicates:
+            DUPLICATES.inc(labels)
+            for sql, count in duplicates.items():
+                logger.warning("Consulta repetida %d veces en %s %s: %s", count, request.method, route, sql)
+
+        repeated = sum(duplicates.values())
+        db_description = f"{profile.query_count} consultas" + (f", {repeated} repetidas" if repeated else "")
+        timings = [
+            f"total;dur={elapsed * 1000:.1f}",
+            f'db;dur={profile.db_time * 1000:.1f};desc="{db_description}"',
+            f"serializer;dur={profile.serializer_time * 1000:.1f}",
+        ]
+        response['Server-Timing'] = ', '.join(timings)
+        return response
+
+
+def render_metrics():
+    return '\n'.join(line for metric in METRICS for line in metric.render()) + '\n'
+
+
+def metrics_view(request):
+    """
+    GET /metrics/ → métricas de este proceso en formato Prometheus. Solo existe con el middleware
+    activado y nunca es pública: hay que enviar ``REQUEST_METRICS_TOKEN`` como ``Bearer`` (el
+    scraper de Prometheus) o tener sesión de staff. Sin token configurado solo entra el staff.
+    """
+    middleware = 'myFirstApiRest.instrumentation.RequestProfilingMiddleware'
+    if middleware not in settings.MIDDLEWARE:
+        raise Http404
+    user = getattr(request, 'user', None)
+    if not (user is not None and user.is_staff):
+        token = getattr(settings, 'REQUEST_METRICS_TOKEN', None)
+        if not token:
+            return HttpResponse(status=403)
+        sent = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(sent.encode(), f'Bearer {token}'.encode()):
+            return HttpResponse(status=401, headers={'WWW-Authenticate': 'Bearer'})
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
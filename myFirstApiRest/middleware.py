@@ -0,0 +1,30 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import HttpResponseBase
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise solo es síncrono: con él en la cadena Django ejecuta todo lo que va detrás
+    (incluidas las vistas asíncronas) dentro de un hilo. Los ficheros estáticos se buscan en
+    memoria, así que basta con devolver la corrutina de la siguiente capa cuando la hay.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        response = super().__call__(request)
+        if not isinstance(response, HttpResponseBase):
+            response = await response
+        return response
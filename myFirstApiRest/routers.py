@@ -0,0 +1,154 @@
+"""
+Réplicas de lectura para el tráfico GET.
+
+Con ``DATABASE_REPLICA_URLS`` (URLs separadas por comas, ver myFirstApiRest.database) settings
+añade los alias ``replica1``, ``replica2``... e instala ``ReadReplicaRouter`` y
+``ReadReplicaMiddleware``. Las lecturas van a una réplica solo si se cumple todo esto:
+
+- la petición es GET, HEAD u OPTIONS (el middleware elige una réplica por petición, así todas
+  sus consultas ven la misma copia);
+- el modelo es de la aplicación ``auctions``: usuarios, tokens y sesiones se leen siempre de la
+  principal (la caché de usuarios de la autenticación JWT no puede guardar una copia atrasada,
+  ni la lista negra de tokens dejar pasar uno revocado);
+- no hay una transacción abierta en la principal: las lecturas que validan pujas
+  (services.place_bid / update_bid) van dentro de una;
+- la respuesta no va a la caché de respuestas (auctions.response_cache): los fallos de caché de
+  los listados anónimos leen de la principal, ver ``read_from_primary``;
+- el usuario no ha escrito en los últimos ``DATABASE_REPLICA_PIN_SECONDS`` segundos (10): tras
+  un POST/PUT/PATCH/DELETE correcto sus lecturas siguen en la principal, así ve su puja en el
+  listado aunque la réplica vaya con retraso. La marca se guarda en la caché
+  ``DATABASE_REPLICA_PIN_CACHE_ALIAS``; con la caché en memoria de cada proceso solo la ve el
+  worker que atendió la escritura, para todos hace falta una caché compartida.
+
+Fuera de una petición (comandos, planificador, shell) todo va a la principal, igual que las
+lecturas de las respuestas en streaming, que se hacen al enviarlas. Las escrituras también,
+siempre.
+
+En local, con dos ficheros SQLite::
+
+    cp db.sqlite3 replica.sqlite3
+    DATABASE_URL=sqlite:///db.sqlite3 DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3 \\
+        python manage.py runserver
+"""
+import contextvars
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+KEY_PREFIX = "replicapin"
+REPLICATED_APPS = {'auctions'}
+
+_current_routing = contextvars.ContextVar('read_routing', default=None)
+
+
+def get_cache():
+    return caches[getattr(settings, 'DATABASE_REPLICA_PIN_CACHE_ALIAS', 'default')]
+
+
+def pin_to_primary(user_id):
+    """Las lecturas del usuario van a la principal durante ``DATABASE_REPLICA_PIN_SECONDS``."""
+    get_cache().set(f"{KEY_PREFIX}:{user_id}", True, getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 10))
+
+
+def is_pinned(user_id):
+    return get_cache().get(f"{KEY_PREFIX}:{user_id}", False)
+
+
+def read_from_primary():
+    """
+    El resto de lecturas de la petición en curso van a la principal. Para las respuestas que se
+    guardan en una caché compartida: una copia atrasada quedaría ahí todo el TTL, no solo lo
+    que tarde la réplica en ponerse al día.
+    """
+    routing = _current_routing.get()
+    if routing is not None:
+        routing.pinned = True
+
+
+class ReadRouting:
+    """Réplica elegida para la petición en curso; la marca del usuario se mira en la primera lectura."""
+
+    def __init__(self, request, replica):
+        self.request = request
+        self.replica = replica
+        self.pinned = None
+
+    def alias(self):
+        if self.pinned is None:
+            # DRF deja el usuario autenticado en la petición de Django antes de que la vista lea
+            user = getattr(self.request, 'user', None)
+            self.pinned = bool(user is not None and user.is_authenticated and is_pinned(user.pk))
+        return DEFAULT_DB_ALIAS if self.pinned else self.replica
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        routing = _current_routing.get()
+        if routing is None or model._meta.app_label not in REPLICATED_APPS:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return routing.alias()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Las réplicas son copias de la principal: los objetos leídos de una y otra se relacionan
+        databases = {DEFAULT_DB_ALIAS, *getattr(settings, 'DATABASE_REPLICAS', ())}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReadReplicaMiddleware:
+    """Elige la réplica de las peticiones de lectura y marca a los usuarios que escriben."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.replicas = list(getattr(settings, 'DATABASE_REPLICAS', ()))
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            if token is not None:
+                _current_routing.reset(token)
+        return self.finish(request, response)
+
+    async def __acall__(self, request):
+        # sync_to_async copia el contexto: las consultas de las vistas asíncronas lo ven
+        token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            if token is not None:
+                _current_routing.reset(token)
+        if request.method not in SAFE_METHODS:
+            # request.user puede ser el usuario perezoso de la sesión: se resuelve en un hilo
+            return await sync_to_async(self.finish)(request, response)
+        return response
+
+    def start(self, request):
+        if request.method not in SAFE_METHODS or not self.replicas:
+            return None
+        return _current_routing.set(ReadRouting(request, random.choice(self.replicas)))
+
+    def finish(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                pin_to_primary(user.pk)
+        return response
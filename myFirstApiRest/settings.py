@@ -12,13 +12,13 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 import os
-import dj_database_url
 from dotenv import load_dotenv
 from datetime import timedelta
-import os
-import dj_database_url
-from dotenv import load_dotenv
 
+from .database import database_config, replica_configs
+
+# Variables de .env (DATABASE_URL, REQUEST_METRICS_TOKEN...) antes de cualquier os.getenv
+load_dotenv()
 
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -65,7 +65,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware', 
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'myFirstApiRest.middleware.AsyncWhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -74,7 +74,19 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Instrumentación por petición (myFirstApiRest.instrumentation): Server-Timing y /metrics/.
+# Opcional; con REQUEST_PROFILING_SAMPLE_RATE < 1 solo se perfila a fondo esa fracción
+if os.getenv("REQUEST_PROFILING") == "1":
+    MIDDLEWARE.insert(0, 'myFirstApiRest.instrumentation.RequestProfilingMiddleware')
+REQUEST_PROFILING_SAMPLE_RATE = float(os.getenv("REQUEST_PROFILING_SAMPLE_RATE", 1.0))
+REQUEST_PROFILING_DUPLICATE_THRESHOLD = 3
+# Token Bearer de /metrics/ para Prometheus; sin él, solo el staff puede leer las métricas
+REQUEST_METRICS_TOKEN = os.getenv("REQUEST_METRICS_TOKEN")
+
 ROOT_URLCONF = 'myFirstApiRest.urls'
+# Lecturas con las vistas asíncronas de auctions.async_views: las activa asgi.py (o .env); con
+# WSGI se usan las vistas DRF síncronas
+ASYNC_READ_VIEWS = os.getenv("ASYNC_READ_VIEWS") == "1"
 
 TEMPLATES = [
     {
@@ -98,10 +110,19 @@ WSGI_APPLICATION = 'myFirstApiRest.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-load_dotenv()
+# Conexiones persistentes con comprobación de salud y pool opcional de psycopg: variables
+# DB_CONN_MAX_AGE, DB_CONN_HEALTH_CHECKS, DB_POOL... (ver myFirstApiRest.database)
 DATABASES = {
-    'default': dj_database_url.config(default=os.getenv("DATABASE_URL"))
+    'default': database_config()
 }
+# Réplicas de lectura para los GET de auctions (myFirstApiRest.routers): DATABASE_REPLICA_URLS
+DATABASES.update(replica_configs())
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ['myFirstApiRest.routers.ReadReplicaRouter']
+    MIDDLEWARE.append('myFirstApiRest.routers.ReadReplicaMiddleware')
+# Segundos que las lecturas de un usuario siguen en la principal después de escribir
+DATABASE_REPLICA_PIN_SECONDS = int(os.getenv("DATABASE_REPLICA_PIN_SECONDS", 10))
 '''
 DATABASES = {
     'default': {
@@ -163,10 +184,58 @@ REST_FRAMEWORK = {
 'DEFAULT_PAGINATION_CLASS':'rest_framework.pagination.PageNumberPagination',
 'PAGE_SIZE': 5,
 'DEFAULT_AUTHENTICATION_CLASSES': (
-'rest_framework_simplejwt.authentication.JWTAuthentication',
+'users.authentication.CachedJWTAuthentication',
 ),
 }
 
+# JSON con orjson (myFirstApiRest.renderers): los mismos bytes con menos CPU. Necesita orjson
+if os.getenv("API_JSON_BACKEND") == "orjson":
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = (
+        'myFirstApiRest.renderers.OrjsonRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    )
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'] = (
+        'myFirstApiRest.renderers.OrjsonParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    )
+
+# Usuario autenticado en caché (users.authentication): segundos que se reutiliza sin consultar
+JWT_USER_CACHE_TIMEOUT = int(os.getenv("JWT_USER_CACHE_TIMEOUT", 60))
+
+
+
+# Caché (en memoria del proceso por defecto). La usa auctions.response_cache para los
+# listados públicos de subastas y categorías
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'lospujantes',
+        'TIMEOUT': 60,
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    }
+}
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", 60))
+
+
+# Listados de subastas, pujas y comentarios leídos con values() sin serializador (auctions.readonly)
+AUCTION_VALUES_LISTS = os.getenv("AUCTION_VALUES_LISTS", "1") == "1"
+
+
+# Backend de búsqueda de subastas (auctions.search). Vacío = el nativo de la base de datos
+AUCTION_SEARCH_BACKEND = os.getenv("AUCTION_SEARCH_BACKEND")
+
+
+# Eventos en tiempo real (auctions.events). Vacío = broker en memoria del proceso
+AUCTION_EVENTS_BROKER = os.getenv("AUCTION_EVENTS_BROKER")
+AUCTION_EVENTS_KEEPALIVE = 15
+# Segundos tras closing_date que un stream espera el cierre del planificador antes de terminar solo
+AUCTION_EVENTS_CLOSE_GRACE = 60
+
+
+# Planificador de cierres (manage.py run_closing_scheduler)
+AUCTION_CLOSING_BATCH_SIZE = 500
+AUCTION_CLOSING_REFRESH = 60
 
 
 SPECTACULAR_SETTINGS = {
@@ -185,6 +254,9 @@ SIMPLE_JWT = {
 "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
 "ROTATE_REFRESH_TOKENS": True,
 "BLACKLIST_AFTER_ROTATION": True,
+# Lista negra con menos consultas por refresh (users.tokens)
+"TOKEN_OBTAIN_SERIALIZER": "users.serializers.TokenObtainPairSerializer",
+"TOKEN_REFRESH_SERIALIZER": "users.serializers.TokenRefreshSerializer",
 }
 
 AUTH_USER_MODEL = 'users.CustomUser'
\ No newline at end of file
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myFirstApiRest.settings')
 
 application = get_wsgi_application()
+
+# La primera petición de cada worker no paga la apertura de la conexión (myFirstApiRest.database)
+if os.getenv('DB_WARMUP', '1') == '1':
+    from myFirstApiRest.database import warm_up_connections
+
+    warm_up_connections()
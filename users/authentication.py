@@ -0,0 +1,96 @@
+"""
+Autenticación JWT con el usuario en caché.
+
+``JWTAuthentication`` carga el ``CustomUser`` de la base de datos en cada petición autenticada;
+``CachedJWTAuthentication`` lo guarda en la caché ``JWT_USER_CACHE_ALIAS`` durante
+``JWT_USER_CACHE_TIMEOUT`` segundos (acotada por el TIMEOUT / MAX_ENTRIES de ``CACHES``). La clave
+incluye el id del usuario y su versión de token: ``invalidate_user`` cambia la versión y las
+entradas antiguas dejan de ser alcanzables, como en auctions.response_cache.
+
+Las señales de users.signals invalidan al guardar o borrar el usuario (cambio de contraseña,
+edición del perfil, baja, cambios desde el admin) y LogoutView al cerrar sesión. Los UPDATE
+masivos (``CustomUser.objects.update``) no disparan señales: hay que llamar a ``invalidate_user``.
+Con la caché en memoria de cada proceso, otro worker puede ver el usuario anterior hasta que
+caduque la entrada; con una caché compartida la invalidación es inmediata en todos.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+KEY_PREFIX = "jwtuser"
+
+
+def get_cache():
+    return caches[getattr(settings, "JWT_USER_CACHE_ALIAS", "default")]
+
+
+def get_timeout():
+    return getattr(settings, "JWT_USER_CACHE_TIMEOUT", 60)
+
+
+def get_version(user_id):
+    cache = get_cache()
+    key = f"{KEY_PREFIX}:version:{user_id}"
+    version = cache.get(key)
+    if version is None:
+        # Nunca se reutiliza una versión que pudiera coincidir con entradas antiguas
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(user_id):
+    cache = get_cache()
+    try:
+        cache.incr(f"{KEY_PREFIX}:version:{user_id}")
+    except ValueError:
+        cache.set(f"{KEY_PREFIX}:version:{user_id}", time.time_ns(), timeout=None)
+
+
+def invalidate_user(user_id):
+    """Descarta el usuario en caché, ahora y otra vez al hacer commit (ver response_cache.invalidate)."""
+    _bump(user_id)
+    transaction.on_commit(lambda: _bump(user_id))
+
+
+def get_cached_user(user_id):
+    """Usuario con ``USER_ID_FIELD`` = user_id, desde la caché o la base de datos (DoesNotExist si no existe)."""
+    cache = get_cache()
+    key = f"{KEY_PREFIX}:{user_id}:{get_version(user_id)}"
+    user = cache.get(key)
+    if user is None:
+        user = get_user_model().objects.get(**{api_settings.USER_ID_FIELD: user_id})
+        cache.set(key, user, get_timeout())
+    return user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication que resuelve el usuario desde la caché (las comprobaciones no cambian)."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        try:
+            user = get_cached_user(user_id)
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
@@ -0,0 +1,126 @@
+import time
+import uuid
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.views import TokenRefreshView
+
+from auctions.benchmarking import benchmark_database, percentile
+from users import serializers
+from users.management.commands.purge_expired_tokens import purge_expired_tokens
+from users.models import CustomUser
+
+SERIALIZERS = {
+    "simplejwt": (jwt_serializers.TokenObtainPairSerializer, jwt_serializers.TokenRefreshSerializer),
+    "users.tokens": (serializers.TokenObtainPairSerializer, serializers.TokenRefreshSerializer),
+}
+
+
+class Command(BaseCommand):
+    help = ("Llena la lista de refresh tokens emitidos (y la lista negra) con millones de filas y mide "
+            "/api/token/refresh/ con el serializador de simplejwt y con el de users.tokens: "
+            "peticiones por segundo, latencia y consultas por petición. Después mide el borrado de caducados.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tokens", type=int, default=2_000_000, help="Filas en OutstandingToken.")
+        parser.add_argument("--blacklisted", type=float, default=0.5, help="Fracción en la lista negra.")
+        parser.add_argument("--expired", type=float, default=0.5, help="Fracción ya caducada.")
+        parser.add_argument("--requests", type=int, default=2000, help="Refresh por serializador.")
+        parser.add_argument("--batch-size", type=int, default=20000)
+        parser.add_argument("--keepdb", action="store_true", help="Conservar (y reutilizar) la base de datos.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        try:
+            with benchmark_database(keepdb=options["keepdb"]) as connection:
+                user = CustomUser.objects.filter(username="bench_refresh").first()
+                if user is None:
+                    user = CustomUser.objects.create_user(
+                        username="bench_refresh", password="Bench.Secreta.123", email="bench_refresh@example.com",
+                        birth_date=date(1990, 1, 1),
+                    )
+                    self.seed(user, options)
+                self.stdout.write(
+                    f"Base de datos: {connection.vendor}; {OutstandingToken.objects.count()} tokens emitidos, "
+                    f"{BlacklistedToken.objects.count()} en la lista negra"
+                )
+                for name, (obtain, refresh) in SERIALIZERS.items():
+                    self.run_refresh(name, user, obtain, refresh, options["requests"])
+
+                start = time.perf_counter()
+                deleted = purge_expired_tokens(batch_size=options["batch_size"])
+                elapsed = time.perf_counter() - start
+                self.stdout.write(self.style.MIGRATE_HEADING("\n== purge_expired_tokens"))
+                self.stdout.write(f"{deleted} tokens caducados borrados en {elapsed:.1f} s ({deleted / elapsed:.0f} filas/s)")
+        finally:
+            teardown_test_environment()
+
+    def seed(self, user, options):
+        start = time.perf_counter()
+        now = timezone.now()
+        expired = int(options["tokens"] * options["expired"])
+        # Un token real ocupa unos 230 caracteres: el tamaño de la tabla se parece al real
+        token_text = "x" * 230
+        for offset in range(0, options["tokens"], options["batch_size"]):
+            OutstandingToken.objects.bulk_create([
+                OutstandingToken(
+                    user=user, jti=uuid.uuid4().hex, token=token_text, created_at=now,
+                    # Los caducados primero, como en una tabla que lleva tiempo sin purgar
+                    expires_at=now + (timedelta(days=-1) if index < expired else timedelta(days=7)),
+                )
+                for index in range(offset, min(offset + options["batch_size"], options["tokens"]))
+            ])
+        step = max(1, round(1 / options["blacklisted"])) if options["blacklisted"] else 0
+        if step:
+            quote = connection.ops.quote_name
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {quote(BlacklistedToken._meta.db_table)} (token_id, blacklisted_at) "
+                    f"SELECT id, %s FROM {quote(OutstandingToken._meta.db_table)} WHERE id %% %s = 0",
+                    [connection.ops.adapt_datetimefield_value(now), step],
+                )
+        self.stdout.write(f"Datos generados en {time.perf_counter() - start:.0f} s")
+
+    def run_refresh(self, name, user, obtain_serializer, refresh_serializer, requests):
+        cache.clear()
+        factory = APIRequestFactory()
+        view = TokenRefreshView.as_view(serializer_class=refresh_serializer)
+        refresh = str(obtain_serializer.get_token(user))
+
+        def call(token):
+            response = view(factory.post("/api/token/refresh/", {"refresh": token}, format="json"))
+            response.render()
+            return response
+
+        timings = []
+        queries = 0
+        for _ in range(requests):
+            # El registro de consultas guarda como mucho 9000: se vacía en cada petición
+            reset_queries()
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                response = call(refresh)
+                timings.append(time.perf_counter() - start)
+            queries += len(ctx.captured_queries)
+            assert response.status_code == 200, response.data
+            previous, refresh = refresh, response.data["refresh"]
+
+        # Reenviar un refresh ya rotado (cliente con reintentos o token robado)
+        with CaptureQueriesContext(connection) as replay:
+            status = call(previous).status_code
+
+        timings.sort()
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {name}"))
+        self.stdout.write(
+            f"refresh: {len(timings) / sum(timings):.0f} req/s, p50 {percentile(timings, 50) * 1000:.2f} ms, "
+            f"p95 {percentile(timings, 95) * 1000:.2f} ms, p99 {percentile(timings, 99) * 1000:.2f} ms, "
+            f"{queries / requests:.1f} consultas"
+        )
+        self.stdout.write(f"refresh ya rotado: {status}, {len(replay.captured_queries)} consultas")
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+def purge_expired_tokens(batch_size=10000, now=None):
+    """
+    Borra por lotes los refresh tokens caducados y su entrada en la lista negra (un token
+    caducado ya no pasa la validación, así que no hace falta recordarlo). Devuelve los borrados.
+    """
+    now = now or timezone.now()
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            # Los caducados son los más antiguos: recorriendo la clave primaria se encuentran al
+            # principio, sin índice sobre expires_at
+            batch = list(OutstandingToken.objects.filter(expires_at__lte=now).order_by('pk')
+                         .values_list('pk', flat=True)[:batch_size])
+            if not batch:
+                return deleted
+            BlacklistedToken.objects.filter(token_id__in=batch).delete()
+            # Un único DELETE: delete() cargaría cada fila para resolver el CASCADE, que ya está hecho
+            OutstandingToken.objects.filter(pk__in=batch)._raw_delete(OutstandingToken.objects.db)
+        deleted += len(batch)
+
+
+class Command(BaseCommand):
+    help = ("Borra por lotes los refresh tokens caducados (OutstandingToken y BlacklistedToken). "
+            "Con --every se repite periódicamente.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10000, help="Tokens por transacción.")
+        parser.add_argument("--every", type=float, metavar="SEGUNDOS", help="Repetir cada SEGUNDOS.")
+
+    def handle(self, *args, **options):
+        while True:
+            start = time.perf_counter()
+            deleted = purge_expired_tokens(batch_size=options["batch_size"])
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"{deleted} token(s) caducado(s) borrado(s) en {elapsed:.2f} s "
+                              f"({deleted / elapsed if elapsed else 0:.0f} filas/s).")
+            if not options["every"]:
+                return
+            try:
+                time.sleep(options["every"])
+            except KeyboardInterrupt:
+                return
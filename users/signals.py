@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_user
+from .models import CustomUser
+
+
+# --- Usuario en caché de la autenticación JWT (users.authentication) ---
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def user_changed(sender, instance, created=False, **kwargs):
+    if not created:
+        invalidate_user(instance.pk)
@@ -1,3 +1,147 @@
-from django.test import TestCase
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .management.commands.purge_expired_tokens import purge_expired_tokens
+from .models import CustomUser
+from .tokens import RefreshToken as FastRefreshToken
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            username="pujador", password="Secreta.123", email="pujador@example.com", birth_date=date(1990, 1, 1),
+        )
+        self.refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.refresh.access_token}")
+
+    def profile(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("users:user-profile"))
+        return response, len(queries)
+
+    def test_user_lookup_is_cached(self):
+        response, queries = self.profile()
+        self.assertEqual((response.status_code, queries), (200, 1))
+        response, queries = self.profile()
+        self.assertEqual((response.status_code, queries), (200, 0))
+        self.assertEqual(response.data["username"], "pujador")
+
+    def test_profile_update_invalidates(self):
+        self.profile()
+        response = self.client.patch(reverse("users:user-profile"), {"locality": "Madrid"})
+        self.assertEqual(response.status_code, 200)
+        response, queries = self.profile()
+        self.assertEqual((response.data["locality"], queries), ("Madrid", 1))
+
+    def test_profile_update_uses_current_row(self):
+        self.profile()
+        # UPDATE masivo sin señales: la copia en caché queda desfasada
+        CustomUser.objects.filter(pk=self.user.pk).update(email="nuevo@example.com")
+        self.client.patch(reverse("users:user-profile"), {"locality": "Madrid"})
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.email, self.user.locality), ("nuevo@example.com", "Madrid"))
+
+    def test_password_change_invalidates(self):
+        self.profile()
+        response = self.client.post(reverse("users:change-password"),
+                                    {"old_password": "Secreta.123", "new_password": "Otra.Secreta.456"})
+        self.assertEqual(response.status_code, 200)
+        _, queries = self.profile()
+        self.assertEqual(queries, 1)
+
+    def test_deleted_and_inactive_users_are_rejected(self):
+        self.profile()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.profile()[0].status_code, 401)
+
+        self.user.delete()
+        self.assertEqual(self.profile()[0].status_code, 401)
+
+    def test_logout_invalidates(self):
+        self.profile()
+        response = self.client.post(reverse("users:log-out"), {"refresh": str(self.refresh)})
+        self.assertEqual(response.status_code, 205)
+        _, queries = self.profile()
+        self.assertEqual(queries, 1)
+
+
+class TokenRefreshBlacklistTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            username="pujador", password="Secreta.123", email="pujador@example.com", birth_date=date(1990, 1, 1),
+        )
+        response = self.client.post(reverse("token_obtain_pair"), {"username": "pujador", "password": "Secreta.123"})
+        self.refresh = response.data["refresh"]
+
+    def refresh_token(self, token):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse("token_refresh"), {"refresh": token})
+        return response, len(queries)
+
+    def test_refresh_rotates_and_blacklists(self):
+        response, queries = self.refresh_token(self.refresh)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.data["refresh"], self.refresh)
+        # INSERT en la lista negra + INSERT del token nuevo (el usuario ya está en caché)
+        self.assertLessEqual(queries, 3)
+        self.assertTrue(BlacklistedToken.objects.filter(token__token=self.refresh).exists())
+        self.assertTrue(OutstandingToken.objects.filter(token=response.data["refresh"], user=self.user).exists())
+
+        response, _ = self.refresh_token(response.data["refresh"])
+        self.assertEqual(response.status_code, 200)
+
+    def test_reused_token_is_rejected(self):
+        self.assertEqual(self.refresh_token(self.refresh)[0].status_code, 200)
+        response, queries = self.refresh_token(self.refresh)
+        self.assertEqual((response.status_code, queries), (401, 0))
+
+        # Otro proceso, sin el JTI en su caché: decide la base de datos
+        cache.clear()
+        response, _ = self.refresh_token(self.refresh)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+
+    def test_token_without_outstanding_row(self):
+        OutstandingToken.objects.all().delete()
+        self.assertEqual(self.refresh_token(self.refresh)[0].status_code, 200)
+        cache.clear()
+        self.assertEqual(self.refresh_token(self.refresh)[0].status_code, 401)
+
+    def test_inactive_user_cannot_refresh(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.refresh_token(self.refresh)[0].status_code, 401)
+
+    def test_logout_blacklists(self):
+        access = self.client.post(reverse("token_refresh"), {"refresh": self.refresh}).data
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access['access']}")
+        response = self.client.post(reverse("users:log-out"), {"refresh": access["refresh"]})
+        self.assertEqual(response.status_code, 205)
+        self.assertEqual(self.refresh_token(access["refresh"])[0].status_code, 401)
+        self.assertFalse(FastRefreshToken(self.refresh, verify=False).blacklist())
+
+    def test_purge_expired_tokens(self):
+        now = timezone.now()
+        expired = [
+            OutstandingToken.objects.create(user=self.user, jti=f"caducado{i}", token="x",
+                                            expires_at=now - timedelta(days=1))
+            for i in range(5)
+        ]
+        BlacklistedToken.objects.create(token=expired[0])
+        valid = OutstandingToken.objects.get(token=self.refresh)
+        BlacklistedToken.objects.create(token=valid)
+
+        self.assertEqual(purge_expired_tokens(batch_size=2, now=now), 5)
+        self.assertQuerySetEqual(OutstandingToken.objects.all(), [valid])
+        self.assertQuerySetEqual(BlacklistedToken.objects.values_list("token", flat=True), [valid.pk])
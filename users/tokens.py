@@ -0,0 +1,122 @@
+"""
+Lista negra de refresh tokens con menos consultas.
+
+Con ``ROTATE_REFRESH_TOKENS`` y ``BLACKLIST_AFTER_ROTATION`` cada ``/api/token/refresh/`` de
+simplejwt hace unas nueve consultas: comprobar la lista negra (JOIN con OutstandingToken),
+cargar el usuario tres veces, dos get_or_create con sus savepoints y el INSERT del token nuevo.
+Aquí:
+
+- la comprobación y el alta en la lista negra son un único ``INSERT ... SELECT ... ON CONFLICT
+  DO NOTHING``: si no inserta nada, el token ya estaba en la lista negra. Además cierra la
+  carrera de simplejwt, en la que dos refresh simultáneos con el mismo token pasaban los dos;
+- el usuario sale de la caché de users.authentication;
+- el token nuevo se registra con ``user_id``, sin volver a cargar el usuario.
+
+Antes de ir a la base de datos se mira un conjunto exacto en caché con los JTI que se han
+metido en la lista negra (cada uno caduca con su token): los tokens ya rotados o de sesiones
+cerradas que se reenvían se rechazan sin consultas. Un fallo en ese conjunto no demuestra nada
+(otro worker, o una entrada expulsada), así que entonces decide la base de datos; por eso
+tampoco hay filtro de Bloom: su respuesta negativa tampoco sería fiable entre procesos.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken as SimpleJWTRefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+KEY_PREFIX = "tokenblacklist"
+
+
+def get_cache():
+    return caches[getattr(settings, "TOKEN_BLACKLIST_CACHE_ALIAS", "default")]
+
+
+def remember_blacklisted(jti, exp):
+    timeout = int(exp - timezone.now().timestamp())
+    if timeout > 0:
+        get_cache().set(f"{KEY_PREFIX}:{jti}", True, timeout)
+
+
+def is_known_blacklisted(jti):
+    return get_cache().get(f"{KEY_PREFIX}:{jti}", False)
+
+
+def insert_blacklisted(jti):
+    """Mete en la lista negra el token ``jti`` si tiene fila en OutstandingToken. Devuelve si la ha insertado."""
+    quote = connection.ops.quote_name
+    blacklisted = BlacklistedToken._meta.db_table
+    outstanding = OutstandingToken._meta.db_table
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote(blacklisted)} ({quote('token_id')}, {quote('blacklisted_at')}) "
+            f"SELECT {quote('id')}, %s FROM {quote(outstanding)} WHERE {quote('jti')} = %s "
+            f"ON CONFLICT ({quote('token_id')}) DO NOTHING",
+            [now, jti],
+        )
+        return cursor.rowcount == 1
+
+
+class RefreshToken(SimpleJWTRefreshToken):
+    # RotatingRefreshToken lo activa: blacklist() ya comprueba la lista negra al insertar
+    defer_blacklist_check = False
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if is_known_blacklisted(jti):
+            raise TokenError(_("Token is blacklisted"))
+        if self.defer_blacklist_check:
+            return
+        try:
+            super().check_blacklist()
+        except TokenError:
+            remember_blacklisted(jti, self.payload["exp"])
+            raise
+
+    def blacklist(self):
+        """
+        Mete el token en la lista negra. Devuelve False si ya lo estaba (para un refresh con
+        rotación, que el token ya se había usado).
+        """
+        jti = self.payload[api_settings.JTI_CLAIM]
+        exp = self.payload["exp"]
+        created = insert_blacklisted(jti)
+        if not created:
+            # Sin fila en OutstandingToken (emitido antes de la lista negra) o ya en la lista negra
+            user_id = self.payload.get(api_settings.USER_ID_CLAIM)
+            token = OutstandingToken.objects.get_or_create(
+                jti=jti,
+                defaults={
+                    "user": get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first(),
+                    "created_at": self.current_time,
+                    "token": str(self),
+                    "expires_at": datetime_from_epoch(exp),
+                },
+            )[0]
+            created = BlacklistedToken.objects.get_or_create(token=token)[1]
+        remember_blacklisted(jti, exp)
+        return created
+
+    def outstand(self):
+        # El usuario ya se ha comprobado al validar el refresh: basta con su id
+        return OutstandingToken.objects.create(
+            user_id=self.payload.get(api_settings.USER_ID_CLAIM),
+            jti=self.payload[api_settings.JTI_CLAIM],
+            token=str(self),
+            created_at=self.current_time,
+            expires_at=datetime_from_epoch(self.payload["exp"]),
+        )
+
+
+class RotatingRefreshToken(RefreshToken):
+    """
+    Refresh token que se va a rotar (y meter en la lista negra) en cuanto se valide: la
+    consulta de la lista negra se aplaza a blacklist(), que falla si el token ya estaba.
+    """
+    defer_blacklist_check = True
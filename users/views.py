@@ -3,13 +3,13 @@ from django.shortcuts import render
 # Create your views here.
 from rest_framework import status, generics
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from .authentication import invalidate_user
 from .models import CustomUser
 from .serializers import UserSerializer, ChangePasswordSerializer
+from .tokens import RefreshToken
 from rest_framework import status, generics
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.exceptions import ValidationError
 from django.contrib.auth.password_validation import validate_password
 from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
@@ -50,6 +50,8 @@ class UserProfileView(APIView):
         return Response(serializer.data)
 
     def patch(self, request):
+        # request.user puede venir de la caché de autenticación: se guarda sobre los datos actuales
+        request.user.refresh_from_db()
         serializer = UserSerializer(request.user, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
@@ -67,6 +69,7 @@ class ChangePasswordView(APIView):
     def post(self, request):
         serializer = ChangePasswordSerializer(data=request.data)
         user = request.user
+        user.refresh_from_db()
     
         if serializer.is_valid():
             if not user.check_password(serializer.validated_data['old_password']):
@@ -98,6 +101,7 @@ class LogoutView(APIView):
             # Revocar el RefreshToken
             token = RefreshToken(refresh_token)
             token.blacklist()
+            invalidate_user(request.user.pk)
             return Response({"detail": "Logout successful"}, status=status.HTTP_205_RESET_CONTENT)
         
         except Exception as e: